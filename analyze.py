@@ -1,15 +1,376 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import os
+import uuid
+from datetime import datetime
 
 import fe_tools as fet
+import plotter
+import profiling
 
 TEMP_FOLDER = "./temp"
 BASE_PICTURE = "./data/base_picture.png"
-ALGORITHM_VER = 1.0
+ALGORITHM_VER = 1.5
 
+RST_PLOT_LEN = 2000     # 운전신호 그림에 표시할 샘플 수
+P2P_WINDOW = 200        # 순간 최대 변동폭 윈도우 (샘플 수)
+N_HARMONICS = 10        # THD 계산 최대 고조파 차수
+TABLE_HARMONICS = 7     # 보고서 고조파 표에 표시할 최대 차수
+START_VIEW = (0.2, 1.0) # 기동 순간 그림 구간 (기동 전, 후 초)
+STOP_VIEW = (0.5, 0.5)  # 정지 순간 그림 구간 (정지 전, 후 초)
+STOPPED_VIEW = 0.5      # 정지 신호 그림 길이 (초)
 
-def run_analysis(motor_name: str, aws_files: list):
+
+# 0 보다 크면 이보다 긴 캡처는 메모리 맵 + 블록 단위로 분석 (메모리 사용량 O(블록))
+CHUNK_SAMPLES = int(os.environ.get("FA_CHUNK_SAMPLES", 0))
+SPECTRUM_WINDOW = "hann"  # 캡처 전체 스펙트럼 윈도우 (캡처가 주기의 정수배가 아니어도 진폭/THD 보정)
+CHUNK_WINDOW = "flattop"  # 블록 스펙트럼 윈도우 (구간이 주기에 맞지 않아도 진폭 오차가 작음)
+# 분석 중에 미리 읽어둘 파일 수 (0 이면 한 파일씩 순서대로 로딩)
+PREFETCH_DEPTH = int(os.environ.get("FA_PREFETCH_DEPTH", fet.PREFETCH_DEPTH))
+
+# 1 이면 그림을 ./temp 에도 저장 (디버그용)
+DEBUG_PICS = os.environ.get("FA_DEBUG_PICS", "0") == "1"
+
+
+def _debug_dump(pic, motor_name: str, kind: str):
+    # 모터별로 구분되는 고유한 파일명으로 저장
+    safe_name = "".join(c if c.isalnum() else "_" for c in motor_name)
+    path = os.path.join(TEMP_FOLDER, f"{safe_name}_{kind}_{uuid.uuid4().hex[:8]}.png")
+    os.makedirs(TEMP_FOLDER, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(pic.getvalue())
+    return path
+
+
+def _format_acq_time(acq_time, offset=0.0):
+    """
+    acq_time (epoch 초/밀리초 또는 문자열) + offset(초) 을 표시용 문자열로 변환
+    """
+    try:
+        ts = float(acq_time)
+    except (TypeError, ValueError):
+        return f"{acq_time} +{offset:.3f} s"
+    if ts > 1e12:
+        ts /= 1000
+    if ts > 1e9:
+        return datetime.fromtimestamp(ts + offset).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    return f"{acq_time} +{offset:.3f} s"
+
+
+def calc_capture_metrics(d, rms=None, spec=None, seq=None):
+    """
+    캡처 하나의 요약 지표 (보고서/데이터 내보내기 공용)
+    d: load_AWSjson 결과
+    rms: 순시 RMS-A (없으면 계산)
+    spec: calc_batch_spectrum 결과, 행 순서 u, v, w (없으면 계산)
+    seq: calc_sequence_components 결과 (없으면 계산)
+    return: dictionary (스칼라 값만 포함)
+    """
+    fs = d["sampling_rate"]
+    u, v, w = (d[k] for k in DrivingAggregator.PHASES)
+    if rms is None:
+        rms = fet.calc_power(u, v, w)
+    if spec is None:
+        spec = fet.calc_batch_spectrum(np.vstack([u, v, w]), fs=fs, window=SPECTRUM_WINDOW,
+                                       n_harmonics=N_HARMONICS)
+    if seq is None:
+        seq = fet.calc_sequence_components(u, v, w, fs, f0=float(spec["freq"][0]))
+    phase_rms = [np.sqrt(np.mean(np.square(x, dtype=np.float64))) for x in (u, v, w)]
+    return _metrics_row(d, u.size, rms.mean(), rms.std(), rms.max() - rms.min(), phase_rms, spec,
+                        summarize_sequence(seq))
+
+
+def summarize_sequence(seq):
+    """
+    주기별 대칭분 결과를 캡처 하나의 값으로 요약 (운전 중 주기만, 기동/정지 순간의 튐을 줄이려고 중앙값)
+    seq: calc_sequence_components 결과
+    return: dictionary(
+        'unbalance': 역상분/정상분 중앙값 (%)
+        'unbalance_p99': 역상분/정상분 상위 1% (%)
+        'zero_ratio': 영상분/정상분 중앙값 (%)
+        'rms_imbalance': 상별 RMS 불평형 중앙값 (%)
+        'reverse_sequence': 상 순서가 u, w, v 이면 1
+    ) 운전 중 주기가 없으면 값은 nan
+    """
+    running = seq["running"]
+    ret = {"reverse_sequence": float(seq["sequence"] != "uvw")}
+    for k in ("unbalance", "zero_ratio", "rms_imbalance"):
+        ret[k] = float(np.median(seq[k][running])) if running.any() else np.nan
+    ret["unbalance_p99"] = float(np.percentile(seq["unbalance"][running], 99)) if running.any() else np.nan
+    return ret
+
+
+def _metrics_row(d, n, rms_mean, rms_std, p2p, phase_rms, spec, seq_summary):
+    m = {
+        "acq_time": d.get("acq_time"),
+        "mac_address": d.get("mac_address"),
+        "sampling_rate": d["sampling_rate"],
+        "sample_size": int(n),
+        "rms_mean": float(rms_mean),
+        "rms_std": float(rms_std),
+        "p2p": float(p2p),
+    }
+    for i, ph in enumerate("uvw"):
+        m[f"rms_{ph}"] = float(phase_rms[i])
+        m[f"freq_{ph}"] = float(spec["freq"][i])
+        m[f"amp_{ph}"] = float(spec["amp"][i])
+        m[f"thd_{ph}"] = float(spec["thd"][i])
+    m.update(seq_summary)
+    return m
+
+
+class DrivingAggregator:
+    """
+    캡처를 하나씩 받아 운전신호 통계를 누적합니다.
+    그림에 필요한 짧은 구간만 복사해 두므로 파일 수와 관계없이
+    메모리 사용량은 캡처 한 개 수준으로 유지됩니다.
+    ex)
+        agg = DrivingAggregator()
+        for d in fet.load_AWSjson_iter(aws_files):
+            agg.add(d)
+    """
+    PHASES = ("current_u", "current_v", "current_w")
+
+    def __init__(self):
+        self.count = 0
+        self.rms_stats = fet.RunningStats()
+        self.p2p = 0.0
+        self.fft_x = None                # 기준 주파수축 (첫 캡처)
+        self.fft_sum = None              # [u, v, w, rms] 스펙트럼 합
+        self.thd = {k: [] for k in self.PHASES}
+        self.fundamental = {k: [] for k in self.PHASES}  # 캡처별 (기본파 주파수, 진폭), 윈도우 보정
+        self.harmonic_sum = np.zeros((len(self.PHASES), N_HARMONICS))  # 기본파 대비 %
+        self.rst_snapshot = None         # 첫 캡처의 운전신호 구간
+        self.p2p_window = -1.0           # 윈도우 내 최대 RMS-A 변동폭
+        self.p2p_snapshot = None         # 변동폭이 가장 큰 윈도우
+        self.n_starts = 0
+        self.n_stops = 0
+        self.inrush_peak = 0.0           # 기동 직후 최대 RMS-A
+        self.start_snapshot = None       # 첫 기동 순간
+        self.stop_snapshot = None        # 첫 정지 순간
+        self.stopped_snapshot = None     # 첫 정지 구간
+        self.captures = []               # 캡처별 요약 지표 (calc_capture_metrics)
+        self.sequence = {k: [] for k in ("unbalance", "unbalance_p99", "zero_ratio", "rms_imbalance")}
+        self.n_reverse = 0               # 상 순서가 u, w, v 인 캡처 수
+
+    @staticmethod
+    def _rms_slice(uvw, rms, start, stop):
+        # rms 가 없으면 (블록 단위 분석) 필요한 구간만 계산
+        if rms is not None:
+            return rms[start:stop]
+        return fet.calc_power(*(x[start:stop] for x in uvw))
+
+    @classmethod
+    def _snapshot(cls, d, uvw, rms, start, stop):
+        # 그림용 구간만 복사 (원본 캡처는 다음 파일 로딩 시 해제)
+        start, stop = max(int(start), 0), min(int(stop), uvw[0].size)
+        return {
+            "acq_time": d["acq_time"],
+            "t": np.arange(start, stop) / d["sampling_rate"],
+            "uvw": [np.array(x[start:stop]) for x in uvw],
+            "rms": np.array(cls._rms_slice(uvw, rms, start, stop)),
+        }
+
+    def _add_transients(self, d, uvw, rms, ev):
+        fs = d["sampling_rate"]
+        n = uvw[0].size
+        starts, stops, running = ev["starts"], ev["stops"], ev["running"]
+        self.n_starts += starts.size
+        self.n_stops += stops.size
+        post = int(START_VIEW[1]*fs)
+        for s in starts:
+            self.inrush_peak = max(self.inrush_peak, float(self._rms_slice(uvw, rms, s, s+post).max()))
+        if self.start_snapshot is None and starts.size:
+            s = starts[0]
+            self.start_snapshot = self._snapshot(d, uvw, rms, s-START_VIEW[0]*fs, s+post)
+        if self.stop_snapshot is None and stops.size:
+            e = stops[0]
+            self.stop_snapshot = self._snapshot(d, uvw, rms, e-STOP_VIEW[0]*fs, e+STOP_VIEW[1]*fs)
+        if self.stopped_snapshot is None:
+            # 운전 구간 사이의 정지 구간 중 STOPPED_VIEW 이상인 첫 구간
+            edges = np.concatenate([[0], running.ravel(), [n]]).reshape(-1, 2)
+            length = int(STOPPED_VIEW*fs)
+            idle = edges[edges[:, 1] - edges[:, 0] >= length]
+            if idle.size:
+                s = idle[0, 0]
+                self.stopped_snapshot = self._snapshot(d, uvw, rms, s, s+length)
+
+    def _add_spectrum(self, spec):
+        spectra = spec["fft_y"]
+        if self.fft_x is None:
+            self.fft_x = spec["fft_x"]
+        elif spec["fft_x"].size != self.fft_x.size:
+            # 길이가 다른 캡처는 기준 주파수축으로 보간
+            spectra = np.vstack([np.interp(self.fft_x, spec["fft_x"], y) for y in spectra])
+        for i, k in enumerate(self.PHASES):
+            self.thd[k].append(float(spec["thd"][i]))
+            self.fundamental[k].append((float(spec["freq"][i]), float(spec["amp"][i])))
+        harmonics = spec["harmonics"][:len(self.PHASES)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.harmonic_sum += np.nan_to_num(harmonics / harmonics[:, :1] * 100)
+        self.fft_sum = spectra.astype(np.float64) if self.fft_sum is None else self.fft_sum + spectra
+
+    def _add_sequence(self, seq):
+        summary = summarize_sequence(seq)
+        for k, values in self.sequence.items():
+            values.append(summary[k])
+        self.n_reverse += int(summary["reverse_sequence"])
+        return summary
+
+    def _add_p2p_window(self, d, uvw, rms, value, i, window):
+        # 순간 최대 변동폭: 전체 캡처에서 RMS-A 변동이 가장 큰 윈도우
+        if value > self.p2p_window:
+            self.p2p_window = value
+            self.p2p_snapshot = self._snapshot(d, uvw, rms, i, i+window)
+            self.p2p_snapshot["offset"] = i / d["sampling_rate"]
+
+    def add(self, d, chunk=None):
+        """
+        캡처 하나 누적
+        d: load_AWSjson (또는 load_AWSjson_mmap) 결과
+        chunk: 지정하면 이보다 긴 캡처는 블록 단위로 처리 (_add_chunked)
+        """
+        fs = d["sampling_rate"]
+        u, v, w = (d[k] for k in self.PHASES)
+        profiling.count("analyze.captures")
+        profiling.count("analyze.samples", u.size)
+        if chunk and u.size > chunk:
+            with profiling.stage("analyze.chunked"):
+                self._add_chunked(d, chunk)
+            return
+        with profiling.stage("analyze.rms"):
+            rms = fet.calc_power(u, v, w)
+            self.count += 1
+            self.rms_stats.update(rms)
+            self.p2p = max(self.p2p, float(rms.max() - rms.min()))
+
+        # u, v, w, rms 를 한 번의 fft 로 처리
+        with profiling.stage("analyze.fft"):
+            spec = fet.calc_batch_spectrum(np.vstack([u, v, w, rms]), fs=fs, window=SPECTRUM_WINDOW,
+                                           n_harmonics=N_HARMONICS)
+            self._add_spectrum(spec)
+
+        # 기본파 주기별 대칭분, 상 불평형
+        with profiling.stage("analyze.sequence"):
+            seq = fet.calc_sequence_components(u, v, w, fs, f0=float(spec["freq"][0]))
+            self._add_sequence(seq)
+            self.captures.append(calc_capture_metrics(d, rms=rms, spec=spec, seq=seq))
+
+        with profiling.stage("analyze.transients"):
+            self._add_transients(d, (u, v, w), rms, fet.detect_transients(rms, fs))
+
+        with profiling.stage("analyze.p2p"):
+            window = min(P2P_WINDOW, rms.size)
+            sliding = fet.calc_sliding_p2p(rms, window)
+            if sliding.size:
+                i = int(sliding.argmax())
+                self._add_p2p_window(d, (u, v, w), rms, float(sliding[i]), i, window)
+
+        if self.rst_snapshot is None:
+            self.rst_snapshot = self._snapshot(d, (u, v, w), rms, 0, RST_PLOT_LEN)
+
+    def _add_chunked(self, d, chunk):
+        """
+        긴 캡처를 chunk 샘플 블록 단위로 누적 (메모리 맵 캡처용)
+        RMS-A 는 블록마다 계산하고 버리므로 메모리 사용량은 캡처 길이와 무관합니다.
+        통계, 변동폭, 기동/정지는 add 와 같은 값이고, 스펙트럼은 chunk 길이 구간들의
+        평균 진폭 스펙트럼(Bartlett, CHUNK_WINDOW 적용)입니다. 주파수 분해능은 fs/chunk 입니다.
+        """
+        fs = d["sampling_rate"]
+        uvw = tuple(d[k] for k in self.PHASES)
+        n = uvw[0].size
+        t_window, t_step = fet.calc_transient_window(fs)
+        chunk = max(chunk // t_step, 1) * t_step  # 포락선 윈도우 시작을 블록 경계에 맞춤
+        window = min(P2P_WINDOW, n)
+
+        stats = fet.RunningStats()
+        rms_min, rms_max = np.inf, -np.inf
+        sumsq = np.zeros(len(uvw))
+        env = []
+        best, best_i = -1.0, 0
+        amp_sum, n_seg = 0.0, 0
+        for start, stop, ext in fet.iter_blocks(n, chunk, overlap=max(window-1, t_window)):
+            size = stop - start
+            block = [np.asarray(x[start:ext]) for x in uvw]
+            rms = fet.calc_power(*block)
+            own = rms[:size]
+            stats.update(own)
+            rms_min = min(rms_min, float(own.min()))
+            rms_max = max(rms_max, float(own.max()))
+            sumsq += [np.square(x[:size], dtype=np.float64).sum() for x in block]
+            env.append(fet.calc_window_rms(rms, t_window, t_step)[:-(-size // t_step)])
+            sliding = fet.calc_sliding_p2p(rms, window)[:size]
+            if sliding.size and sliding.max() > best:
+                i = int(sliding.argmax())
+                best, best_i = float(sliding[i]), start + i
+            if size == chunk:
+                fftx, amp = fet.calc_batch_fft(np.vstack([x[:size] for x in block] + [own]), fs,
+                                               window=CHUNK_WINDOW)
+                amp_sum = amp_sum + amp
+                n_seg += 1
+            del block, rms, own, sliding
+
+        fft_y = amp_sum / n_seg
+        spec = fet.calc_harmonics_from_spectrum(fftx, fft_y, n_harmonics=N_HARMONICS, window=CHUNK_WINDOW)
+        spec["fft_x"], spec["fft_y"] = fftx, fft_y
+
+        self.count += 1
+        self.rms_stats.merge(stats)
+        self.p2p = max(self.p2p, rms_max - rms_min)
+        self._add_spectrum(spec)
+        seq = self._chunked_sequence(uvw, fs, float(spec["freq"][0]), chunk)
+        self.captures.append(_metrics_row(d, n, stats.mean, stats.std, rms_max - rms_min,
+                                          np.sqrt(sumsq / n), spec, self._add_sequence(seq)))
+        ev = fet.detect_transients_envelope(np.concatenate(env), n, t_window, t_step)
+        self._add_transients(d, uvw, None, ev)
+        self._add_p2p_window(d, uvw, None, best, best_i, window)
+        if self.rst_snapshot is None:
+            self.rst_snapshot = self._snapshot(d, uvw, None, 0, RST_PLOT_LEN)
+
+    @staticmethod
+    def _chunked_sequence(uvw, fs, f0, chunk):
+        # 캡처 전체의 기본파로 주기 경계에 맞춘 블록마다 주기 값을 구해 모은 뒤 한 번에 대칭분 계산
+        phasors, cycle_rms = [np.zeros((len(uvw), 0), dtype=np.complex128)], [np.zeros((len(uvw), 0))]
+        for start, stop in fet.iter_cycle_blocks(uvw[0].size, fs, f0, chunk):
+            block = np.vstack([np.asarray(x[start:stop]) for x in uvw])
+            phasors.append(fet.calc_cycle_phasors(block, fs, f0))
+            cycle_rms.append(fet.calc_cycle_rms(block, fs, f0))
+        return fet.calc_sequence_from_phasors(np.concatenate(phasors, axis=-1), np.concatenate(cycle_rms, axis=-1), f0)
+
+    @property
+    def fft_mean(self):
+        return self.fft_sum / self.count
+
+    @property
+    def harmonic_mean(self):
+        return self.harmonic_sum / self.count
+
+
+def analysis_mode(chunk: int = None):
+    """
+    결과(수치, 그림)가 달라지는 분석 방식 (결과 캐시, 증분 보고서의 입력 키에 포함)
+    chunk: run_analysis 와 동일
+    return: 캡처 전체 분석이면 None, 블록 분석이면 "chunk=<샘플 수>"
+    """
+    chunk = CHUNK_SAMPLES if chunk is None else chunk
+    return f"chunk={chunk}" if chunk else None
+
+
+def run_analysis(motor_name: str, aws_files: list, chunk: int = None, profile: str = None):
+    """
+    모터 하나의 AWS 파일 전체 분석
+    chunk: 블록 분석 기준 샘플 수 (None 이면 CHUNK_SAMPLES, 0 이면 사용 안 함)
+           지정하면 캡처를 메모리 맵으로 로딩하고 이보다 긴 캡처는 블록 단위로 분석합니다.
+    profile: profiling.collect 의 mode (None 이면 profiling.PROFILE_MODE)
+    return: dictionary. *_pic 항목은 png BytesIO (결과가 없으면 BASE_PICTURE 경로)
+            "profile" 항목은 단계별 측정값 (profiling.Recorder.merge 로 합침)
+    """
+    with profiling.collect(profile) as rec:
+        ret = _run_analysis(motor_name, aws_files, chunk)
+    ret["profile"] = rec.to_dict(raw=True)
+    return ret
+
+
+def _run_analysis(motor_name, aws_files, chunk):
     ret = {
         "name": motor_name,
         "driving_rst_pic": BASE_PICTURE,
@@ -19,86 +380,87 @@ def run_analysis(motor_name: str, aws_files: list):
         "on_start_pic": BASE_PICTURE,
         "on_stop_pic": BASE_PICTURE,
         "stop_pic": BASE_PICTURE,
+        "harmonic_table": None,
+        "captures": [],
     }
 
     # begin analysis --------------------------------
 
-    d1 = fet.load_AWSjson(aws_files[0])
-    d1u = d1["current_u"]
-    d1v = d1["current_v"]
-    d1w = d1["current_w"]
-    t = np.linspace(0, d1["sample_size"]/d1["sampling_rate"], d1["sample_size"])
-    rms = np.sqrt((d1u**2 + d1v**2 + d1w**2)/3)
-    p2p = rms.max() - rms.min()
-
-
-    plt.figure(figsize=(6,3))
-    plt.title(d1["acq_time"])
-    plt.plot(t[:2000], d1u[:2000], "r", label="R")
-    plt.plot(t[:2000], d1v[:2000], "b", label="S")
-    plt.plot(t[:2000], d1w[:2000], "k", label="T")
-    plt.plot(t[:2000], rms[:2000], "g", lw=4, label="RMS-A")
-    plt.xlabel("seconds (s)")
-    plt.ylabel("current (A)")
-    plt.legend()
-    plt.tight_layout()
-    plt.grid()
-    plt.savefig("./temp/rst_pic.png")
-    plt.close()
-    ret["driving_rst_pic"] = "./temp/rst_pic.png"
+    chunk = CHUNK_SAMPLES if chunk is None else chunk
+    if chunk:
+        captures = fet.load_AWSjson_prefetch(aws_files, PREFETCH_DEPTH, loader=fet.load_AWSjson_mmap,
+                                             release=fet.release_AWSjson_mmap)
+    else:
+        captures = fet.load_AWSjson_prefetch(aws_files, PREFETCH_DEPTH)
+    agg = DrivingAggregator()
+    for d in captures:
+        agg.add(d, chunk=chunk)
+        del d
+    if agg.count == 0:
+        return ret
+
+    ret["captures"] = agg.captures
+    ret["driving_rst_pic"] = plotter.plot_waveform(agg.rst_snapshot)
 
     # peak to peak
-    plt.figure(figsize=(2,1))
-    plt.plot(t[25000:25000+200], d1u[25000:25000+200], "r", label="R")
-    plt.plot(t[25000:25000+200], d1v[25000:25000+200], "b", label="S")
-    plt.plot(t[25000:25000+200], d1w[25000:25000+200], "k", label="T")
-    plt.plot(t[25000:25000+200], rms[25000:25000+200], "g", lw=4, label="RMS-A")
-    # plt.xlabel("point")
-    # plt.ylabel("current (A)")
-    # plt.legend()
-    plt.tight_layout()
-    plt.grid()
-    plt.savefig("./temp/p2p_max_pic.png")
-    plt.close()
-    ret["driving_p2p_max_pic"] = "./temp/p2p_max_pic.png"
-
-    # FFT
-    fftxu, fftyu = fet.calc_run_fft(d1u, fs=d1["sampling_rate"])
-    fftxv, fftyv = fet.calc_run_fft(d1v, fs=d1["sampling_rate"])
-    fftxw, fftyw = fet.calc_run_fft(d1w, fs=d1["sampling_rate"])
-    fftxr, fftyr = fet.calc_run_fft(rms, fs=d1["sampling_rate"])
-    plt.figure(figsize=(6,3))
-    plt.plot(fftxu, fftyu, "r", alpha=0.3, label="R")
-    plt.plot(fftxv, fftyv, "b", alpha=0.3, label="S")
-    plt.plot(fftxw, fftyw, "k", alpha=0.3, label="T")
-    plt.plot(fftxr, fftyr, "g", alpha=0.3, lw=4, label="RMS-A")
-    plt.xlabel("freq (Hz)")
-    plt.ylabel("current (A)")
-    # plt.semilogx()
-    # plt.semilogy()
-    plt.legend()
-    plt.xlim([fftxu[fftyu.argmax()]-1.3, fftxu[fftyu.argmax()]+1.3])
-    plt.tight_layout()
-    plt.grid()
-    plt.savefig("./temp/fft_pic.png")
-    plt.close()
-    ret["driving_fft_pic"] = "./temp/fft_pic.png"
-
-    # THD
-    fftyu_thd = np.sqrt((fftyu.sum() -fftyu.max())**2) / fftyu.max()
-    fftyv_thd = np.sqrt((fftyv.sum() -fftyv.max())**2) / fftyv.max()
-    fftyw_thd = np.sqrt((fftyw.sum() -fftyw.max())**2) / fftyw.max()
-
-
-    
-
-    ret["driving_text"] += f"총 분석 신호: {len(aws_files)} 개\n"
-    ret["driving_text"] += f"RMS-A 평균값: {rms.mean():.2f} A, 표준편차: {rms.std():.2f}\n"
-    ret["driving_text"] += f"RMS-A 최대 Peak-to-peak: {p2p:.2f} A\n"
-    ret["driving_text"] += f"주파수 분석\n"
-    ret["driving_text"] += f" - R상 main 주파수: {fftyu.max():.2f} A, {fftxu[fftyu.argmax()]:.2f} Hz. THD {fftyu_thd:.2f}%\n"
-    ret["driving_text"] += f" - S상 main 주파수: {fftyv.max():.2f} A, {fftxv[fftyv.argmax()]:.2f} Hz. THD {fftyv_thd:.2f}%\n"
-    ret["driving_text"] += f" - T상 main 주파수: {fftyw.max():.2f} A, {fftxw[fftyw.argmax()]:.2f} Hz. THD {fftyw_thd:.2f}%\n"
+    ret["driving_p2p_max_pic"] = plotter.plot_p2p(agg.p2p_snapshot)
+
+    # FFT (전체 캡처 평균 스펙트럼)
+    fftx = agg.fft_x
+    fft_mean = agg.fft_mean
+    fftyu, fftyv, fftyw, fftyr = fft_mean
+    f_peak = fftx[fftyu.argmax()]
+    ret["driving_fft_pic"] = plotter.plot_fft(fftx, fft_mean,
+                                              xlim=[f_peak-1.3, f_peak+1.3])
+
+    # THD (고조파 기반, 캡처별 분포)
+    thd_u, thd_v, thd_w = (np.array(agg.thd[k]) for k in agg.PHASES)
+    harmonic_mean = agg.harmonic_mean
+    ret["harmonic_table"] = {
+        "orders": list(range(2, TABLE_HARMONICS+1)),
+        "rows": [[label, float(np.mean(agg.thd[k])), harmonic_mean[i, 1:TABLE_HARMONICS].tolist()]
+                 for i, (label, k) in enumerate(zip(("R", "S", "T"), agg.PHASES))],
+    }
+
+    ret["driving_text"] += f"총 분석 신호: {agg.count} 개\n"
+    ret["driving_text"] += f"RMS-A 평균값: {agg.rms_stats.mean:.2f} A, 표준편차: {agg.rms_stats.std:.2f}\n"
+    ret["driving_text"] += f"RMS-A 최대 Peak-to-peak: {agg.p2p:.2f} A\n"
+    snap = agg.p2p_snapshot
+    ret["driving_text"] += (f"순간 최대 변동폭: {agg.p2p_window:.2f} A ({P2P_WINDOW} 샘플), "
+                            f"{_format_acq_time(snap['acq_time'], snap['offset'])}\n")
+    ret["driving_text"] += f"주파수 분석 (캡처별 기본파 평균, {SPECTRUM_WINDOW} 윈도우 보정, THD {N_HARMONICS}차 고조파 기준)\n"
+    for label, k, thd in zip(("R", "S", "T"), agg.PHASES, (thd_u, thd_v, thd_w)):
+        freq, amp = np.nanmean(agg.fundamental[k], axis=0)
+        ret["driving_text"] += (f" - {label}상 main 주파수: {amp:.2f} A, {freq:.2f} Hz. "
+                                f"THD {thd.mean():.2f}% ({thd.min():.2f}~{thd.max():.2f})\n")
+
+    # 상 불평형 (기본파 주기별 대칭분)
+    unbalance = np.array(agg.sequence["unbalance"])
+    if np.isfinite(unbalance).any():
+        ret["driving_text"] += (f"상 불평형 (운전 구간 주기별): 역상분 {np.nanmean(unbalance):.2f}% "
+                                f"(최대 {np.nanmax(agg.sequence['unbalance_p99']):.2f}%), "
+                                f"영상분 {np.nanmean(agg.sequence['zero_ratio']):.2f}%, "
+                                f"상별 RMS 불평형 {np.nanmean(agg.sequence['rms_imbalance']):.2f}%")
+        if agg.n_reverse:
+            ret["driving_text"] += f" | 상 순서 u-w-v 캡처 {agg.n_reverse}개"
+        ret["driving_text"] += "\n"
+
+    # 기동/정지
+    if agg.start_snapshot is not None:
+        ret["on_start_pic"] = plotter.plot_waveform(agg.start_snapshot)
+    if agg.stop_snapshot is not None:
+        ret["on_stop_pic"] = plotter.plot_waveform(agg.stop_snapshot)
+    if agg.stopped_snapshot is not None:
+        ret["stop_pic"] = plotter.plot_waveform(agg.stopped_snapshot)
+    ret["driving_text"] += f"기동 {agg.n_starts}회, 정지 {agg.n_stops}회 감지"
+    if agg.n_starts:
+        ret["driving_text"] += f" (기동 최대 RMS-A {agg.inrush_peak:.2f} A, 전체 평균 대비 {agg.inrush_peak/agg.rms_stats.mean:.1f}배)"
+    ret["driving_text"] += "\n"
+
+    if DEBUG_PICS:
+        for k, v in ret.items():
+            if k.endswith("_pic") and not isinstance(v, str):
+                _debug_dump(v, motor_name, k)
 
     # end of analysis -------------------------------
 
@@ -0,0 +1,484 @@
+"""
+성능 측정 스크립트
+가상 AWS 캡처를 만들어 디코딩, fft, run_analysis, make_ppt 시나리오의 소요 시간을 재고,
+결과를 RESULTS_PATH 에 한 줄씩 쌓아서 이전 실행과 비교합니다.
+ex) python benchmark.py                                  전체 시나리오 (1/10/100 파일 x 10 모터)
+    python benchmark.py --scenarios decode fft --samples 1000000 --repeat 3
+    python benchmark.py --scenarios ppt --files 1 10 --compare
+    python benchmark.py --scenarios prefetch --files 20 --latency 50
+    python benchmark.py --scenarios memory --samples 20000000 --chunk 1048576
+    python benchmark.py --scenarios startup
+    python benchmark.py --scenarios ct --samples 500000
+    python benchmark.py --scenarios batch --samples 20000 --files 100
+"""
+import argparse
+import base64
+import gzip
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from contextlib import contextmanager
+
+import numpy as np
+
+import analyze
+import cache
+import fe_tools as fet
+
+RESULTS_PATH = "./benchmarks/results.jsonl"
+SCENARIOS = ("decode", "fft", "prefetch", "analysis", "ppt", "memory", "startup", "ct", "batch")
+FILE_TIERS = (1, 10, 100)   # 모터당 파일 수
+N_MOTORS = 10
+SAMPLING_RATE = 10000
+
+
+def make_synthetic_AWSjson(fname, sample_size=1_000_000, sampling_rate=10000, freq=60.0, amp=10.0,
+                           harmonics=None, events=None, noise=0.0, inrush=6.0, inrush_tau=0.1,
+                           acq_time=None, mac_address="00:00:00:00:00:00", seed=None):
+    """
+    load_AWSjson 형식(base64 -> gzip -> float32)의 가상 AWS json 파일 생성
+    fname: 저장할 파일 경로
+    sample_size: 상별 샘플 수
+    sampling_rate: 샘플레이트
+    freq: 기본파 주파수 (Hz)
+    amp: 기본파 진폭 (A)
+    harmonics: {차수: 기본파 대비 비율}. ex) {5: 0.04, 7: 0.03}
+    events: 운전 구간 [(기동 초, 정지 초), ...]. None 이면 전체 구간 운전
+    noise: 백색 잡음 표준편차 (A)
+    inrush: 기동 순간 전류 배율 (inrush_tau 초 시정수로 감쇠)
+    seed: 난수 시드
+    return: 파일 경로
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(sample_size) / sampling_rate
+    envelope = np.ones(sample_size)
+    if events is not None:
+        envelope[:] = 0.0
+        for on, off in events:
+            run = (t >= on) & (t < off)
+            envelope[run] = 1 + (inrush - 1)*np.exp(-(t[run] - on)/inrush_tau)
+    data = {
+        "version": "synthetic",
+        "mac_address": mac_address,
+        "acq_time": int(time.time()) if acq_time is None else acq_time,
+        "sampling_rate": sampling_rate,
+        "sample_size": sample_size,
+    }
+    for key, phase in (("current_u", 0), ("current_v", -2*np.pi/3), ("current_w", 2*np.pi/3)):
+        x = np.sin(2*np.pi*freq*t + phase)
+        for order, ratio in (harmonics or {}).items():
+            x += ratio*np.sin(order*(2*np.pi*freq*t + phase))
+        x *= amp*envelope
+        if noise:
+            x += rng.normal(0, noise, sample_size)
+        x = x.astype(np.float32)
+        data[key] = base64.b64encode(gzip.compress(x.tobytes(), compresslevel=1)).decode("ascii")
+    with open(fname, "w") as f:
+        json.dump(data, f)
+    return fname
+
+
+def make_realistic_AWSjson(fname, sample_size, sampling_rate=10000, seed=0, **kwargs):
+    """
+    현장 캡처와 비슷한 가상 파일 (5/7/11/13차 고조파, 잡음, 캡처 중간의 기동/정지 1회)
+    seed 마다 진폭과 운전 구간이 조금씩 다릅니다.
+    """
+    rng = np.random.default_rng(seed)
+    duration = sample_size / sampling_rate
+    on = duration * rng.uniform(0.1, 0.3)
+    off = duration * rng.uniform(0.7, 0.9)
+    params = dict(freq=60.0 + rng.normal(0, 0.02), amp=rng.uniform(8, 12),
+                  harmonics={5: 0.04, 7: 0.03, 11: 0.01, 13: 0.008},
+                  events=[(on, off)], noise=0.05, seed=seed, acq_time=1_700_000_000 + seed*60)
+    params.update(kwargs)
+    return make_synthetic_AWSjson(fname, sample_size=sample_size, sampling_rate=sampling_rate, **params)
+
+
+def make_synthetic_CTjson(fname, sample_size=100_000, sampling_rate=10000, n_channels=6, seed=0):
+    """
+    CT tester json 형식의 가상 파일 (AI0~AI5 숫자 배열)
+    """
+    rng = np.random.default_rng(seed)
+    data = {"acq_time": time.strftime("%Y-%m-%d %H:%M:%S"), "sampling_rate": sampling_rate,
+            "sample_size": sample_size}
+    for i in range(n_channels):
+        data[f"AI{i}"] = rng.normal(0, 1, sample_size).tolist()
+    with open(fname, "w") as f:
+        json.dump(data, f)
+    return fname
+
+
+def load_CT_TesterJson_legacy(fname):
+    # 기존 load_CT_TesterJson: json.loads -> list -> np.array
+    with open(fname, 'r') as f:
+        data = json.loads(f.read())
+    for key in fet.CT_CHANNELS:
+        data[key] = np.array(data[key])
+    return data
+
+
+def _decode_legacy(payload):
+    # 기존 load_AWSjson 경로: array('f') -> list -> np.array(float64)
+    return np.array(list(array('f', gzip.decompress(base64.b64decode(payload)))))
+
+
+def load_AWSjson_legacy(fname):
+    with open(fname, 'r') as f:
+        data = json.load(f)
+    for key in ('current_u', 'current_v', 'current_w'):
+        data[key] = _decode_legacy(data[key])
+    return data
+
+
+def _timeit(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        s = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - s)
+    return best
+
+
+def bench_decode(sample_size, repeat):
+    """
+    기존 디코딩 경로와 np.frombuffer 기반 디코더 비교
+    return: {이름: 최소 소요시간(s)}
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = make_synthetic_AWSjson(os.path.join(tmp, "capture.json"), sample_size=sample_size)
+        ref = load_AWSjson_legacy(fname)
+        new = fet.load_AWSjson(fname, use_cache=False)
+        for key in ('current_u', 'current_v', 'current_w'):
+            assert np.array_equal(ref[key], new[key]), key
+        times = {
+            "legacy (array->list->float64)": _timeit(lambda: load_AWSjson_legacy(fname), repeat),
+            "frombuffer float32": _timeit(lambda: fet.load_AWSjson(fname, use_cache=False), repeat),
+            "frombuffer float64": _timeit(lambda: fet.load_AWSjson(fname, dtype=np.float64, use_cache=False), repeat),
+        }
+        # 캐시 항목은 임시 폴더에 기록 (사용자의 ./temp/aws_cache 에 남기지 않음)
+        with cache.use_settings({**cache.get_settings(), "cache_dir": os.path.join(tmp, "aws_cache"),
+                                 "enabled": True}):
+            times["capture cache hit"] = _timeit(lambda: fet.load_AWSjson(fname), repeat)
+        return times
+
+
+@contextmanager
+def _cold_cache():
+    # 캡처/결과 캐시를 끄고 측정 (매번 json 디코딩부터)
+    settings = cache.get_settings()
+    cache.configure(enabled=False)
+    try:
+        yield
+    finally:
+        cache.configure(enabled=settings["enabled"])
+
+
+def _peak_memory(func):
+    # tracemalloc 으로 추적한 최대 할당량 (numpy 버퍼 포함, 메모리 맵 페이지는 제외)
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(sample_size, chunk):
+    """
+    run_analysis 의 최대 메모리 비교: 전체 로딩 vs 메모리 맵 + 블록 분석
+    캡처 캐시를 끄고 json 디코딩부터 측정합니다.
+    return: {이름: 최대 할당량(bytes)}
+    """
+    with _cold_cache(), tempfile.TemporaryDirectory() as tmp:
+        fname = make_synthetic_AWSjson(os.path.join(tmp, "capture.json"), sample_size=sample_size)
+        return {
+            "full load": _peak_memory(lambda: analyze.run_analysis("bench", [fname], chunk=0)),
+            f"chunked ({chunk:,})": _peak_memory(lambda: analyze.run_analysis("bench", [fname], chunk=chunk)),
+        }
+
+
+def make_capture_set(folder, n_files, sample_size, sampling_rate=SAMPLING_RATE):
+    """
+    make_realistic_AWSjson 파일 n_files 개 생성
+    return: 파일 경로 리스트
+    """
+    os.makedirs(folder, exist_ok=True)
+    return [make_realistic_AWSjson(os.path.join(folder, f"capture_{i:03d}.json"), sample_size,
+                                   sampling_rate=sampling_rate, seed=i)
+            for i in range(n_files)]
+
+
+def make_site_conf(files, n_motors=N_MOTORS, site="bench"):
+    """
+    모든 모터가 같은 파일 목록을 쓰는 make_ppt 설정 (캐시를 끄고 측정하므로 중복 파일도 매번 분석)
+    """
+    return {
+        "engineer": "benchmark",
+        "site": site,
+        "date": time.strftime("%Y.%m.%d"),
+        "motor_set": [{"name": f"motor{i+1}", "data": list(files)} for i in range(n_motors)],
+    }
+
+
+def bench_ct(sample_size, repeat):
+    """
+    CT tester json 로딩: 기존 (json -> list) vs load_CT_TesterJson (채널 전체 / 일부 + float32)
+    return: {이름: 최소 소요시간(s)}, {이름: 최대 할당량(bytes)}
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = make_synthetic_CTjson(os.path.join(tmp, "ct.json"), sample_size)
+        cases = {
+            "legacy (json -> list -> float64)": lambda: load_CT_TesterJson_legacy(fname),
+            "load_CT_TesterJson": lambda: fet.load_CT_TesterJson(fname),
+            "load_CT_TesterJson AI0,AI1 float32": lambda: fet.load_CT_TesterJson(
+                fname, channels=("AI0", "AI1"), dtype=np.float32),
+        }
+        return ({k: _timeit(f, repeat) for k, f in cases.items()},
+                {k: _peak_memory(f) for k, f in cases.items()})
+
+
+def bench_batch(sample_size, n_files, repeat):
+    """
+    (파일 x 상 x 샘플) 필터 + 스무딩 + 윈도우 RMS: 행마다 호출 vs 한 번에 (axis)
+    return: {이름: 최소 소요시간(s)}
+    """
+    x = np.random.default_rng(0).normal(size=(n_files, 3, sample_size)).astype(np.float32)
+    window = SAMPLING_RATE // 60
+
+    def per_row():
+        for row in x.reshape(-1, sample_size):
+            y = fet.calc_apply_freq_filter(row, SAMPLING_RATE, 1000)
+            y = fet.calc_smoothing(y, 11)
+            fet.calc_window_rms(y, window, window // 2)
+
+    def batched():
+        y = fet.calc_apply_freq_filter(x, SAMPLING_RATE, 1000)
+        y = fet.calc_smoothing(y, 11)
+        fet.calc_window_rms(y, window, window // 2)
+
+    return {f"filter+smooth+rms {n_files}x3 rows, per row": _timeit(per_row, repeat),
+            f"filter+smooth+rms {n_files}x3 rows, batched": _timeit(batched, repeat)}
+
+
+def bench_fft(sample_size, repeat):
+    """
+    calc_run_fft (1상) 와 보고서에서 쓰는 4행 배치 스펙트럼
+    return: {이름: 최소 소요시간(s)}
+    """
+    x = np.random.default_rng(0).normal(size=sample_size).astype(np.float32)
+    x4 = np.vstack([x]*4)
+    return {
+        "calc_run_fft": _timeit(lambda: fet.calc_run_fft(x, SAMPLING_RATE), repeat),
+        "calc_batch_spectrum 4 rows": _timeit(lambda: fet.calc_batch_spectrum(x4, SAMPLING_RATE), repeat),
+    }
+
+
+def bench_prefetch(files, repeat, latency=0.02):
+    """
+    파일별 로딩 + 누적 분석: 순차 로딩 vs 선행 로딩 (load_AWSjson_prefetch)
+    latency: 파일마다 추가할 지연 (초, 네트워크 공유 폴더 흉내)
+    """
+    def slow_load(fname, **kwargs):
+        time.sleep(latency)
+        return fet.load_AWSjson(fname, **kwargs)
+
+    def run(depth):
+        agg = analyze.DrivingAggregator()
+        for d in fet.load_AWSjson_prefetch(files, depth, loader=slow_load):
+            agg.add(d)
+
+    with _cold_cache():
+        return {f"load+add {len(files)} files, {latency*1000:.0f} ms latency, depth {depth}": _timeit(lambda: run(depth), repeat)
+                for depth in (0, fet.PREFETCH_DEPTH, 2*fet.PREFETCH_DEPTH)}
+
+
+def bench_analysis(files, tiers, repeat):
+    """
+    모터 하나의 run_analysis (캐시 없음)
+    tiers: 파일 수 목록
+    """
+    with _cold_cache():
+        return {f"run_analysis {n} files": _timeit(lambda: analyze.run_analysis("bench", files[:n]), repeat)
+                for n in tiers}
+
+
+def bench_ppt(files, tiers, n_motors, repeat, workers=None):
+    """
+    make_ppt 전체 (캐시 없음, 분석 + 그림 + pptx 저장)
+    tiers: 모터당 파일 수 목록
+    return: {이름: 최소 소요시간(s)}, {이름: 단계별 시간 (profiling 보고서)}
+    """
+    import ppt_maker
+    import profiling
+
+    times, stages = {}, {}
+    with _cold_cache(), tempfile.TemporaryDirectory() as out_dir:
+        for n in tiers:
+            conf = make_site_conf(files[:n], n_motors, site=f"bench{n}")
+            name = f"make_ppt {n} files x {n_motors} motors"
+            times[name] = _timeit(lambda: ppt_maker.make_ppt(conf, save_dir=out_dir, workers=workers), repeat)
+            save_path = os.path.join(out_dir, f"{conf['site']}_구축신호_분석_보고서_{conf['date']}.pptx")
+            with open(profiling.report_path(save_path), "r", encoding="utf-8") as f:
+                stages[name] = {k: round(v[1], 4) for k, v in json.load(f)["stages"].items()}
+    return times, stages
+
+
+def _import_time(modules):
+    # 새 인터프리터에서 modules 를 import 하는 데 걸린 시간 (인터프리터 기동 시간 제외)
+    code = ("import time; t = time.perf_counter(); import " + ", ".join(modules)
+            + "; print(time.perf_counter() - t)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    return float(out.stdout.split()[-1])
+
+
+def bench_startup(repeat):
+    """
+    프로그램 시작 시간 (매번 새 프로세스)
+    main.py 는 창이 처음 그려질 때까지 (FA_STARTUP_EXIT=1, PySide6 가 있을 때만)
+    return: {이름: 최소 소요시간(s)}
+    """
+    ret = {
+        "import utils (main.py startup)": min(_import_time(["utils"]) for _ in range(repeat)),
+        "import ppt_maker (analysis modules)": min(_import_time(["ppt_maker"]) for _ in range(repeat)),
+    }
+    try:
+        import PySide6  # noqa: F401
+    except ImportError:
+        return ret
+    env = dict(os.environ, FA_STARTUP_EXIT="1", QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "main.py"], capture_output=True, text=True, env=env, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        times.append(float(out.stdout.split("startup")[-1].split("s")[0]))
+    ret["main.py window shown"] = min(times)
+    return ret
+
+
+def _environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save_results(record, path=RESULTS_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_results(path=RESULTS_PATH):
+    """
+    return: 저장된 실행 기록 리스트 (오래된 순)
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_results(prev, cur):
+    """
+    두 실행 기록의 공통 항목 비교표
+    return: 출력용 문자열
+    """
+    lines = [f"compare with {prev['env']['time']} ({prev['env'].get('commit')}, {prev.get('label') or '-'})",
+             f"  {'scenario':40s} {'before':>10s} {'after':>10s} {'ratio':>7s}"]
+    for scenario, results in cur["results"].items():
+        for name, sec in results.items():
+            before = prev["results"].get(scenario, {}).get(name)
+            if before is None:
+                continue
+            lines.append(f"  {name:40s} {before*1000:8.1f}ms {sec*1000:8.1f}ms {sec/before:6.2f}x")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="필드 분석 벤치마크")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=["decode", "fft", "analysis", "ppt"])
+    parser.add_argument("--samples", type=int, default=200_000, help="파일당 상별 샘플 수")
+    parser.add_argument("--files", type=int, nargs="+", default=list(FILE_TIERS), help="모터당 파일 수 목록")
+    parser.add_argument("--motors", type=int, default=N_MOTORS, help="make_ppt 모터 수")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="make_ppt 분석 프로세스 수")
+    parser.add_argument("--latency", type=float, default=20, help="prefetch 시나리오의 파일당 지연 (ms)")
+    parser.add_argument("--chunk", type=int, default=1 << 20, help="memory 시나리오의 블록 크기 (샘플 수)")
+    parser.add_argument("--results", default=RESULTS_PATH, help="결과를 쌓을 jsonl 파일")
+    parser.add_argument("--no-save", action="store_true", help="결과를 저장하지 않음")
+    parser.add_argument("--label", default="", help="이번 실행의 메모 (비교 시 표시)")
+    parser.add_argument("--compare", action="store_true", help="같은 조건의 이전 실행과 비교")
+    args = parser.parse_args()
+
+    params = {"samples": args.samples, "sampling_rate": SAMPLING_RATE, "files": args.files, "latency": args.latency,
+              "motors": args.motors, "repeat": args.repeat, "workers": args.workers}
+    record = {"env": _environment(), "label": args.label, "params": params, "results": {}}
+    results = record["results"]
+
+    if "decode" in args.scenarios:
+        results["decode"] = bench_decode(args.samples, args.repeat)
+    if "fft" in args.scenarios:
+        results["fft"] = bench_fft(args.samples, args.repeat)
+    if {"prefetch", "analysis", "ppt"} & set(args.scenarios):
+        with tempfile.TemporaryDirectory() as tmp:
+            files = make_capture_set(tmp, max(args.files), args.samples)
+            if "prefetch" in args.scenarios:
+                results["prefetch"] = bench_prefetch(files, args.repeat, latency=args.latency/1000)
+            if "analysis" in args.scenarios:
+                results["analysis"] = bench_analysis(files, args.files, args.repeat)
+            if "ppt" in args.scenarios:
+                results["ppt"], record["ppt_stages"] = bench_ppt(files, args.files, args.motors,
+                                                                 args.repeat, workers=args.workers)
+    if "batch" in args.scenarios:
+        results["batch"] = bench_batch(args.samples, max(args.files), args.repeat)
+    if "ct" in args.scenarios:
+        results["ct"], record["ct_memory"] = bench_ct(args.samples, args.repeat)
+    if "startup" in args.scenarios:
+        results["startup"] = bench_startup(args.repeat)
+    if "memory" in args.scenarios:
+        record["memory"] = bench_memory(args.samples, args.chunk)
+
+    print(f"{args.samples:,} samples x 3 phases per file (best of {args.repeat})")
+    for scenario, rows in results.items():
+        print(f"[{scenario}]")
+        for name, sec in rows.items():
+            print(f"  {name:48s} {sec*1000:10.1f} ms")
+    if "decode" in results:
+        base = results["decode"]["legacy (array->list->float64)"]
+        print("  decode speedup: " + ", ".join(f"{k} x{base/v:.1f}" for k, v in results["decode"].items()))
+    if "ct_memory" in record:
+        print("[ct] peak memory")
+        for name, peak in record["ct_memory"].items():
+            print(f"  {name:48s} {peak/2**20:10.1f} MB")
+    if "memory" in record:
+        capture_mb = args.samples * 3 * 4 / 2**20
+        print(f"[memory] run_analysis peak, capture {capture_mb:.1f} MB (float32 x 3 phases)")
+        for name, peak in record["memory"].items():
+            print(f"  {name:40s} {peak/2**20:10.1f} MB  x{peak/2**20/capture_mb:5.2f} capture")
+
+    if args.compare:
+        prev = [r for r in load_results(args.results) if r.get("params") == params]
+        print(compare_results(prev[-1], record) if prev else "no previous run with the same parameters")
+    if not args.no_save:
+        save_results(record, args.results)
+        print(f"saved to {os.path.abspath(args.results)}")
+
+
+if __name__ == "__main__":
+    main()
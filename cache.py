@@ -0,0 +1,501 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# utils.initialize 가 ./temp 를 비울 때 이 폴더는 남겨둡니다.
+CACHE_DIR = os.environ.get("FA_CACHE_DIR", "./temp/aws_cache")
+CACHE_MAX_MB = float(os.environ.get("FA_CACHE_MAX_MB", 2048))
+CACHE_ENABLED = os.environ.get("FA_CACHE", "1") != "0"
+RESULT_CACHE_DIR = os.environ.get("FA_RESULT_CACHE_DIR", "./temp/result_cache")
+RESULT_CACHE_MAX_MB = float(os.environ.get("FA_RESULT_CACHE_MAX_MB", 512))
+
+PHASES = ("current_u", "current_v", "current_w")
+HASH_BLOCK = 1 << 20
+
+
+def calc_file_hash(fname):
+    """
+    파일 내용의 sha1 해시
+    fname: 파일 경로
+    return: 16진수 문자열
+    """
+    h = hashlib.sha1()
+    with open(fname, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def make_input_key(aws_files, algorithm_ver, fingerprint=None, mode=None):
+    """
+    분석 입력 키: 파일 내용 해시(순서 포함) + 알고리즘 버전 + 분석 방식
+    fingerprint: 파일 해시 함수 (기본 calc_file_hash)
+    mode: 결과가 달라지는 분석 방식 (analyze.analysis_mode, None 이면 캡처 전체 분석)
+    return: "v<알고리즘 버전>-<16진수>" (버전으로 시작해서 파일 이름만으로 정리 가능),
+            파일을 읽을 수 없으면 None
+    """
+    fingerprint = fingerprint or calc_file_hash
+    try:
+        prints = [fingerprint(f) for f in aws_files]
+    except OSError:
+        return None
+    src = json.dumps([str(algorithm_ver), prints] + ([mode] if mode is not None else []))
+    return f"{_version_prefix(algorithm_ver)}{hashlib.sha1(src.encode('utf-8')).hexdigest()}"
+
+
+def _version_prefix(algorithm_ver):
+    return f"v{algorithm_ver}-"
+
+
+def _tmp_path(path):
+    # 프로세스/스레드별 임시 파일 (선행 로딩 스레드가 같은 항목을 동시에 쓸 수 있음)
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _atomic_write(path, write):
+    # 여러 프로세스가 같은 캐시를 쓰므로 임시 파일에 쓰고 교체
+    tmp = _tmp_path(path)
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_bytes(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class DiskLRU:
+    """
+    폴더 기반 LRU 저장소
+    항목별 파일의 mtime 을 최근 사용 시각으로 사용하며,
+    전체 크기가 max_bytes 를 넘으면 오래된 항목부터 삭제합니다.
+    별도의 인덱스 파일이 없어 여러 프로세스가 동시에 사용해도 안전합니다.
+    """
+    def __init__(self, cache_dir, max_mb):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_files(self, key):
+        # 하위 클래스에서 항목을 이루는 파일 목록을 반환
+        raise NotImplementedError
+
+    def _entry_key(self, fname):
+        # 하위 클래스에서 파일명 -> 항목 키 (대표 파일이 아니면 None)
+        raise NotImplementedError
+
+    def touch(self, key):
+        now = time.time()
+        for path in self._entry_files(key):
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+
+    def remove(self, key):
+        for path in self._entry_files(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def entries(self):
+        """
+        return: [(key, 크기, 최근 사용 시각), ...]
+        """
+        ret = []
+        for e in os.scandir(self.cache_dir):
+            key = self._entry_key(e.name)
+            if key is None or not e.is_file():
+                continue
+            try:
+                mtime = e.stat().st_mtime
+            except OSError:  # 목록을 읽은 뒤 다른 프로세스가 삭제
+                continue
+            size = 0
+            for path in self._entry_files(key):
+                try:
+                    size += os.path.getsize(path)
+                except OSError:
+                    pass
+            ret.append((key, size, mtime))
+        return ret
+
+    def evict(self):
+        """
+        전체 크기가 max_bytes 이하가 될 때까지 오래된 항목 삭제
+        return: 삭제된 항목 수
+        """
+        entries = sorted(self.entries(), key=lambda x: x[2])
+        total = sum(e[1] for e in entries)
+        removed = 0
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for key, _, _ in self.entries():
+            self.remove(key)
+
+
+class CaptureCache(DiskLRU):
+    """
+    디코딩된 AWS 캡처(current_u/v/w) 캐시
+    키: 파일 경로/mtime/크기로 찾은 내용 해시. 경로나 시각이 바뀌어도
+    내용이 같으면 같은 항목을 사용합니다.
+    저장: <hash>.npy (3 x N float32), <hash>.json (나머지 메타데이터)
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_mb=CACHE_MAX_MB):
+        super().__init__(cache_dir, max_mb)
+        self.path_dir = os.path.join(cache_dir, "paths")
+        os.makedirs(self.path_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_files(self, key):
+        return [os.path.join(self.cache_dir, f"{key}.npy"),
+                os.path.join(self.cache_dir, f"{key}.json")]
+
+    def _entry_key(self, fname):
+        return fname[:-4] if fname.endswith(".npy") else None
+
+    def _path_record(self, fname):
+        name = hashlib.sha1(os.path.abspath(fname).encode("utf-8")).hexdigest()
+        return os.path.join(self.path_dir, f"{name}.json")
+
+    def _recorded_hash(self, fname):
+        # 경로 기록의 해시 (경로/mtime/크기가 같을 때만). return: (stamp, 해시 또는 None)
+        st = os.stat(fname)
+        stamp = {"path": os.path.abspath(fname), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        try:
+            with open(self._path_record(fname), "r", encoding="utf-8") as f:
+                record = json.load(f)
+            if all(record.get(k) == v for k, v in stamp.items()):
+                return stamp, record["hash"]
+        except (OSError, ValueError):
+            pass
+        return stamp, None
+
+    def fingerprint(self, fname, raw=None, file_hash=None):
+        """
+        파일의 내용 해시. 경로/mtime/크기가 같으면 저장된 해시를 재사용합니다.
+        fname: 파일 경로
+        raw: 이미 읽어둔 파일 내용 (있으면 다시 읽지 않음)
+        file_hash: 읽으면서 계산해둔 내용 해시 (있으면 그대로 기록)
+        return: 16진수 문자열
+        """
+        stamp, record_hash = self._recorded_hash(fname)
+        if record_hash is not None:
+            return record_hash
+        record_path = self._path_record(fname)
+        if file_hash is not None:
+            stamp["hash"] = file_hash
+        else:
+            stamp["hash"] = hashlib.sha1(raw).hexdigest() if raw is not None else calc_file_hash(fname)
+
+        def write(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(stamp, f)
+        _atomic_write(record_path, write)
+        return stamp["hash"]
+
+    def load(self, fname, mmap_mode=None, raw=None):
+        """
+        캐시에서 캡처 로딩
+        raw: 이미 읽어둔 파일 내용. 없으면 경로 기록(경로/mtime/크기)이 있을 때만 조회하고
+             파일을 읽어 해시하지 않습니다 (처음 보는 파일은 호출 측에서 한 번 읽은 뒤 raw 로 다시 조회)
+        return: load_AWSjson 형식 dictionary, 없으면 None
+        """
+        if raw is None:
+            key = self._recorded_hash(fname)[1]
+            if key is None:
+                return None
+        else:
+            key = self.fingerprint(fname, raw=raw)
+        import numpy as np  # utils.temp_keep 이 시작 시 cache 를 불러오므로 numpy 는 사용 시점에 로딩
+        npy_path, meta_path = self._entry_files(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            arr = np.load(npy_path, mmap_mode=mmap_mode)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        for i, k in enumerate(PHASES):
+            data[k] = arr[i]
+        self.touch(key)
+        self.hits += 1
+        return data
+
+    def store(self, fname, data, raw=None):
+        """
+        디코딩된 캡처를 캐시에 저장 후 용량 초과분 정리
+        fname: 원본 파일 경로
+        data: load_AWSjson 형식 dictionary
+        raw: 원본 파일 내용 (해시 재계산 방지용)
+        """
+        import numpy as np
+        key = self.fingerprint(fname, raw=raw)
+        npy_path, meta_path = self._entry_files(key)
+        arr = np.vstack([np.asarray(data[k], dtype=np.float32) for k in PHASES])
+        meta = {k: v for k, v in data.items() if k not in PHASES}
+
+        def write_npy(tmp):
+            with open(tmp, "wb") as f:
+                np.save(f, arr)
+
+        def write_meta(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+        try:
+            _atomic_write(meta_path, write_meta)
+            _atomic_write(npy_path, write_npy)
+            self.evict()
+        except OSError as e:
+            print(f"capture cache write failed: {e}", file=sys.stderr)
+
+    def entry_tmp_path(self, fname):
+        """
+        캐시 항목을 직접 기록할 임시 .npy 경로 (adopt 로 등록)
+        키(내용 해시)는 아직 모르므로 경로 기준 이름입니다. 파일을 읽지 않습니다.
+        """
+        name = hashlib.sha1(os.path.abspath(fname).encode("utf-8")).hexdigest()
+        return _tmp_path(os.path.join(self.cache_dir, f"{name}.npy"))
+
+    def adopt(self, fname, npy_tmp, meta, file_hash=None):
+        """
+        이미 기록된 3 x N float32 .npy 파일을 캐시 항목으로 등록 (메모리에 올리지 않음)
+        새 항목이 바로 삭제되지 않도록 용량 정리를 등록 전에 합니다.
+        fname: 원본 파일 경로
+        npy_tmp: entry_tmp_path 로 받은 경로
+        meta: 전류 어레이를 제외한 메타데이터
+        file_hash: 디코딩하면서 계산한 파일 내용 해시 (없으면 fingerprint 로 계산)
+        return: 등록된 .npy 경로, 실패 시 None (npy_tmp 는 그대로 남음)
+        """
+        npy_path, meta_path = self._entry_files(self.fingerprint(fname, file_hash=file_hash))
+
+        def write_meta(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+        try:
+            self.evict()
+            _atomic_write(meta_path, write_meta)
+            os.replace(npy_tmp, npy_path)
+        except OSError as e:
+            print(f"capture cache write failed: {e}", file=sys.stderr)
+            return None
+        return npy_path
+
+
+class ResultCache(DiskLRU):
+    """
+    run_analysis 결과 캐시
+    키: 알고리즘 버전 + 모터 파일 목록의 내용 해시(순서 포함) (make_input_key)
+    저장: <key>.json (결과 dictionary), <key>_<항목>.png (그림, 로딩 시 BytesIO)
+    모터 이름은 키에 포함하지 않으므로 이름만 바꾼 경우에도 재사용됩니다.
+    """
+    def __init__(self, cache_dir=RESULT_CACHE_DIR, max_mb=RESULT_CACHE_MAX_MB, fingerprint=None):
+        super().__init__(cache_dir, max_mb)
+        self.fingerprint = fingerprint or calc_file_hash
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_files(self, key):
+        return ([os.path.join(self.cache_dir, f"{key}.json")]
+                + glob.glob(os.path.join(self.cache_dir, f"{key}_*.png")))
+
+    def _entry_key(self, fname):
+        return fname[:-5] if fname.endswith(".json") else None
+
+    def make_key(self, aws_files, algorithm_ver, mode=None):
+        """
+        mode: 분석 방식 (make_input_key 참고)
+        return: 결과 캐시 키, 파일을 읽을 수 없으면 None
+        """
+        return make_input_key(aws_files, algorithm_ver, self.fingerprint, mode)
+
+    def load(self, key, motor_name):
+        """
+        return: run_analysis 결과 dictionary, 없으면 None
+        """
+        if key is None:
+            self.misses += 1
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.json"), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        ret = entry["result"]
+        try:
+            for k in entry["pics"]:
+                with open(os.path.join(self.cache_dir, ret[k]), "rb") as f:
+                    ret[k] = io.BytesIO(f.read())
+        except OSError:
+            self.remove(key)
+            self.misses += 1
+            return None
+        ret["name"] = motor_name
+        self.touch(key)
+        self.hits += 1
+        return ret
+
+    def store(self, key, ret, algorithm_ver, base_picture=None):
+        """
+        결과와 그림(BytesIO 또는 파일 경로)을 캐시에 저장
+        base_picture: 기본 그림 경로 (복사하지 않고 경로 그대로 저장)
+        """
+        if key is None:
+            return
+        result = dict(ret)
+        pics = []
+        try:
+            for k, v in ret.items():
+                if not k.endswith("_pic") or v == base_picture:
+                    continue
+                fname = f"{key}_{k}.png"
+                if isinstance(v, str):
+                    write = lambda tmp, src=v: shutil.copyfile(src, tmp)
+                else:
+                    write = lambda tmp, pic=v: _write_bytes(tmp, pic.getvalue())
+                _atomic_write(os.path.join(self.cache_dir, fname), write)
+                result[k] = fname
+                pics.append(k)
+            entry = {"algorithm_ver": str(algorithm_ver), "pics": pics, "result": result}
+
+            def write(tmp):
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+            _atomic_write(os.path.join(self.cache_dir, f"{key}.json"), write)
+            self.evict()
+        except OSError as e:
+            print(f"result cache write failed: {e}", file=sys.stderr)
+
+    def prune(self, algorithm_ver):
+        """
+        다른 알고리즘 버전으로 만들어진 항목 삭제 (파일 이름의 버전으로 판단, 내용은 읽지 않음)
+        return: 삭제된 항목 수
+        """
+        prefix = _version_prefix(algorithm_ver)
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) or not name.endswith((".json", ".png")):
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:  # 다른 사이트가 이미 삭제
+                continue
+            removed += name.endswith(".json")
+        return removed
+
+
+_capture_caches = {}              # (폴더, 용량) -> CaptureCache
+_capture_caches_lock = threading.Lock()
+_local = threading.local()        # use_settings 로 지정한 스레드별 설정
+
+
+def configure(cache_dir=None, max_mb=None, enabled=None, result_dir=None, result_max_mb=None):
+    """
+    캐시 설정 (config.json 의 cache_dir, cache_max_mb, cache_enabled,
+    result_cache_dir, result_cache_max_mb)
+    프로세스 전체에 적용됩니다. 사이트별로 동시에 처리할 때는 use_settings 를 쓰세요.
+    """
+    global CACHE_DIR, CACHE_MAX_MB, CACHE_ENABLED, RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB
+    if cache_dir:
+        CACHE_DIR = cache_dir
+    if max_mb is not None:
+        CACHE_MAX_MB = float(max_mb)
+    if enabled is not None:
+        CACHE_ENABLED = bool(enabled)
+    if result_dir:
+        RESULT_CACHE_DIR = result_dir
+    if result_max_mb is not None:
+        RESULT_CACHE_MAX_MB = float(result_max_mb)
+    with _capture_caches_lock:
+        _capture_caches.clear()
+
+
+def configure_from_conf(conf):
+    configure(**settings_from_conf(conf))
+
+
+def settings_from_conf(conf):
+    """
+    현재 설정에 conf 의 캐시 설정을 덮어쓴 설정 (전역 설정은 바꾸지 않음)
+    return: get_settings 형식 dictionary
+    """
+    settings = get_settings()
+    if conf.get("cache_dir"):
+        settings["cache_dir"] = conf["cache_dir"]
+    if conf.get("cache_max_mb") is not None:
+        settings["max_mb"] = float(conf["cache_max_mb"])
+    if conf.get("cache_enabled") is not None:
+        settings["enabled"] = bool(conf["cache_enabled"])
+    if conf.get("result_cache_dir"):
+        settings["result_dir"] = conf["result_cache_dir"]
+    if conf.get("result_cache_max_mb") is not None:
+        settings["result_max_mb"] = float(conf["result_cache_max_mb"])
+    return settings
+
+
+@contextmanager
+def use_settings(settings):
+    """
+    with 블록 안에서 이 스레드의 캐시 설정만 바꿈 (사이트 스레드, 공유 프로세스 풀의 작업별 설정)
+    settings: get_settings / settings_from_conf 형식 dictionary
+    """
+    previous = getattr(_local, "settings", None)
+    _local.settings = dict(settings)
+    try:
+        yield
+    finally:
+        _local.settings = previous
+
+
+def get_settings():
+    """
+    return: 현재 스레드의 캐시 설정 (use_settings 가 없으면 전역 설정)
+    """
+    settings = getattr(_local, "settings", None)
+    if settings is not None:
+        return dict(settings)
+    return {"cache_dir": CACHE_DIR, "max_mb": CACHE_MAX_MB, "enabled": CACHE_ENABLED,
+            "result_dir": RESULT_CACHE_DIR, "result_max_mb": RESULT_CACHE_MAX_MB}
+
+
+def get_capture_cache():
+    """
+    return: 현재 설정의 CaptureCache, 비활성화 시 None
+    """
+    settings = get_settings()
+    if not settings["enabled"]:
+        return None
+    key = (os.path.abspath(settings["cache_dir"]), float(settings["max_mb"]))
+    with _capture_caches_lock:
+        capture_cache = _capture_caches.get(key)
+        if capture_cache is None:
+            capture_cache = _capture_caches[key] = CaptureCache(settings["cache_dir"], settings["max_mb"])
+    return capture_cache
+
+
+def get_result_cache():
+    """
+    return: 현재 설정의 ResultCache, 비활성화 시 None
+    """
+    settings = get_settings()
+    if not settings["enabled"]:
+        return None
+    capture_cache = get_capture_cache()
+    return ResultCache(settings["result_dir"], settings["result_max_mb"], fingerprint=capture_cache.fingerprint)
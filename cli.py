@@ -0,0 +1,343 @@
+"""
+화면 없이 보고서를 생성하는 명령행 도구
+PySide6 없이 동작하며, 무거운 분석 모듈은 명령 실행 시점에 로딩합니다.
+ex)
+    python cli.py report site1.json site2.json --out ./reports --jobs 4
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_export_lock = threading.Lock()  # HDF5 저장소는 한 번에 하나의 사이트만 기록
+FEATURE_HELP = "rms_mean, rms_std, p2p, imbalance, thd_max, freq, amp_mean, freq_drift"
+
+
+def _emit(record, stream=sys.stdout):
+    # 한 줄에 하나의 json (기계 판독용)
+    stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+    stream.flush()
+
+
+def _profile_summary(save_path):
+    # make_ppt 가 저장한 타이밍 보고서의 단계별 시간
+    import profiling
+    path = profiling.report_path(save_path)
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return {"report": os.path.abspath(path), "total": round(report["total"], 3),
+            "stages": {k: round(v[1], 3) for k, v in report["stages"].items()}}
+
+
+def run_site(conf_path, out_dir=None, workers=None, executor=None, export=None, incremental=None):
+    """
+    설정 파일 하나로 분석 + pptx 생성
+    export: 지정 시 캡처/지표를 이 HDF5 저장소에도 추가
+    incremental: 이전 보고서 재사용 (None 이면 설정의 incremental)
+    return: 결과 dictionary (status, output, seconds, ...)
+    """
+    from utils import load_conf
+    from ppt_maker import make_ppt
+
+    record = {"config": conf_path, "status": "ok"}
+    start = time.perf_counter()
+    try:
+        conf = load_conf(conf_path)
+        record["site"] = conf.get("site")
+        record["motors"] = sum(1 for m in conf["motor_set"] if m["name"] and m["data"])
+        save_dir = out_dir or conf.get("result_dir") or os.path.dirname(conf_path)
+        os.makedirs(save_dir, exist_ok=True)
+        record["output"] = make_ppt(conf, save_dir=save_dir, workers=workers, executor=executor,
+                                    incremental=incremental)
+        record["profile"] = _profile_summary(record["output"])
+        if export:
+            import cache
+            from exporter import export_dataset
+            # 캐시 설정은 이 사이트 스레드에만 적용 (전역 설정을 바꾸면 다른 사이트와 경합)
+            with _export_lock, cache.use_settings(cache.settings_from_conf(conf)):
+                record["exported"] = export_dataset(conf, export)
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def cmd_report(args):
+    # 분석 모듈 로딩 전에 설정해야 워커 프로세스에도 적용됨
+    if args.chunk is not None:
+        os.environ["FA_CHUNK_SAMPLES"] = str(args.chunk)
+    if args.profile is not None:
+        os.environ["FA_PROFILE"] = args.profile
+    from concurrent.futures import ThreadPoolExecutor
+    import ppt_maker
+    from utils import delete_all_files_in_folder, load_conf, temp_keep
+
+    confs = [os.path.abspath(p) for p in args.configs]
+    out_dir = os.path.abspath(args.out) if args.out else None
+    json_path = os.path.abspath(args.json) if args.json else None
+    export = os.path.abspath(args.export) if args.export else None
+    incremental = True if args.incremental else None
+    os.chdir(APP_DIR)  # ./temp, ./data 상대경로 기준
+    os.makedirs("./temp", exist_ok=True)
+    site_confs = []
+    for conf_path in confs:
+        try:
+            site_confs.append(load_conf(conf_path))
+        except (OSError, ValueError):
+            pass  # run_site 에서 오류로 기록
+    delete_all_files_in_folder("./temp", keep=temp_keep("./temp", site_confs))
+
+    start = time.perf_counter()
+    records = []
+    if args.workers is not None and args.workers <= 1:
+        # 프로세스 풀 없이 현재 프로세스에서 분석하므로 사이트도 순차 실행
+        for conf_path in confs:
+            records.append(run_site(conf_path, out_dir, workers=1, export=export, incremental=incremental))
+            _emit(records[-1])
+    else:
+        # 사이트는 스레드로 동시에 진행하고, 분석은 하나의 프로세스 풀을 공유
+        with ppt_maker.make_executor(args.workers) as executor, \
+                ThreadPoolExecutor(max_workers=args.jobs) as sites:
+            futures = [sites.submit(run_site, p, out_dir, executor=executor, export=export, incremental=incremental)
+                       for p in confs]
+            for fut in futures:
+                records.append(fut.result())
+                _emit(records[-1])
+
+    summary = {
+        "summary": True,
+        "sites": len(records),
+        "failed": sum(r["status"] != "ok" for r in records),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    _emit(summary)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"results": records, **summary}, f, indent=4, ensure_ascii=False)
+    return 1 if summary["failed"] else 0
+
+
+def cmd_export(args):
+    from utils import load_conf
+    from exporter import export_dataset
+
+    confs = [os.path.abspath(p) for p in args.configs]
+    store = os.path.abspath(args.store)
+    os.chdir(APP_DIR)  # 캡처 캐시(./temp/aws_cache) 상대경로 기준
+    status = 0
+    for conf_path in confs:
+        start = time.perf_counter()
+        record = {"config": conf_path, "store": store, "status": "ok"}
+        try:
+            record["exported"] = export_dataset(load_conf(conf_path), store)
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+            status = 1
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        _emit(record)
+    return status
+
+
+def cmd_watch(args):
+    import watch
+    from utils import load_conf
+
+    conf = load_conf(os.path.abspath(args.config)) if args.config else None
+    folder = os.path.abspath(args.folder)
+    summary_path = os.path.abspath(args.summary) if args.summary else None
+    out_dir = os.path.abspath(args.out) if args.out else None
+    if args.report and conf is None:
+        print("--report 에는 --config 가 필요합니다.", file=sys.stderr)
+        return 2
+    os.chdir(APP_DIR)  # ./temp 상대경로 기준
+
+    settle = watch.SETTLE_TIME if args.settle is None else args.settle
+    interval = watch.POLL_INTERVAL if args.interval is None else args.interval
+    if args.state:
+        state_path = os.path.abspath(args.state)
+    else:  # 출력 옆에 저장 (없으면 감시 폴더, 점 파일이라 캡처 목록에는 안 잡힘)
+        state_dir = out_dir or (os.path.dirname(summary_path) if summary_path else folder)
+        state_path = os.path.join(state_dir, watch.STATE_FILE)
+    watcher = watch.Watcher(folder, conf, settle=settle, new_only=args.new_only, state_path=state_path)
+
+    def publish(added):
+        record = {"added": {k: len(v) for k, v in added.items()}, **watcher.summary()}
+        if summary_path:
+            os.makedirs(os.path.dirname(summary_path), exist_ok=True)
+            tmp = f"{summary_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=4, ensure_ascii=False)
+            os.replace(tmp, summary_path)
+        if args.report:
+            from ppt_maker import make_ppt
+            save_dir = out_dir or watcher.conf.get("result_dir") or folder
+            try:
+                record["output"] = make_ppt(watcher.conf, save_dir=save_dir, incremental=True)
+            except Exception as e:
+                record["report_error"] = f"{type(e).__name__}: {e}"
+        _emit(record)
+
+    assigned = watcher.load_assigned()
+    if assigned:
+        added = {m["name"]: [p for p in m["data"] if watch.FolderIndex.key(p) not in watcher.files]
+                 for m in watcher.conf["motor_set"] if m.get("name")}
+        publish({k: v for k, v in added.items() if v})
+    try:
+        watch.run(watcher, interval=interval, on_update=publish, max_polls=1 if args.once else None)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_index_build(args):
+    from feature_index import FeatureIndex
+    from utils import load_conf
+
+    out = os.path.abspath(args.out)
+    stores = [os.path.abspath(p) for p in args.store or []]
+    confs = [os.path.abspath(p) for p in args.configs or []]
+    os.chdir(APP_DIR)  # 캐시(./temp) 상대경로 기준
+    index = FeatureIndex.load(out, mmap=False) if args.append and os.path.exists(out) else FeatureIndex()
+    start = time.perf_counter()
+    for path in stores:
+        from exporter import open_store
+        with open_store(path) as store:
+            _emit({"store": path, "added": index.add_store(store)})
+    if confs:
+        import cache
+        from ppt_maker import iter_analysis
+        for conf_path in confs:
+            conf = load_conf(conf_path)
+            cache.configure_from_conf(conf)
+            m_set = [m for m in conf["motor_set"] if m["name"] and m["data"]]
+            added = 0
+            capture_cache = cache.get_capture_cache()
+            fingerprint = capture_cache.fingerprint if capture_cache is not None else cache.calc_file_hash
+            for i, ret in iter_analysis(m_set, workers=args.workers, result_cache=cache.get_result_cache()):
+                added += index.add_result(conf.get("site", ""), m_set[i]["name"], ret, m_set[i]["data"],
+                                          fingerprint=fingerprint)
+            _emit({"config": conf_path, "added": added})
+    index.save(out)
+    _emit({"index": out, "captures": index.n, "seconds": round(time.perf_counter() - start, 3)})
+    return 0
+
+
+def cmd_index_query(args):
+    from feature_index import FeatureIndex, FEATURES, DERIVED
+
+    if args.feature not in FEATURES + DERIVED:
+        print(f"특징 이름: {FEATURE_HELP}", file=sys.stderr)
+        return 2
+    index = FeatureIndex.load(args.index)
+    absolute = args.feature == "freq_drift"
+    if args.command_index == "top" and args.motors:
+        for row in index.rank_motors(args.feature, args.k, stat=args.stat, absolute=absolute):
+            _emit(row)
+        return 0
+    if args.command_index == "top":
+        rows = index.top_k(args.feature, args.k, absolute=absolute)
+        z = None
+    else:
+        rows, z = index.outliers(args.feature, by=args.by, threshold=args.threshold)
+        rows = rows[:args.k]
+    for i, row in zip(rows, index.rows(rows)):
+        if z is not None:
+            row["z"] = round(float(z[i]), 2)
+        _emit(row)
+    return 0
+
+
+def cmd_profile(args):
+    import profiling
+
+    for path in args.reports:
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        print(f"# {path} ({report.get('site')}, {report.get('created')})")
+        print(profiling.format_table(report))
+        if args.cprofile and report.get("cprofile"):
+            print("\n".join(report["cprofile"]))
+        print()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="필드 구축 분석 명령행 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("report", help="설정 파일별 보고서 일괄 생성")
+    p.add_argument("configs", nargs="+", help="config.json 형식의 설정 파일")
+    p.add_argument("--out", help="보고서 저장 폴더 (기본: 설정의 result_dir)")
+    p.add_argument("--workers", type=int, default=None, help="분석 프로세스 수 (기본: CPU 코어 수, 1: 순차)")
+    p.add_argument("--jobs", type=int, default=4, help="동시에 진행할 사이트 수")
+    p.add_argument("--json", help="전체 결과를 저장할 json 파일")
+    p.add_argument("--export", help="캡처/지표를 추가할 HDF5 저장소 (.h5)")
+    p.add_argument("--chunk", type=int, default=None,
+                   help="이보다 긴 캡처는 메모리 맵 + 블록 단위로 분석 (샘플 수, 0: 사용 안 함)")
+    p.add_argument("--profile", default=None, help="cprofile, tracemalloc 또는 cprofile,tracemalloc")
+    p.add_argument("--incremental", action="store_true",
+                   help="이전 보고서를 열어 입력이 바뀐 모터의 슬라이드만 다시 생성")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("export", help="캡처/지표를 HDF5 컬럼 저장소로 내보내기")
+    p.add_argument("configs", nargs="+", help="config.json 형식의 설정 파일")
+    p.add_argument("--store", required=True, help="HDF5 저장소 경로 (.h5, 없으면 생성)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("watch", help="폴더에 새로 들어오는 AWS 캡처를 모터별로 누적 분석")
+    p.add_argument("folder", help="감시할 폴더 (*.json)")
+    p.add_argument("--config", help="모터 설정 (이미 배정된 파일로 mac_address -> 모터 대응)")
+    p.add_argument("--interval", type=float, default=None, help="폴더 확인 주기 (초)")
+    p.add_argument("--settle", type=float, default=None, help="마지막 수정 후 이 시간(초)이 지난 파일만 읽음")
+    p.add_argument("--new-only", action="store_true", help="지금 폴더에 있는 파일은 건너뜀")
+    p.add_argument("--summary", help="갱신할 때마다 모터별 지표를 저장할 json 파일")
+    p.add_argument("--report", action="store_true", help="갱신할 때마다 보고서도 증분 생성 (--config 필요)")
+    p.add_argument("--out", help="보고서 저장 폴더 (기본: 설정의 result_dir)")
+    p.add_argument("--once", action="store_true", help="한 번만 확인하고 종료")
+    p.add_argument("--state", help="처리한 파일 목록 저장 위치 (기본: --out, --summary 폴더 또는 감시 폴더의 .fa_watch_state.json)")
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("index", help="사이트/모터 전체의 캡처별 특징 색인 (이상 모터 선별)")
+    index_sub = p.add_subparsers(dest="command_index", required=True)
+    q = index_sub.add_parser("build", help="HDF5 저장소 또는 설정 파일(결과 캐시 사용)에서 색인 생성")
+    q.add_argument("out", help="색인 폴더")
+    q.add_argument("--store", nargs="+", help="exporter 로 만든 HDF5 저장소")
+    q.add_argument("--configs", nargs="+", help="config.json 형식의 설정 파일")
+    q.add_argument("--workers", type=int, default=None, help="분석 프로세스 수")
+    q.add_argument("--append", action="store_true", help="기존 색인에 추가")
+    q.set_defaults(func=cmd_index_build)
+    q = index_sub.add_parser("top", help="특징값 상위 캡처 (--motors: 모터별 통계 상위)")
+    q.add_argument("index", help="색인 폴더")
+    q.add_argument("feature", help=FEATURE_HELP)
+    q.add_argument("-k", type=int, default=20)
+    q.add_argument("--motors", action="store_true", help="캡처 대신 모터 순위")
+    q.add_argument("--stat", choices=("median", "mean", "max"), default="median", help="모터별 통계")
+    q.set_defaults(func=cmd_index_query)
+    q = index_sub.add_parser("outliers", help="사이트/모터 기준선(중앙값, MAD) 대비 이상 캡처")
+    q.add_argument("index", help="색인 폴더")
+    q.add_argument("feature", help=FEATURE_HELP)
+    q.add_argument("--by", choices=("site", "motor"), default="site")
+    q.add_argument("--threshold", type=float, default=3.5, help="modified z-score 기준")
+    q.add_argument("-k", type=int, default=50)
+    q.set_defaults(func=cmd_index_query)
+
+    p = sub.add_parser("profile", help="보고서 생성 타이밍 보고서(json) 요약 출력")
+    p.add_argument("reports", nargs="+", help="./temp/profile/*.json")
+    p.add_argument("--cprofile", action="store_true", help="cProfile 상위 함수 목록도 출력")
+    p.set_defaults(func=cmd_profile)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+디코딩된 캡처와 캡처별 지표를 HDF5 컬럼 저장소로 내보내기
+구조:
+    /captures/<컬럼>      캡처별 지표 (1D, 컬럼마다 별도 dataset)
+    /waveforms/current_u  모든 캡처의 샘플을 이어붙인 float32 (v, w 동일)
+    captures/offset 과 captures/sample_size 로 캡처별 파형 구간을 찾습니다.
+모든 dataset 은 청크 + 압축 + 크기 가변이라 여러 번 나눠서 추가할 수 있고,
+읽을 때는 필요한 구간의 청크만 읽습니다.
+ex)
+    export_dataset(conf, "./fleet.h5")
+    with open_store("./fleet.h5") as store:
+        rms = store["captures/rms_mean"][:]
+        u = read_waveform(store, 10, "current_u")
+"""
+import os
+
+import numpy as np
+
+import cache
+import fe_tools as fet
+from analyze import calc_capture_metrics
+
+PHASES = ("current_u", "current_v", "current_w")
+WAVE_CHUNK = 1 << 18   # 파형 청크 (샘플 수)
+ROW_CHUNK = 1024       # 지표 청크 (캡처 수)
+COMPRESSION = "gzip"
+COMPRESSION_OPTS = 4
+
+STR_COLUMNS = ("site", "motor", "file", "file_hash", "mac_address")
+INT_COLUMNS = ("sampling_rate", "sample_size", "offset")
+
+
+def _h5py():
+    try:
+        import h5py
+    except ImportError as e:
+        raise ImportError("데이터 내보내기에는 h5py 가 필요합니다. (pip install h5py)") from e
+    return h5py
+
+
+def open_store(path, mode="r"):
+    """
+    저장소 열기
+    path: .h5 경로
+    mode: "r" 읽기, "a" 추가
+    """
+    return _h5py().File(path, mode)
+
+
+def _column(store, name, dtype):
+    h5py = _h5py()
+    group = store.require_group("captures")
+    if name not in group:
+        dt = h5py.string_dtype() if dtype is str else dtype
+        group.create_dataset(name, shape=(0,), maxshape=(None,), dtype=dt, chunks=(ROW_CHUNK,),
+                             compression=COMPRESSION, compression_opts=COMPRESSION_OPTS)
+    return group[name]
+
+
+def _wave(store, name):
+    group = store.require_group("waveforms")
+    if name not in group:
+        group.create_dataset(name, shape=(0,), maxshape=(None,), dtype=np.float32, chunks=(WAVE_CHUNK,),
+                             compression=COMPRESSION, compression_opts=COMPRESSION_OPTS, shuffle=True)
+    return group[name]
+
+
+def _append(dset, values):
+    n = dset.shape[0]
+    dset.resize((n + len(values),))
+    dset[n:] = values
+
+
+def _convert(value, dtype, fill):
+    if dtype is str:
+        return "" if value is None else str(value)
+    try:
+        return dtype(value)
+    except (TypeError, ValueError):
+        return fill
+
+
+def append_rows(store, rows):
+    """
+    지표 행 추가. 처음 보는 컬럼은 새로 만들고, 이전 행은 NaN/빈 문자열로 채웁니다.
+    rows: [{컬럼: 값}, ...]
+    """
+    if not rows:
+        return
+    n_old = store["captures/offset"].shape[0] if "captures/offset" in store else 0
+    names = sorted({k for r in rows for k in r})
+    for name in names:
+        if name in STR_COLUMNS:
+            dtype, fill = str, ""
+        elif name in INT_COLUMNS:
+            dtype, fill = np.int64, 0
+        else:
+            dtype, fill = np.float64, np.nan
+        dset = _column(store, name, dtype)
+        if dset.shape[0] < n_old:  # 새 컬럼
+            _append(dset, [fill] * (n_old - dset.shape[0]))
+        values = [r.get(name, fill) for r in rows]
+        _append(dset, [_convert(v, dtype, fill) for v in values])
+    # 이번에 값이 없던 기존 컬럼도 길이를 맞춤
+    for name, dset in store["captures"].items():
+        if name not in names:
+            fill = "" if name in STR_COLUMNS else (0 if name in INT_COLUMNS else np.nan)
+            _append(dset, [fill] * len(rows))
+
+
+def read_waveform(store, index, phase="current_u"):
+    """
+    캡처 하나의 파형만 읽기 (해당 구간의 청크만 읽음)
+    index: 캡처 행 번호
+    phase: current_u/v/w
+    """
+    offset = int(store["captures/offset"][index])
+    size = int(store["captures/sample_size"][index])
+    return store[f"waveforms/{phase}"][offset:offset+size]
+
+
+def export_dataset(conf, path, progress=None, status=None):
+    """
+    설정의 모든 모터 캡처를 저장소에 추가 (같은 사이트/모터에 이미 들어있는 캡처는 건너뜀)
+    conf: 설정 dictionary (data/config.json 형식)
+    path: .h5 경로
+    progress: progress(완료 개수, 전체 개수) 콜백
+    status: status(메시지) 콜백
+    return: 추가된 캡처 수
+    """
+    capture_cache = cache.get_capture_cache()
+    fingerprint = capture_cache.fingerprint if capture_cache is not None else cache.calc_file_hash
+    m_set = [m for m in conf["motor_set"] if m["name"] and m["data"]]
+    total = sum(len(m["data"]) for m in m_set)
+    done = added = 0
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open_store(path, "a") as store:
+        # 같은 사이트/모터의 같은 캡처는 건너뛰고, 다른 모터가 같은 파일을 쓰면 행만 추가 (파형은 공유)
+        known, offsets = set(), {}
+        if "captures/file_hash" in store:
+            cols = [[v.decode() if isinstance(v, bytes) else v for v in store[f"captures/{k}"][:]]
+                    for k in ("site", "motor", "file_hash")]
+            known = set(zip(*cols))
+            offsets = dict(zip(cols[2], store["captures/offset"][:].tolist()))
+        # 지표 행은 모아서 추가 (append_rows 한 번에 모든 컬럼을 늘리고 압축 청크를 다시 쓰므로)
+        rows = []
+        try:
+            for m in m_set:
+                if status is not None:
+                    status(f"{m['name']} 내보내는 중..")
+                for fname in m["data"]:
+                    done += 1
+                    file_hash = fingerprint(fname)
+                    key = (conf.get("site", ""), m["name"], file_hash)
+                    if key in known:
+                        if progress is not None:
+                            progress(done, total)
+                        continue
+                    d = fet.load_AWSjson(fname)
+                    row = calc_capture_metrics(d)
+                    offset = offsets.get(file_hash)
+                    if offset is None:
+                        offset = offsets[file_hash] = _wave(store, PHASES[0]).shape[0]
+                        for k in PHASES:
+                            _append(_wave(store, k), d[k])
+                    row.update({"site": key[0], "motor": key[1], "file": fname, "file_hash": file_hash,
+                                "offset": offset})
+                    rows.append(row)
+                    known.add(key)
+                    added += 1
+                    if len(rows) >= ROW_CHUNK:
+                        append_rows(store, rows)
+                        rows = []
+                    if progress is not None:
+                        progress(done, total)
+        finally:
+            # 중간에 실패해도 이미 추가한 파형과 지표 행 수를 맞춤
+            append_rows(store, rows)
+    if status is not None:
+        status(f"데이터 내보내기 완료: {added}개 캡처 추가")
+    return added
@@ -1,14 +1,25 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.signal import savgol_filter
-from scipy.optimize import curve_fit
-from scipy.signal import butter, sosfiltfilt
+# matplotlib/scipy 는 로딩이 느려서 (수 초) 사용하는 함수 안에서 import 합니다.
 
-from array import array
+import os
+import re
+import hashlib
 import json
+import mmap
 import base64
 import glob
-import gzip
+import tempfile
+import warnings
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import cache
+import profiling
+
+B64_CHUNK = 1 << 20  # base64 디코딩 단위 (4의 배수)
+PREFETCH_DEPTH = 2   # load_AWSjson_prefetch 기본 선행 로딩 파일 수
 
 def load_get_file_list(folderpath="./", extension="txt"):
     """
@@ -30,9 +41,48 @@ def load_textfile(fname, skiprows=0, delimiter=","):
     data = np.loadtxt(fname=fname, skiprows=skiprows, delimiter=delimiter)
     return data
 
-def load_AWSjson(fname):
+def _chain_flush(chunks, dec):
+    yield from chunks
+    yield dec.flush()
+
+def decode_AWSpayload(payload, sample_size=None, dtype=np.float32):
+    """
+    AWS 전류 페이로드(base64 -> gzip -> float32) 디코딩
+    base64 디코딩과 gzip 해제를 청크 단위로 흘려서 sample_size 크기로
+    미리 잡아둔 버퍼에 바로 기록하고, np.frombuffer 로 복사 없이 해석합니다.
+    payload: base64 문자열
+    sample_size: 샘플 수 (None 이면 압축 해제 결과 크기를 그대로 사용)
+    dtype: 반환 dtype. 기본 float32 (복사 없음), np.float64 지정 시 업캐스트
+    return: 1d array
+    """
+    if isinstance(payload, str):
+        payload = payload.encode("ascii")
+    payload = memoryview(payload)
+    itemsize = np.dtype(np.float32).itemsize
+    buf = bytearray(sample_size*itemsize if sample_size else 0)
+    pos = 0
+    dec = zlib.decompressobj(wbits=31)  # gzip 헤더
+    chunks = (dec.decompress(base64.b64decode(payload[i:i+B64_CHUNK]))
+              for i in range(0, len(payload), B64_CHUNK))
+    for chunk in _chain_flush(chunks, dec):
+        end = pos + len(chunk)
+        if end > len(buf):  # sample_size 보다 큰 경우 버퍼 확장
+            buf.extend(bytes(end - len(buf)))
+        with memoryview(buf) as view:
+            view[pos:end] = chunk
+        pos = end
+    nsamp = pos // itemsize
+    arr = np.frombuffer(buf, dtype=np.float32, count=nsamp)
+    if np.dtype(dtype) != arr.dtype:
+        arr = arr.astype(dtype)
+    return arr
+
+def load_AWSjson(fname, dtype=np.float32, use_cache=True):
     """
     AWS S3에 저장된 json 파일의 로딩
+    디코딩 결과는 캡처 캐시(cache.CaptureCache)에 저장되어 다음 로딩부터 재사용됩니다.
+    dtype: 전류 어레이 dtype. 기본 float32, np.float64 지정 시 업캐스트
+    use_cache: 캡처 캐시 사용 여부
     return: dictionary(
         'version': str
         'mac_address': str
@@ -44,17 +94,267 @@ def load_AWSjson(fname):
         'current_w': 1d array
     )    
     """
-    with open(fname, 'r') as f:
-        data = json.load(f)
-    
-    data['current_u'] = np.array(list(array('f', gzip.decompress(base64.b64decode(data['current_u'])))))
-    data['current_v'] = np.array(list(array('f', gzip.decompress(base64.b64decode(data['current_v'])))))
-    data['current_w'] = np.array(list(array('f', gzip.decompress(base64.b64decode(data['current_w'])))))
+    keys = ('current_u', 'current_v', 'current_w')
+    profiling.count("load.files")
+    capture_cache = cache.get_capture_cache() if use_cache else None
+    raw, data = None, None
+    if capture_cache is not None:
+        with profiling.stage("load.cache"):
+            data = capture_cache.load(fname)
+    if data is None:
+        # 파일은 한 번만 읽어서 캐시 조회(내용 해시)와 디코딩에 같이 사용
+        with profiling.stage("load.read"):
+            with open(fname, 'rb') as f:
+                raw = f.read()
+        profiling.count("load.bytes", len(raw))
+        if capture_cache is not None:
+            with profiling.stage("load.cache"):
+                data = capture_cache.load(fname, raw=raw)
+    if data is not None:
+        for key in keys:
+            if data[key].dtype != np.dtype(dtype):
+                data[key] = data[key].astype(dtype)
+        profiling.count("load.cache_hits")
+        profiling.count("load.samples", sum(data[k].size for k in keys))
+        return data
+
+    with profiling.stage("load.decode"):
+        data = json.loads(raw)
+        for key in keys:
+            data[key] = decode_AWSpayload(data[key], data.get('sample_size'), dtype=np.float32)
+    profiling.count("load.samples", sum(data[k].size for k in keys))
+    if capture_cache is not None:
+        with profiling.stage("load.cache_store"):
+            capture_cache.store(fname, data, raw=raw)
+    del raw
+    if np.dtype(dtype) != np.float32:
+        for key in keys:
+            data[key] = data[key].astype(dtype)
     return data
 
-def load_CT_TesterJson(fname):
+def load_AWSjson_iter(flist, dtype=np.float32):
+    """
+    AWS json 파일 목록을 하나씩 로딩하는 제너레이터
+    메모리에는 한 번에 한 개의 캡처만 유지됩니다.
+    flist: 파일 경로 리스트
+    return: load_AWSjson 결과 dictionary 제너레이터
+    """
+    for fname in flist:
+        yield load_AWSjson(fname, dtype=dtype)
+
+def _load_recorded(loader, fname, kwargs, cache_settings):
+    # 스레드에서 로딩하고 그 스레드의 측정값을 함께 반환 (profiling 은 스레드별로 기록)
+    # 캐시 설정도 스레드별이므로 호출한 스레드의 설정을 그대로 사용
+    with profiling.collect("") as rec, cache.use_settings(cache_settings):
+        data = loader(fname, **kwargs)
+    return data, rec
+
+def load_AWSjson_prefetch(flist, depth=PREFETCH_DEPTH, loader=None, release=None, **kwargs):
+    """
+    load_AWSjson_iter 의 선행 로딩 버전
+    현재 파일을 처리하는 동안 다음 depth 개 파일을 스레드 풀에서 미리 읽고 디코딩합니다.
+    (파일 I/O 와 zlib 해제는 GIL 을 놓으므로 분석과 겹쳐서 실행됩니다.)
+    결과는 파일 순서대로 yield 되며, 메모리에는 최대 depth+1 개의 캡처가 있습니다.
+    flist: 파일 경로 리스트
+    depth: 미리 읽을 파일 수 (0 이면 load_AWSjson_iter 와 같음)
+    loader: 로딩 함수 (기본 load_AWSjson, 긴 캡처는 load_AWSjson_mmap)
+    release: 사용이 끝난 결과를 정리할 함수 (ex. release_AWSjson_mmap)
+    kwargs: loader 인자 (dtype, use_cache 등)
+    return: load_AWSjson 결과 dictionary 제너레이터
+    """
+    loader = loader or load_AWSjson
+    release = release or _noop_release
+    if depth <= 0:
+        for fname in flist:
+            data = loader(fname, **kwargs)
+            try:
+                yield data
+            finally:
+                release(data)
+        return
+
+    files = iter(flist)
+    pending = deque()
+    cache_settings = cache.get_settings()
+    with ThreadPoolExecutor(max_workers=depth, thread_name_prefix="aws-prefetch") as pool:
+        def submit():
+            fname = next(files, None)
+            if fname is not None:
+                pending.append(pool.submit(_load_recorded, loader, fname, kwargs, cache_settings))
+
+        try:
+            for _ in range(depth):
+                submit()
+            while pending:
+                with profiling.stage("load.wait"):
+                    data, rec = pending.popleft().result()
+                profiling.current().merge(rec)
+                submit()
+                try:
+                    yield data
+                finally:
+                    release(data)
+                del data
+        finally:
+            # 중간에 멈춘 경우 (예외, 취소) 남은 로딩은 취소하고, 이미 읽은 결과는 정리
+            for fut in pending:
+                if not fut.cancel() and fut.exception() is None:
+                    release(fut.result()[0])
+
+def _noop_release(data):
+    pass
+
+def _find_payload(buf, key):
+    # json 안에서 key 의 문자열 값 구간 (따옴표 제외)
+    tag = b'"' + key.encode("ascii") + b'"'
+    i = buf.find(tag)
+    if i < 0:
+        raise KeyError(key)
+    i = buf.find(b'"', buf.find(b':', i + len(tag))) + 1
+    return i, buf.find(b'"', i)
+
+def _payload_size(payload):
+    # gzip trailer 의 ISIZE (압축 해제 크기 mod 2^32)
+    tail = base64.b64decode(payload[len(payload)-12:])
+    return int.from_bytes(tail[-4:], "little")
+
+def _decode_into(payload, out, hasher=None):
+    # decode_AWSpayload 와 같은 스트리밍 디코딩. 압축 해제 크기도 B64_CHUNK 로 제한해서
+    # out(쓰기 가능한 바이트 버퍼)에 바로 기록. hasher 가 있으면 읽은 페이로드 청크도 해시에 추가
+    dec = zlib.decompressobj(wbits=31)
+    pos = 0
+
+    def write(chunk):
+        end = pos + len(chunk)
+        if end > len(out):
+            raise ValueError("payload is larger than sample_size")
+        out[pos:end] = chunk
+        return end
+
+    for i in range(0, len(payload), B64_CHUNK):
+        if hasher is not None:
+            hasher.update(payload[i:i+B64_CHUNK])
+        data = base64.b64decode(payload[i:i+B64_CHUNK])
+        while data:
+            pos = write(dec.decompress(data, B64_CHUNK))
+            data = dec.unconsumed_tail
+    return write(dec.flush())
+
+def load_AWSjson_mmap(fname, use_cache=True, tmp_dir="./temp"):
+    """
+    AWS json 파일을 메모리 맵 파일로 로딩 (긴 캡처의 청크 분석용)
+    json 파일도 mmap 으로 열어 base64 페이로드를 청크 단위로 디코딩하고,
+    결과는 3 x N float32 .npy 파일에 바로 기록합니다.
+    json 텍스트나 전체 어레이를 메모리에 올리지 않으므로 메모리 사용량은 청크 크기 수준입니다.
+    use_cache: True 이면 캡처 캐시 항목에 기록하고, 캐시의 .npy 를 그대로 메모리 맵
+    tmp_dir: 캐시를 쓰지 않을 때 .npy 를 둘 폴더 (release_AWSjson_mmap 에서 삭제)
+    return: load_AWSjson 형식 dictionary. current_u/v/w 는 읽기 전용 np.memmap (float32)
+    """
+    keys = ('current_u', 'current_v', 'current_w')
+    profiling.count("load.files")
+    capture_cache = cache.get_capture_cache() if use_cache else None
+    if capture_cache is not None:
+        with profiling.stage("load.cache"):
+            data = capture_cache.load(fname, mmap_mode="r")
+        if data is not None:
+            profiling.count("load.cache_hits")
+            profiling.count("load.samples", sum(data[k].size for k in keys))
+            return data
+        npy_path = capture_cache.entry_tmp_path(fname)
+    else:
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, npy_path = tempfile.mkstemp(suffix=".npy", dir=tmp_dir)
+        os.close(fd)
+
+    with profiling.stage("load.decode"), open(fname, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        profiling.count("load.bytes", len(buf))
+        spans = sorted(_find_payload(buf, k) + (k,) for k in keys)
+        # 페이로드를 뺀 나머지(메타데이터)만 파싱
+        pieces, last = [], 0
+        for s, e, _ in spans:
+            pieces.append(buf[last:s])
+            last = e
+        pieces.append(buf[last:])
+        data = json.loads(b"".join(pieces))
+        # 캐시 키(파일 내용 해시)는 디코딩하면서 파일 순서대로 같이 계산 (파일을 한 번만 읽음)
+        hasher = hashlib.sha1() if capture_cache is not None else None
+        with memoryview(buf) as view:
+            payloads = {k: view[s:e] for s, e, k in spans}
+            nsamp = data.get('sample_size') or _payload_size(payloads[keys[0]]) // 4
+            out = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.float32, shape=(len(keys), nsamp))
+            for piece, (_, _, k) in zip(pieces, spans):
+                if hasher is not None:
+                    hasher.update(piece)
+                with memoryview(out[keys.index(k)]).cast("B") as row:
+                    _decode_into(payloads[k], row, hasher)
+            if hasher is not None:
+                hasher.update(pieces[-1])
+            out.flush()
+            del out, payloads
+
+    profiling.count("load.samples", len(keys) * nsamp)
+    meta = {k: v for k, v in data.items() if k not in keys}
+    cached = None
+    if capture_cache is not None:
+        cached = capture_cache.adopt(fname, npy_path, meta, file_hash=hasher.hexdigest())
+    if cached is None:
+        data["tmp_path"] = npy_path
+    else:
+        npy_path = cached
+    arr = np.load(npy_path, mmap_mode="r")
+    for i, k in enumerate(keys):
+        data[k] = arr[i]
+    return data
+
+def release_AWSjson_mmap(data):
+    """
+    load_AWSjson_mmap 결과의 메모리 맵을 놓고 임시 .npy 파일 삭제
+    """
+    for key in ('current_u', 'current_v', 'current_w'):
+        data.pop(key, None)
+    tmp_path = data.pop("tmp_path", None)
+    if tmp_path:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+def load_AWSjson_mmap_iter(flist, use_cache=True):
+    """
+    load_AWSjson_iter 의 메모리 맵 버전
+    다음 파일로 넘어갈 때 이전 캡처의 메모리 맵을 놓습니다.
+    """
+    for fname in flist:
+        data = load_AWSjson_mmap(fname, use_cache=use_cache)
+        try:
+            yield data
+        finally:
+            release_AWSjson_mmap(data)
+
+CT_CHANNELS = ('AI0', 'AI1', 'AI2', 'AI3', 'AI4', 'AI5')
+_CT_ARRAY = re.compile(rb'"(AI\d+)"\s*:\s*\[')
+
+def _parse_number_array(text, dtype):
+    # "1.0, 2.0, ..." (대괄호 제외) 를 파이썬 float 객체 없이 바로 dtype 버퍼로 파싱
+    if not text.strip():
+        return np.empty(0, dtype=dtype)
+    if b'null' not in text:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)  # 숫자가 아닌 값에서 파싱 중단 경고
+            arr = np.fromstring(text, dtype=dtype, sep=',')
+        if len(arr) == text.count(b',') + 1:
+            return arr
+    # null 등 숫자가 아닌 값: json 으로 다시 파싱 (None -> nan)
+    return np.array([np.nan if v is None else v for v in json.loads(b'[' + text + b']')], dtype=dtype)
+
+def load_CT_TesterJson(fname, channels=None, dtype=np.float64):
     """
     CT tester 프로그램을 통해 얻은 json 파일의 로딩
+    파일을 메모리 맵으로 열어 AI 채널 배열 구간을 찾고, 배열은 np.fromstring 으로 바로 파싱합니다.
+    나머지 항목(acq_time 등)만 json 으로 읽습니다.
+    channels: 읽을 채널 목록 (None 이면 전체). 목록에 없는 채널은 파싱하지 않고 결과에서 빠집니다.
+    dtype: 채널 배열 dtype (np.float32 지정 시 메모리 절반)
     return: dictionary(
         'acq_time': str
         'sampling_rate': int
@@ -65,16 +365,33 @@ def load_CT_TesterJson(fname):
         'AI3': 1d array
         'AI4': 1d array
         'AI5': 1d array
-    )    
+    )
     """
-    with open(fname, 'r') as f:
-        data = json.loads(f.read())
-        data['AI0'] = np.array(data['AI0'])
-        data['AI1'] = np.array(data['AI1'])
-        data['AI2'] = np.array(data['AI2'])
-        data['AI3'] = np.array(data['AI3'])
-        data['AI4'] = np.array(data['AI4'])
-        data['AI5'] = np.array(data['AI5'])
+    wanted = None if channels is None else set(channels)
+    arrays = {}
+    with open(fname, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        rest = []  # 배열을 null 로 바꾼 나머지 json 조각
+        pos = 0
+        for m in _CT_ARRAY.finditer(mm):
+            if m.start() < pos:  # 앞 배열 안에서 찾은 문자열
+                continue
+            key = m.group(1).decode()
+            end = mm.find(b']', m.end())
+            if end < 0:
+                raise ValueError(f"{fname}: {key} 배열이 끝나지 않았습니다.")
+            if wanted is None or key in wanted:
+                with profiling.stage("load.ct_parse"):
+                    arrays[key] = _parse_number_array(mm[m.end():end], dtype)
+            rest.append(mm[pos:m.end()-1])
+            rest.append(b'null')
+            pos = end + 1
+        rest.append(mm[pos:])
+    data = json.loads(b''.join(rest))
+    for key in list(data):
+        if key in arrays:
+            data[key] = arrays[key]
+        elif key.startswith('AI') and data[key] is None:
+            del data[key]  # channels 에서 제외된 채널
     return data
 
 def save_list_to_file(_list, fname):
@@ -94,13 +411,121 @@ def save_figure(figname, fname):
     figname: figure 이름
     fname: 파일 이름
     """
+    import matplotlib.pyplot as plt
     plt.figure(figname)
     plt.savefig(fname if ".jpg" in fname else fname+".jpg")
 
 
+class RunningStats:
+    """
+    Welford 알고리즘 기반 평균/표준편차 누적 계산
+    어레이 단위로 누적하며(Chan 병합), 전체 데이터를 메모리에 둘 필요가 없습니다.
+    ex)
+        st = RunningStats()
+        for arr in arrays:
+            st.update(arr)
+        st.mean, st.std
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, arr):
+        arr = np.asarray(arr, dtype=np.float64)
+        if arr.size == 0:
+            return
+        mean_b = arr.mean()
+        self._merge(arr.size, mean_b, ((arr - mean_b)**2).sum())
+
+    def merge(self, other):
+        """
+        다른 RunningStats 의 누적 결과 병합
+        """
+        if other.n:
+            self._merge(other.n, other.mean, other.m2)
+
+    def _merge(self, n_b, mean_b, m2_b):
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta**2 * self.n * n_b / n
+        self.n = n
+
+    @property
+    def var(self):
+        return self.m2 / self.n if self.n else 0.0
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
 def calc_power(u,v,w):
-    power = np.sqrt((u**2+v**2+w**2)/3)
-    return power
+    """
+    3상 순시 RMS: sqrt((u^2+v^2+w^2)/3)
+    결과 어레이 외에 임시 어레이는 하나만 사용합니다.
+    """
+    dtype = np.result_type(np.asarray(u).dtype, np.float32)
+    power = np.square(u, dtype=dtype)
+    tmp = np.square(v, dtype=dtype)
+    power += tmp
+    np.square(w, out=tmp, dtype=dtype)
+    power += tmp
+    del tmp
+    power /= 3
+    return np.sqrt(power, out=power)
+
+def calc_batch_power(x, axis=-2):
+    """
+    calc_power 의 배치 버전
+    x: 상 축(길이 3)을 가진 어레이. ex) (파일 x 상 x 샘플)
+    axis: 상 축
+    return: 상 축이 빠진 순시 RMS 어레이. ex) (파일 x 샘플)
+    """
+    x = np.asarray(x)
+    if x.shape[axis] != 3:
+        raise ValueError(f"상 축 길이는 3 이어야 합니다: {x.shape}")
+    return calc_power(*np.moveaxis(x, axis, 0))
+
+def process_stack_captures(datas, keys=('current_u', 'current_v', 'current_w'), length=None, dtype=np.float32):
+    """
+    여러 캡처를 (파일 x 상 x 샘플) 어레이 하나로 모음 (배치 필터/스무딩/fft 입력용)
+    datas: load_AWSjson 결과 리스트
+    keys: 모을 상
+    length: 샘플 수 (None 이면 가장 짧은 캡처 길이, 긴 캡처는 앞부분만 사용)
+    return: (len(datas), len(keys), length) 어레이
+    """
+    if length is None:
+        length = min(len(d[k]) for d in datas for k in keys)
+    out = np.empty((len(datas), len(keys), length), dtype=dtype)
+    for i, d in enumerate(datas):
+        for j, k in enumerate(keys):
+            out[i, j] = d[k][:length]
+    return out
+
+def iter_blocks(n, chunk, overlap=0):
+    """
+    길이 n 을 chunk 크기 블록으로 나누는 제너레이터
+    n: 데이터 길이
+    chunk: 블록 크기
+    overlap: 블록 끝을 다음 블록 쪽으로 늘릴 샘플 수 (이동 윈도우 계산용)
+    return: (start, stop, ext_stop) 제너레이터. [start, stop) 는 서로 겹치지 않고,
+            ext_stop = min(stop+overlap, n)
+    """
+    for start in range(0, n, chunk):
+        stop = min(start+chunk, n)
+        yield start, stop, min(stop+overlap, n)
+
+def iter_cycle_blocks(n, fs, f0, chunk):
+    """
+    길이 n 을 기본파 주기 경계에 맞춘 약 chunk 크기 블록으로 나누는 제너레이터 (블록 단위 대칭분 계산용)
+    마지막의 한 주기가 안 되는 구간은 버리고, f0 가 SEQ_F0_BAND 밖이면 블록이 없습니다.
+    return: (start, stop) 제너레이터
+    """
+    edges = _cycle_edges(n, fs, f0)
+    step = max(int(chunk * f0 / fs), 1)  # 블록당 주기 수
+    for i in range(0, edges.size-1, step):
+        yield int(edges[i]), int(edges[min(i+step, edges.size-1)])
 
 def process_split2D(arr2D):
     """
@@ -111,15 +536,17 @@ def process_split2D(arr2D):
     columns = arr2D.shape[-1]
     return [arr2D[i] for i in range(columns)]
 
-def calc_smoothing(arr, windowLen, polyorder=1):
+def calc_smoothing(arr, windowLen, polyorder=1, axis=-1):
     """
-    1D 어레이 스무딩
-    arr: 1차원 어레이
+    어레이 스무딩 (Savitzky-Golay)
+    arr: 1차원 어레이 또는 (파일 x 상 x 샘플) 등 N차원 어레이
     windowLen: 윈도우 길이(홀수)
     polyorder: 차수, 기본값 1
+    axis: 시간축 (N차원이면 모든 행을 한 번에 처리)
     return: 스무딩된 어레이
     """
-    sm = savgol_filter(arr, window_length=windowLen, polyorder=polyorder)
+    from scipy.signal import savgol_filter
+    sm = savgol_filter(arr, window_length=windowLen, polyorder=polyorder, axis=axis)
     return sm
 
 def process_threshold_index(arr, threshold):
@@ -134,10 +561,11 @@ def process_threshold_index(arr, threshold):
         ...
         [시작인덱스, 종료인덱스]]
     """
-    newarr = np.concatenate([[threshold-1], arr, [threshold-1]])
-    mask = newarr > threshold
-    slist = np.where(np.diff(mask.astype(int)) == 1)[0]
-    elist = np.where(np.diff(mask.astype(int)) == -1)[0]-1
+    mask = np.zeros(len(arr)+2, dtype=np.int8)
+    mask[1:-1] = np.asarray(arr) > threshold
+    edge = np.diff(mask)
+    slist = np.flatnonzero(edge == 1)
+    elist = np.flatnonzero(edge == -1)-1
     index = np.c_[slist, elist]
     return index
 
@@ -155,13 +583,132 @@ def process_windowing_index(array, window_size, step):
         [시작인덱스, 종료인덱스]]
     """
     array_len = len(array) # 1000
-    index_list = []
-    for i in range(int((array_len-window_size)/step)):
-        s_index = i*step
-        e_index = i*step+window_size
-        if e_index <= array_len:
-            index_list.append([s_index, e_index])
-    return index_list
+    n = max(int((array_len-window_size)/step), 0)
+    s_index = np.arange(n) * step
+    return np.c_[s_index, s_index+window_size]
+
+def process_windowing_view(arr, window_size, step, axis=-1):
+    """
+    윈도우 처리를 위한 strided view (복사 없음)
+    arr: N차원 어레이
+    window_size: 윈도우 크기
+    step: 움직일 스텝 크기
+    axis: 윈도우를 적용할 축
+    return: (..., 윈도우 개수, window_size) view. axis 는 윈도우 개수 축으로 바뀝니다.
+    ex)
+        win = process_windowing_view(arr, 100, 50)
+        win.max(axis=-1) - win.min(axis=-1)
+    """
+    view = np.lib.stride_tricks.sliding_window_view(arr, window_size, axis=axis)
+    sl = [slice(None)] * view.ndim
+    sl[axis % np.ndim(arr)] = slice(None, None, step)
+    return view[tuple(sl)]
+
+def calc_window_rms(arr, window_size, step, axis=-1):
+    """
+    윈도우별 RMS (누적합 기반, 데이터 길이에 선형)
+    arr: 1D 어레이 또는 N차원 어레이
+    window_size: 윈도우 크기
+    step: 움직일 스텝 크기
+    axis: 시간축
+    return: 윈도우별 RMS (i 번째 값은 arr[i*step:i*step+window_size]).
+            N차원이면 axis 가 윈도우 개수 축으로 바뀝니다.
+    """
+    arr = np.moveaxis(np.asarray(arr, dtype=np.float64), axis, -1)
+    n = arr.shape[-1]
+    if n < window_size:
+        return np.moveaxis(np.zeros(arr.shape[:-1] + (0,)), -1, axis)
+    cs = np.zeros(arr.shape[:-1] + (n+1,))
+    np.cumsum(arr*arr, axis=-1, out=cs[..., 1:])
+    s_index = np.arange(0, n-window_size+1, step)
+    msq = (cs[..., s_index+window_size] - cs[..., s_index]) / window_size
+    return np.moveaxis(np.sqrt(np.maximum(msq, 0)), -1, axis)
+
+def _running_extreme(arr, window, func):
+    # van Herk/Gil-Werman: 블록별 누적 극값 두 개로 모든 윈도우를 O(N) 에 계산
+    arr = np.asarray(arr)
+    n = arr.size
+    nb = -(-n // window)
+    pad = nb*window - n
+    blocks = np.pad(arr, (0, pad), mode="edge").reshape(nb, window)
+    prefix = func.accumulate(blocks, axis=1).ravel()
+    suffix = func.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return func(suffix[:n-window+1], prefix[window-1:n])
+
+def calc_running_max(arr, window):
+    """
+    이동 윈도우 최대값 (데이터 길이에 선형, 윈도우 크기와 무관)
+    arr: 1D 어레이
+    window: 윈도우 크기
+    return: 길이 len(arr)-window+1 어레이. i 번째 값은 arr[i:i+window].max()
+    """
+    return _running_extreme(arr, window, np.maximum)
+
+def calc_running_min(arr, window):
+    """
+    이동 윈도우 최소값 (calc_running_max 참고)
+    """
+    return _running_extreme(arr, window, np.minimum)
+
+def calc_sliding_p2p(arr, window):
+    """
+    이동 윈도우 peak-to-peak
+    arr: 1D 어레이
+    window: 윈도우 크기
+    return: 길이 len(arr)-window+1 어레이. i 번째 값은 arr[i:i+window] 의 max-min
+    """
+    if len(arr) < window:
+        return np.zeros(0, dtype=np.asarray(arr).dtype)
+    return calc_running_max(arr, window) - calc_running_min(arr, window)
+
+def detect_transients(rms, fs, line_freq=60.0, on_ratio=0.1, min_current=0.5, smooth_len=5):
+    """
+    기동/정지 순간 검출
+    주기 단위 RMS 포락선을 스무딩한 뒤 threshold 를 넘는 운전 구간을 찾고,
+    구간의 시작을 기동, 끝을 정지로 봅니다. 모든 연산이 벡터화되어 데이터 길이에 선형입니다.
+    rms: 순시 RMS 1D 어레이 (calc_power 결과)
+    fs: 샘플레이트
+    line_freq: 전원 주파수 (포락선 윈도우 = 1주기)
+    on_ratio: 최대 포락선 대비 운전 판정 비율
+    min_current: 운전 판정 최소 전류 (A)
+    smooth_len: 포락선 스무딩 길이 (윈도우 개수, 홀수)
+    return: dictionary(
+        'running': 운전 구간 [[시작샘플, 종료샘플], ...]
+        'starts': 기동 샘플 인덱스 1D 어레이
+        'stops': 정지 샘플 인덱스 1D 어레이
+        'threshold': 운전 판정 기준 (A)
+    )
+    """
+    window, step = calc_transient_window(fs, line_freq)
+    env = calc_window_rms(rms, window, step)
+    return detect_transients_envelope(env, len(rms), window, step, on_ratio=on_ratio,
+                                      min_current=min_current, smooth_len=smooth_len)
+
+def calc_transient_window(fs, line_freq=60.0):
+    """
+    기동/정지 검출용 포락선 윈도우
+    return: window(1주기 샘플 수), step(반주기)
+    """
+    window = max(int(round(fs/line_freq)), 1)
+    return window, max(window//2, 1)
+
+def detect_transients_envelope(env, n, window, step, on_ratio=0.1, min_current=0.5, smooth_len=5):
+    """
+    주기 단위 RMS 포락선으로 기동/정지 순간 검출 (detect_transients 참고)
+    긴 캡처는 포락선을 청크 단위로 구해서 이어붙인 뒤 사용합니다.
+    env: calc_window_rms(rms, window, step) 결과
+    n: rms 길이
+    window, step: calc_transient_window 결과
+    return: detect_transients 와 동일
+    """
+    if env.size >= smooth_len:
+        env = calc_smoothing(env, smooth_len)
+    threshold = max(min_current, on_ratio*env.max()) if env.size else min_current
+    seg = process_threshold_index(env, threshold)
+    running = np.c_[seg[:, 0]*step, np.minimum(seg[:, 1]*step+window, n)]
+    starts = running[seg[:, 0] > 0, 0]
+    stops = running[seg[:, 1] < env.size-1, 1]
+    return {"running": running, "starts": starts, "stops": stops, "threshold": threshold}
 
 def calc_run_fft(x, fs):
     """
@@ -173,22 +720,272 @@ def calc_run_fft(x, fs):
         x, y = run_fft(arr, 1000) 
         plt.plot(x, y)
     """
-    Ts = 1/fs
-    Nsamp = x.size
-    xFreq = np.fft.rfftfreq(Nsamp, Ts)[:-1]
-    yFFT = (np.fft.rfft(x)/Nsamp)[:-1]*2
-    return xFreq, np.abs(yFFT)
+    return calc_batch_fft(np.ravel(x), fs)
+
+@lru_cache(maxsize=32)
+def _cached_rfftfreq(nfft, fs):
+    freq = np.fft.rfftfreq(nfft, 1/fs)[:-1]
+    freq.flags.writeable = False
+    return freq
+
+@lru_cache(maxsize=32)
+def _cached_window(name, n):
+    from scipy.signal import get_window
+    win = get_window(name, n, fftbins=True)
+    win = win / win.mean()  # 진폭 보정 (coherent gain)
+    win.flags.writeable = False
+    return win
+
+def calc_batch_fft(x, fs, axis=-1, window=None, pad=False):
+    """
+    여러 신호를 한 번에 fft (calc_run_fft 의 배치 버전)
+    주파수축과 윈도우는 (N, fs) 별로 캐시해서 재사용합니다.
+    x: N차원 어레이. ex) (상 x 샘플), (파일 x 상 x 샘플)
+    fs: 샘플레이트
+    axis: 시간축
+    window: 윈도우 이름 ("hann" 등, None 이면 미적용)
+    pad: True 이면 next_fast_len 길이로 zero-padding (샘플 수가 소수 등일 때 빠름)
+    return: 주파수(1D), 진폭(axis 방향 길이만 바뀐 어레이)
+    ex):
+        x, y = calc_batch_fft(np.vstack([u, v, w]), 1000)
+        plt.plot(x, y[0])
+    """
+    from scipy import fft as sp_fft
+    x = np.asarray(x)
+    axis = axis % x.ndim
+    Nsamp = x.shape[axis]
+    nfft = sp_fft.next_fast_len(Nsamp, real=True) if pad else Nsamp
+    if window is not None:
+        shape = [1] * x.ndim
+        shape[axis] = Nsamp
+        x = x * _cached_window(window, Nsamp).reshape(shape).astype(x.dtype, copy=False)
+    yFFT = sp_fft.rfft(x, n=nfft, axis=axis)
+    last = [slice(None)] * x.ndim
+    last[axis] = slice(0, -1)
+    amp = np.abs(yFFT[tuple(last)])
+    amp *= 2/Nsamp
+    return _cached_rfftfreq(nfft, fs), amp
+
+WINDOW_LOBE = {None: 1, "hann": 3, "hamming": 3, "blackman": 4, "flattop": 6}  # 성분 진폭 합산 범위 (±bin)
+
+@lru_cache(maxsize=32)
+def _window_enbw(name):
+    # 등가 잡음 대역폭 (bin). _cached_window 는 평균 1 로 정규화되어 있어 mean(w²) 와 같음
+    if name is None:
+        return 1.0
+    return float(np.mean(np.square(_cached_window(name, 4096))))
+
+def calc_harmonics_from_spectrum(fftx, ffty, n_harmonics=10, min_freq=1.0, window=None):
+    """
+    진폭 스펙트럼에서 기본파와 고조파 성분 계산 (행 단위 벡터 연산)
+    기본파 주파수는 최대 피크를 포물선 보간해서 찾고, 1..H 차 성분의 진폭은 보간한 주파수의
+    정수배 위치 ±WINDOW_LOBE bin 의 에너지 합을 윈도우 ENBW 로 나눠서 구합니다.
+    (주파수가 bin 사이에 있어도 누설된 에너지를 모두 더하므로 진폭이 작아지지 않음)
+    fftx: 주파수(1D, 등간격)
+    ffty: 진폭 스펙트럼 (..., 주파수)
+    n_harmonics: 최대 고조파 차수 H
+    min_freq: 기본파 탐색 최소 주파수 (DC 제외용, Hz)
+    window: 스펙트럼에 적용한 윈도우 이름 (calc_batch_fft 와 동일, None 이면 미적용)
+    return: dictionary(
+        'freq': 기본파 주파수 (...)
+        'amp': 기본파 진폭 (...)
+        'thd': THD, 기본파 대비 % (...)
+        'harmonics': 1..H 차 진폭 (..., H). Nyquist 를 넘는 차수는 0
+    )
+    """
+    ffty = np.asarray(ffty)
+    nbin = ffty.shape[-1]
+    if nbin < 3:  # 피크 보간에 필요한 bin 이 없음 (아주 짧은 신호)
+        shape = ffty.shape[:-1]
+        return {"freq": np.full(shape, np.nan), "amp": np.zeros(shape), "thd": np.full(shape, np.nan),
+                "harmonics": np.zeros(shape + (n_harmonics,))}
+    df = fftx[1] - fftx[0]
+    kmin = min(max(int(np.ceil(min_freq/df)), 1), nbin-1)
+
+    k = ffty[..., kmin:].argmax(axis=-1) + kmin
+    # 포물선 보간 (로그 진폭)
+    ka = np.clip(k, 1, nbin-2)
+    a, b, c = (np.log(np.take_along_axis(ffty, (ka+o)[..., None], axis=-1)[..., 0] + 1e-30)
+               for o in (-1, 0, 1))
+    denom = a - 2*b + c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = np.where(denom < 0, 0.5*(a - c)/denom, 0.0)
+    delta = np.clip(delta, -0.5, 0.5)
+    f0 = (ka + delta) * df + fftx[0]
+
+    orders = np.arange(1, n_harmonics+1)
+    lobe = WINDOW_LOBE.get(window, 3)
+    hbin = np.rint((f0[..., None] * orders - fftx[0]) / df).astype(np.int64)  # (..., H)
+    valid = hbin < nbin - 1
+    offsets = np.arange(-lobe, lobe+1)
+    idx = np.clip(hbin[..., None] + offsets, 0, nbin-1)  # (..., H, 2L+1)
+    near = np.take_along_axis(ffty, idx.reshape(idx.shape[:-2] + (-1,)), axis=-1).reshape(idx.shape)
+    energy = np.square(near, dtype=np.float64).sum(axis=-1) / _window_enbw(window)
+    harmonics = np.where(valid, np.sqrt(energy), 0.0)
+
+    amp = harmonics[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        thd = np.sqrt((harmonics[..., 1:]**2).sum(axis=-1)) / amp * 100
+    return {"freq": f0, "amp": amp, "thd": thd, "harmonics": harmonics}
+
+def calc_harmonics(x, fs, n_harmonics=10, axis=-1, window="hann", pad=False):
+    """
+    여러 신호의 기본파/고조파/THD 계산
+    x, fs, axis, pad: calc_batch_fft 와 동일
+    window: 누설 감소용 윈도우 (기본 hann)
+    return: calc_harmonics_from_spectrum 과 동일
+    """
+    fftx, ffty = calc_batch_fft(x, fs, axis=axis, window=window, pad=pad)
+    return calc_harmonics_from_spectrum(fftx, np.moveaxis(ffty, axis, -1), n_harmonics=n_harmonics, window=window)
+
+def calc_batch_spectrum(x, fs, axis=-1, window=None, pad=False, n_harmonics=10):
+    """
+    여러 신호의 주 주파수, 진폭, THD 를 한 번에 계산
+    x, fs, axis, window, pad: calc_batch_fft 와 동일
+    n_harmonics: THD 계산에 사용할 최대 고조파 차수
+    return: dictionary(
+        'fft_x': 주파수(1D)
+        'fft_y': 진폭 스펙트럼 (시간축이 마지막 축으로 이동)
+        'freq': 행별 기본파 주파수 (Hz)
+        'amp': 행별 기본파 진폭
+        'thd': 행별 THD (%)
+        'harmonics': 행별 1..H 차 진폭
+    )
+    """
+    fftx, ffty = calc_batch_fft(x, fs, axis=axis, window=window, pad=pad)
+    ffty = np.moveaxis(ffty, axis, -1)
+    ret = calc_harmonics_from_spectrum(fftx, ffty, n_harmonics=n_harmonics, window=window)
+    ret["fft_x"] = fftx
+    ret["fft_y"] = ffty
+    return ret
+
+SEQ_RUNNING_RATIO = 0.1  # 정상분이 상위 5% 값의 이 비율 이상인 주기만 운전 중으로 보고 요약
+SEQ_F0_BAND = (40.0, 70.0)  # 대칭분을 계산할 기본파 범위 (Hz, 50/60 Hz 계통). 벗어나면 정지/잡음으로 보고 건너뜀
+SEQ_MIN_CYCLE_SAMPLES = 8  # 한 주기의 최소 샘플 수 (이보다 적으면 주기별 맞춤을 하지 않음)
+
+def _cycle_edges(n, fs, f0):
+    # 기본파 한 주기 경계 (주기가 정수 샘플이 아니어도 누적 오차 없이 반올림)
+    # f0 가 SEQ_F0_BAND 밖이거나 주기가 너무 짧으면 주기 없음
+    if not SEQ_F0_BAND[0] <= f0 <= SEQ_F0_BAND[1] or fs / f0 < SEQ_MIN_CYCLE_SAMPLES:
+        return np.zeros(1, dtype=np.int64)
+    period = fs / f0
+    n_cycles = int(n // period)
+    return np.rint(np.arange(n_cycles+1) * period).astype(np.int64)
+
+def calc_cycle_phasors(x, fs, f0, axis=-1):
+    """
+    주기별 기본파 phasor
+    캡처를 기본파 주기 단위로 나누고 (주기 길이가 정수가 아니면 166, 167 샘플처럼 번갈아),
+    주기마다 [1, cos, sin] 최소제곱 맞춤을 np.add.reduceat 과 3x3 정규방정식 한 번으로 풉니다.
+    f0 가 SEQ_F0_BAND 밖이면 (정지, 잡음만 있는 캡처) 주기 수 0 인 어레이를 반환합니다.
+    x: N차원 어레이. ex) (상 x 샘플)
+    fs: 샘플레이트
+    f0: 기본파 주파수 (Hz)
+    axis: 시간축
+    return: complex 어레이 (..., 주기 수). 크기는 peak 진폭, 위상은 캡처 시작 기준 cos 위상
+    """
+    x = np.moveaxis(np.asarray(x), axis, -1)
+    edges = _cycle_edges(x.shape[-1], fs, f0)
+    if edges.size < 2:
+        return np.zeros(x.shape[:-1] + (0,), dtype=np.complex128)
+    n = edges[-1]
+    theta = (2*np.pi*f0/fs) * np.arange(n)
+    c, s = np.cos(theta), np.sin(theta)
+    del theta
+    starts = edges[:-1]
+    length = np.diff(edges).astype(np.float64)
+    sc, ss = np.add.reduceat(c, starts), np.add.reduceat(s, starts)
+    scc, sss, scs = np.add.reduceat(c*c, starts), np.add.reduceat(s*s, starts), np.add.reduceat(c*s, starts)
+    gram = np.stack([np.stack([length, sc, ss], -1),
+                     np.stack([sc, scc, scs], -1),
+                     np.stack([ss, scs, sss], -1)], -2)          # (주기, 3, 3)
+    xs = x[..., :n]
+    rhs = np.stack([np.add.reduceat(xs, starts, axis=-1, dtype=np.float64),
+                    np.add.reduceat(xs*c, starts, axis=-1),
+                    np.add.reduceat(xs*s, starts, axis=-1)], -1)  # (..., 주기, 3)
+    coef = (np.linalg.pinv(gram) @ rhs[..., None])[..., 0]  # 특이 행렬이어도 예외 없이 최소 노름 해
+    return coef[..., 1] - 1j*coef[..., 2]  # a cos + b sin = Re((a - jb) e^{jθ})
+
+def calc_cycle_rms(x, fs, f0, axis=-1):
+    """
+    주기별 RMS (고조파 포함, calc_cycle_phasors 와 같은 주기 구간)
+    return: (..., 주기 수)
+    """
+    x = np.moveaxis(np.asarray(x), axis, -1)
+    edges = _cycle_edges(x.shape[-1], fs, f0)
+    if edges.size < 2:
+        return np.zeros(x.shape[:-1] + (0,))
+    sq = np.add.reduceat(np.square(x[..., :edges[-1]], dtype=np.float64), edges[:-1], axis=-1)
+    return np.sqrt(sq / np.diff(edges))
+
+def calc_sequence_components(u, v, w, fs, f0=None):
+    """
+    주기별 대칭분 (정상/역상/영상) 과 상별 RMS 불평형
+    역상분이 정상분보다 크면 상 순서가 u, w, v 인 것으로 보고 정상/역상을 바꿔서 계산합니다.
+    u, v, w: 상별 1D 어레이
+    fs: 샘플레이트
+    f0: 기본파 주파수 (None 이면 u 의 스펙트럼에서 검출)
+    return: dictionary(
+        'f0': 기본파 주파수
+        'sequence': 상 순서 "uvw" 또는 "uwv"
+        'positive', 'negative', 'zero': 주기별 대칭분 크기 (peak, A)
+        'unbalance': 주기별 역상분/정상분 (%)
+        'zero_ratio': 주기별 영상분/정상분 (%)
+        'rms_imbalance': 주기별 상 RMS 의 평균 대비 최대 편차 (%)
+        'running': 운전 중 주기 bool 어레이 (SEQ_RUNNING_RATIO 기준)
+    )
+    """
+    if f0 is None:
+        f0 = float(calc_harmonics(u, fs)["freq"])
+    uvw = np.vstack([u, v, w])
+    return calc_sequence_from_phasors(calc_cycle_phasors(uvw, fs, f0), calc_cycle_rms(uvw, fs, f0), f0)
+
+def calc_sequence_from_phasors(p, rms, f0):
+    """
+    calc_sequence_components 의 대칭분 계산 부분 (블록별로 구한 주기 값을 이어붙여 쓸 때)
+    p: (3, 주기 수) calc_cycle_phasors 결과
+    rms: (3, 주기 수) calc_cycle_rms 결과
+    return: calc_sequence_components 와 동일
+    """
+    a = np.exp(2j*np.pi/3)
+    zero = np.abs(p.sum(axis=0)) / 3
+    pos = np.abs(p[0] + a*p[1] + a*a*p[2]) / 3
+    neg = np.abs(p[0] + a*a*p[1] + a*p[2]) / 3
+    sequence = "uvw"
+    if pos.size and np.median(neg) > np.median(pos):
+        pos, neg, sequence = neg, pos, "uwv"
+    rms_mean = rms.mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unbalance = neg / pos * 100
+        zero_ratio = zero / pos * 100
+        rms_imbalance = np.abs(rms - rms_mean).max(axis=0) / rms_mean * 100
+    running = pos >= SEQ_RUNNING_RATIO * np.percentile(pos, 95) if pos.size else np.zeros(0, dtype=bool)
+    running &= np.isfinite(unbalance) & np.isfinite(rms_imbalance)
+    return {"f0": f0, "sequence": sequence, "positive": pos, "negative": neg, "zero": zero,
+            "unbalance": unbalance, "zero_ratio": zero_ratio, "rms_imbalance": rms_imbalance,
+            "running": running}
+
+@lru_cache(maxsize=64)
+def _cached_sos(order, cutoff, mode, fs):
+    from scipy.signal import butter
+    # sosfilt 가 쓰기 가능한 버퍼를 요구하므로 읽기 전용으로 막지 않음 (수정하지 말 것)
+    return butter(order, cutoff, btype=mode, fs=fs, output="sos")
 
-def calc_apply_freq_filter(array, fs, cutoff, mode="lowpass", order=4):
+def calc_apply_freq_filter(array, fs, cutoff, mode="lowpass", order=4, axis=-1):
     '''
-    array: 적용할 신호
+    Butterworth 영위상 필터 (sosfiltfilt). 필터 계수는 (order, cutoff, mode, fs) 별로 캐시합니다.
+    array: 적용할 신호. N차원이면 axis 방향으로 모든 행을 한 번에 처리 ex) (파일 x 상 x 샘플)
     fs: 샘플레이트
     cutoff: low/highpass 일경우는 cutoff 주파수(Hz), bandpass/notch 일 경우 리스트([low,high])
     mode: lowpass, highpass, bandpass, bandstop
     order: 필터 차수
+    axis: 시간축
     '''
-    sos = butter(order, cutoff, btype=mode, fs=fs, output="sos")
-    y = sosfiltfilt(sos, array)
+    from scipy.signal import sosfiltfilt
+    if np.ndim(cutoff):
+        cutoff = tuple(float(c) for c in cutoff)
+    sos = _cached_sos(order, cutoff, mode, float(fs))
+    y = sosfiltfilt(sos, array, axis=axis)
     return y
 
 def calc_curveFitting(originalFunc, xdata, ydata, p0=None):
@@ -202,6 +999,7 @@ def calc_curveFitting(originalFunc, xdata, ydata, p0=None):
     p0: 초기 파라미터 추정값. 리스트 형태
     return: 최적 파라미터
     """
+    from scipy.optimize import curve_fit
     popt, _ = curve_fit(originalFunc, xdata, ydata, p0=p0)
     return popt
 
@@ -0,0 +1,369 @@
+"""
+여러 사이트/모터의 캡처별 특징 색인 (이상 모터 선별용)
+run_analysis 결과의 캡처별 지표(ret["captures"]) 또는 HDF5 저장소(exporter)에서
+상간 불평형, THD, P2P, 기본파 주파수 등을 뽑아 컬럼별 numpy 어레이로 보관합니다.
+문자열(사이트, 모터, 파일)은 정수 코드 + 문자열 표로 저장해서 캡처당 수십 바이트 수준이고,
+저장한 색인은 메모리 맵으로 열어 필요한 컬럼만 읽습니다.
+ex)
+    index = FeatureIndex()
+    index.add_result("site1", "motor1", ret, aws_files)
+    index.save("./temp/feature_index")
+    index = FeatureIndex.load("./temp/feature_index")
+    index.rows(index.top_k("imbalance", 20))
+    idx, z = index.outliers("thd_max", by="site")
+"""
+import json
+import os
+
+import numpy as np
+
+FEATURES = ("rms_mean", "rms_std", "p2p", "imbalance", "thd_max", "freq", "amp_mean")
+DERIVED = ("freq_drift",)       # 조회 시 계산 (모터별 주파수 중앙값 대비 편차, Hz)
+CATEGORIES = ("site", "motor", "mac_address", "file", "file_hash")
+DEDUP_KEY = ("site", "motor", "file_hash")  # 같은 캡처를 두 번 넣지 않도록 비교하는 컬럼 (file_hash 가 빈 행은 비교 안 함)
+OUTLIER_Z = 3.5                 # modified z-score 기준 (Iglewicz & Hoaglin)
+INITIAL_CAPACITY = 1024
+
+
+def calc_features(cols):
+    """
+    캡처별 지표 컬럼에서 특징 계산 (벡터 연산)
+    cols: {"rms_mean", "rms_std", "p2p", "rms_u/v/w", "thd_u/v/w", "freq_u/v/w", "amp_u/v/w": 1D 어레이}
+    return: {특징: float32 1D 어레이}
+        imbalance: 상별 RMS 의 평균 대비 최대 편차 (%)
+        thd_max: 세 상 중 최대 THD (%)
+        freq, amp_mean: 세 상 평균 기본파 주파수 (Hz), 진폭 (A)
+    """
+    def stack(name):
+        return np.vstack([np.asarray(cols[f"{name}_{ph}"], dtype=np.float64) for ph in "uvw"])
+
+    rms = stack("rms")
+    rms_avg = rms.mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        imbalance = np.abs(rms - rms_avg).max(axis=0) / rms_avg * 100
+    feats = {
+        "rms_mean": cols["rms_mean"],
+        "rms_std": cols["rms_std"],
+        "p2p": cols["p2p"],
+        "imbalance": imbalance,
+        "thd_max": stack("thd").max(axis=0),
+        "freq": stack("freq").mean(axis=0),
+        "amp_mean": stack("amp").mean(axis=0),
+    }
+    return {k: np.asarray(v, dtype=np.float32) for k, v in feats.items()}
+
+
+def _to_epoch(values):
+    # acq_time (초) -> int64, 없거나 숫자가 아니면 -1
+    try:
+        a = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        a = np.array([float(v) if isinstance(v, (int, float)) else np.nan for v in values])
+    return np.where(np.isfinite(a), a, -1).astype(np.int64)
+
+
+def _group_median(values, codes, n_groups):
+    # 그룹별 중앙값 (정렬 한 번), 값이 없는 그룹은 nan
+    ok = np.isfinite(values)
+    values, codes = values[ok], codes[ok]
+    order = np.lexsort((values, codes))
+    sv, sc = values[order], codes[order]
+    groups = np.arange(n_groups)
+    starts = np.searchsorted(sc, groups, "left")
+    counts = np.searchsorted(sc, groups, "right") - starts
+    lo = np.minimum(starts + (counts-1)//2, max(len(sv)-1, 0))
+    hi = np.minimum(starts + counts//2, max(len(sv)-1, 0))
+    med = np.full(n_groups, np.nan)
+    has = counts > 0
+    med[has] = (sv[lo[has]].astype(np.float64) + sv[hi[has]]) / 2
+    return med
+
+
+class FeatureIndex:
+    """
+    캡처별 특징의 컬럼 저장소
+    컬럼: FEATURES (float32), acq_time (int64), CATEGORIES (int32 코드, 문자열은 self.labels)
+    """
+    def __init__(self):
+        self.n = 0
+        self.cols = {}
+        self.labels = {k: [] for k in CATEGORIES}   # 코드 -> 문자열
+        self._codes = {k: {} for k in CATEGORIES}   # 문자열 -> 코드
+        self._seen = None                            # 이미 넣은 DEDUP_KEY 코드 (처음 추가할 때 만듦)
+
+    # 추가 -------------------------------------------------------------
+
+    def _reserve(self, n_new):
+        need = self.n + n_new
+        cap = len(self.cols["acq_time"]) if self.cols else 0
+        if need <= cap and all(c.flags.writeable for c in self.cols.values()):
+            return
+        cap = max(INITIAL_CAPACITY, cap, need)
+        while cap < need:
+            cap *= 2
+        dtypes = {**{k: np.float32 for k in FEATURES}, "acq_time": np.int64, **{k: np.int32 for k in CATEGORIES}}
+        for k, dtype in dtypes.items():
+            col = np.empty(cap, dtype=dtype)
+            if k in self.cols:
+                col[:self.n] = self.cols[k][:self.n]
+            self.cols[k] = col
+
+    def _encode(self, name, values):
+        # 문자열 어레이 -> 코드 (고유값만 파이썬에서 처리)
+        uniq, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        table = self._codes[name]
+        mapping = np.empty(len(uniq), dtype=np.int32)
+        for i, label in enumerate(uniq.tolist()):
+            code = table.get(label)
+            if code is None:
+                code = table[label] = len(self.labels[name])
+                self.labels[name].append(label)
+            mapping[i] = code
+        return mapping[inverse.reshape(-1)]
+
+    def _new_rows(self, codes):
+        # 이미 들어있거나 이번 배치 안에서 겹치는 (사이트, 모터, 파일 해시) 를 뺀 행 mask
+        blank = self._codes["file_hash"].get("")
+        keep = np.ones(len(codes[DEDUP_KEY[0]]), dtype=bool)
+        if blank is not None and (codes["file_hash"] == blank).all():
+            return keep
+        if self._seen is None:
+            self._seen = set(zip(*(self.column(k).tolist() for k in DEDUP_KEY))) if self.n else set()
+        for i, key in enumerate(zip(*(codes[k].tolist() for k in DEDUP_KEY))):
+            if key[-1] == blank:
+                continue
+            if key in self._seen:
+                keep[i] = False
+            else:
+                self._seen.add(key)
+        return keep
+
+    def append(self, cols, site=None, motor=None):
+        """
+        지표 컬럼 추가. file_hash 가 있는 행은 같은 사이트/모터/파일 해시가 이미 있으면 건너뜁니다.
+        cols: calc_features 입력 컬럼 + 선택 컬럼 acq_time, mac_address, file, file_hash, site, motor
+        site, motor: 모든 행에 같은 값일 때 (cols 에 없으면 사용)
+        return: 추가된 행 수
+        """
+        n = len(cols["rms_mean"])
+        if n == 0:
+            return 0
+        fixed = {"site": site, "motor": motor}
+        codes = {}
+        for k in CATEGORIES:
+            values = cols.get(k)
+            if values is None:
+                values = [fixed.get(k) or ""] * n
+            codes[k] = self._encode(k, ["" if v is None else v for v in values])
+        keep = self._new_rows(codes)
+        if not keep.all():
+            cols = {k: np.asarray(v)[keep] for k, v in cols.items() if v is not None and len(v) == n}
+            codes = {k: v[keep] for k, v in codes.items()}
+            n = int(keep.sum())
+            if n == 0:
+                return 0
+        feats = calc_features(cols)
+        self._reserve(n)
+        sl = slice(self.n, self.n + n)
+        for k in FEATURES:
+            self.cols[k][sl] = feats[k]
+        acq = cols.get("acq_time")
+        self.cols["acq_time"][sl] = -1 if acq is None else _to_epoch(acq)
+        for k in CATEGORIES:
+            self.cols[k][sl] = codes[k]
+        self.n += n
+        return n
+
+    def add_rows(self, rows, site="", motor="", files=None, hashes=None):
+        """
+        calc_capture_metrics 형식의 행 리스트 추가
+        files: 행별 파일 경로 (없으면 빈 문자열)
+        hashes: 행별 파일 내용 해시 (중복 추가 방지용, 없으면 빈 문자열)
+        """
+        if not rows:
+            return 0
+        names = {k for r in rows for k in r}
+        cols = {k: [r.get(k, np.nan) for r in rows] for k in names}
+        cols["acq_time"] = [r.get("acq_time") for r in rows]
+        cols["mac_address"] = [r.get("mac_address") or "" for r in rows]
+        if files is not None and len(files) == len(rows):
+            cols["file"] = list(files)
+        if hashes is not None and len(hashes) == len(rows):
+            cols["file_hash"] = list(hashes)
+        return self.append(cols, site=site, motor=motor)
+
+    def add_result(self, site, motor, ret, aws_files=None, fingerprint=None):
+        """
+        run_analysis 결과의 캡처별 지표 추가
+        aws_files: run_analysis 에 넘긴 파일 목록 (캡처 수와 같을 때만 파일 컬럼에 기록)
+        fingerprint: 파일 해시 함수 (ex. CaptureCache.fingerprint). 지정하면 이미 넣은 캡처는 건너뜀
+        """
+        rows = ret.get("captures") or []
+        hashes = None
+        if fingerprint is not None and aws_files is not None and len(aws_files) == len(rows):
+            hashes = [fingerprint(f) for f in aws_files]
+        return self.add_rows(rows, site=site, motor=motor, files=aws_files, hashes=hashes)
+
+    def add_store(self, store, block=1 << 20):
+        """
+        exporter 의 HDF5 저장소(open_store 결과)에서 블록 단위로 추가
+        """
+        if "captures/rms_mean" not in store:
+            return 0
+        total = store["captures/rms_mean"].shape[0]
+        added = 0
+        for start in range(0, total, block):
+            stop = min(start + block, total)
+            cols = {}
+            for name, dset in store["captures"].items():
+                values = dset[start:stop]
+                if values.dtype.kind in "OS":
+                    values = np.char.decode(values.astype("S"), "utf-8")
+                cols[name] = values
+            added += self.append(cols)
+        return added
+
+    # 조회 -------------------------------------------------------------
+
+    def column(self, name):
+        """
+        return: 컬럼 (길이 n, 복사 없음). DERIVED 특징은 계산해서 반환
+        """
+        if name == "freq_drift":
+            keys, n_groups = self.group_keys("motor")
+            freq = self.column("freq")
+            return (freq - _group_median(freq, keys, n_groups)[keys]).astype(np.float32)
+        return self.cols[name][:self.n]
+
+    def group_keys(self, by):
+        """
+        by: "site" 또는 "motor" (사이트 + 모터)
+        return: 행별 그룹 번호, 그룹 수
+        """
+        if by == "site":
+            return self.column("site"), len(self.labels["site"])
+        if by != "motor":
+            raise ValueError(f"지원하지 않는 그룹: {by}")
+        pair = self.column("site").astype(np.int64) * max(len(self.labels["motor"]), 1) + self.column("motor")
+        uniq, keys = np.unique(pair, return_inverse=True)
+        return keys.reshape(-1), len(uniq)
+
+    def top_k(self, feature, k=10, largest=True, mask=None, absolute=False):
+        """
+        특징값 상위 k 개 캡처 (argpartition 후 k 개만 정렬)
+        mask: 대상 행 bool 어레이 (ex. index.column("site") == code)
+        absolute: 절대값 기준 (freq_drift 등)
+        return: 행 번호 어레이 (나쁜 순)
+        """
+        values = self.column(feature).astype(np.float64)
+        if absolute:
+            values = np.abs(values)
+        score = values if largest else -values
+        score = np.where(np.isfinite(score), score, -np.inf)
+        rows = np.arange(self.n)
+        if mask is not None:
+            rows, score = rows[mask], score[mask]
+        k = min(k, len(rows))
+        if k == 0:
+            return rows[:0]
+        part = np.argpartition(score, len(score)-k)[len(score)-k:]
+        return rows[part[np.argsort(score[part])[::-1]]]
+
+    def outliers(self, feature, by="site", threshold=OUTLIER_Z):
+        """
+        그룹 기준선 대비 이상 캡처 (modified z-score = 0.6745 (x - 중앙값) / MAD)
+        MAD 가 0 인 그룹은 평균 절대 편차 x 1.2533 을 사용합니다.
+        by: "site" 또는 "motor"
+        return: (|z| 가 큰 순의 행 번호, 전체 z 어레이)
+        """
+        x = self.column(feature).astype(np.float64)
+        keys, n_groups = self.group_keys(by)
+        med = _group_median(x, keys, n_groups)
+        dev = np.abs(x - med[keys])
+        mad = _group_median(dev, keys, n_groups)
+        ok = np.isfinite(dev)
+        counts = np.bincount(keys[ok], minlength=n_groups)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_ad = np.bincount(keys[ok], weights=dev[ok], minlength=n_groups) / counts
+            scale = np.where(mad > 0, mad / 0.6745, mean_ad * 1.2533)
+            z = (x - med[keys]) / scale[keys]
+        z[~np.isfinite(z)] = 0.0
+        rows = np.flatnonzero(np.abs(z) > threshold)
+        return rows[np.argsort(-np.abs(z[rows]))], z
+
+    def rank_motors(self, feature, k=10, stat="median", absolute=False):
+        """
+        모터별 특징 통계 상위 k 개
+        stat: "median", "mean", "max"
+        return: [{"site", "motor", "captures", feature}, ...] (나쁜 순)
+        """
+        x = self.column(feature).astype(np.float64)
+        if absolute:
+            x = np.abs(x)
+        keys, n_groups = self.group_keys("motor")
+        ok = np.isfinite(x)
+        counts = np.bincount(keys[ok], minlength=n_groups)
+        if stat == "median":
+            value = _group_median(x, keys, n_groups)
+        elif stat == "mean":
+            with np.errstate(invalid="ignore"):
+                value = np.bincount(keys[ok], weights=x[ok], minlength=n_groups) / counts
+        elif stat == "max":
+            value = np.full(n_groups, -np.inf)
+            np.maximum.at(value, keys[ok], x[ok])
+        else:
+            raise ValueError(f"지원하지 않는 통계: {stat}")
+        value = np.where(counts > 0, value, -np.inf)
+        top = np.argsort(-value)[:k]
+        first = np.unique(keys, return_index=True)[1]  # 그룹별 첫 행
+        site, motor = self.column("site"), self.column("motor")
+        return [{"site": self.labels["site"][site[first[g]]], "motor": self.labels["motor"][motor[first[g]]],
+                 "captures": int(counts[g]), feature: float(value[g])} for g in top if np.isfinite(value[g])]
+
+    def rows(self, indices, features=FEATURES + DERIVED):
+        """
+        행 번호 -> 출력용 dictionary 리스트
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        values = {k: self.column(k)[indices] for k in features}
+        cats = {k: self.column(k)[indices] for k in CATEGORIES}
+        acq = self.column("acq_time")[indices]
+        out = []
+        for j, i in enumerate(indices.tolist()):
+            row = {"row": i, **{k: self.labels[k][int(cats[k][j])] for k in CATEGORIES}}
+            row["acq_time"] = int(acq[j]) if acq[j] >= 0 else None
+            row.update({k: round(float(values[k][j]), 4) for k in features})
+            out.append(row)
+        return out
+
+    # 저장 -------------------------------------------------------------
+
+    def save(self, folder):
+        """
+        컬럼별 .npy + labels.json 으로 저장
+        """
+        os.makedirs(folder, exist_ok=True)
+        for k in self.cols:
+            np.save(os.path.join(folder, f"{k}.npy"), self.cols[k][:self.n])
+        with open(os.path.join(folder, "labels.json"), "w", encoding="utf-8") as f:
+            json.dump({"n": self.n, "labels": self.labels}, f, ensure_ascii=False)
+        return folder
+
+    @classmethod
+    def load(cls, folder, mmap=True):
+        """
+        mmap: True 이면 컬럼을 메모리 맵으로 열어 조회하는 컬럼만 읽음 (추가 시 복사)
+        """
+        index = cls()
+        with open(os.path.join(folder, "labels.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index.n = meta["n"]
+        index.labels = {k: list(meta["labels"].get(k, [])) for k in CATEGORIES}
+        index._codes = {k: {label: i for i, label in enumerate(v)} for k, v in index.labels.items()}
+        for k in FEATURES + ("acq_time",) + CATEGORIES:
+            path = os.path.join(folder, f"{k}.npy")
+            if not os.path.exists(path):  # 이전 형식 (file_hash 없음)
+                index.cols[k] = np.full(index.n, index._encode(k, [""])[0], dtype=np.int32)
+                continue
+            index.cols[k] = np.load(path, mmap_mode="r" if mmap and index.n else None)
+        return index
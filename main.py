@@ -1,7 +1,10 @@
+import time
+STARTUP_T0 = time.perf_counter()  # 시작 시간 측정 기준 (다른 import 보다 먼저)
+
 from utils import initialize, save_conf, is_valid_path
-from ppt_maker import make_ppt
 import os
-import time
+import threading
+import copy
 
 import sys
 from PySide6.QtWidgets import (
@@ -9,8 +12,68 @@ from PySide6.QtWidgets import (
     QMessageBox, QFrame, QStatusBar,
     QProgressBar)
 from PySide6.QtGui import QIcon, QPixmap, QPalette, QColor
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
 from functools import partial
 
+# 분석 모듈(ppt_maker -> analyze -> numpy/scipy/matplotlib/python-pptx)은 로딩에 수 초가 걸리므로
+# 창을 먼저 띄우고 백그라운드 스레드에서 미리 로딩합니다 (warm_up).
+WARMUP_DELAY_MS = 300
+# 1 이면 창이 처음 그려진 뒤 시작 시간을 출력하고 종료 (benchmark.py startup 시나리오)
+STARTUP_EXIT = os.environ.get("FA_STARTUP_EXIT", "0") == "1"
+
+
+def warm_up():
+    """
+    보고서 생성에 필요한 모듈을 백그라운드 스레드에서 미리 로딩
+    로딩 중에 결과 생성을 누르면 ReportWorker 의 import 가 로딩이 끝날 때까지 기다립니다.
+    """
+    def load():
+        import ppt_maker  # noqa: F401
+        import scipy.fft, scipy.signal  # noqa: F401 (fe_tools 에서 처음 사용할 때 로딩되는 모듈)
+    threading.Thread(target=load, name="warm-up", daemon=True).start()
+
+
+class ReportWorker(QObject):
+    """
+    백그라운드 스레드에서 make_ppt 를 실행하고 진행 상황을 시그널로 전달합니다.
+    """
+    progress = Signal(int, int)   # 완료 개수, 전체 개수
+    status = Signal(str)
+    finished = Signal(str)        # 결과 파일 경로
+    failed = Signal(str)
+    cancelled = Signal()
+
+    def __init__(self, conf, save_dir):
+        super().__init__()
+        self.conf = conf
+        self.save_dir = save_dir
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @Slot()
+    def run(self):
+        try:
+            if "ppt_maker" not in sys.modules:
+                self.status.emit("분석 모듈 로딩중..")
+            import ppt_maker
+        except Exception as e:
+            self.failed.emit(f"{type(e).__name__}: {e}")
+            return
+        try:
+            result_path = ppt_maker.make_ppt(conf=self.conf, save_dir=self.save_dir,
+                                             progress=self.progress.emit,
+                                             status=self.status.emit,
+                                             should_cancel=self._cancel.is_set)
+        except ppt_maker.ReportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(f"{type(e).__name__}: {e}")
+        else:
+            self.finished.emit(result_path)
+
+
 class MyWindow(QMainWindow):
 
     def __init__(self):
@@ -123,14 +186,26 @@ class MyWindow(QMainWindow):
         self.path_input = path_input
 
         #실행 버튼
+        row_layout = QHBoxLayout()
         result_button = QPushButton("결과 생성", self)
         result_button.clicked.connect(self.generate_result)
-        main_layout.addWidget(result_button)
+        row_layout.addWidget(result_button)
+        self.result_button = result_button
+
+        cancel_button = QPushButton("취소", self)
+        cancel_button.clicked.connect(self.cancel_result)
+        cancel_button.hide()
+        row_layout.addWidget(cancel_button)
+        self.cancel_button = cancel_button
+        main_layout.addLayout(row_layout)
         
         self.progress_bar = QProgressBar(self)
         self.progress_bar.setValue(0)
         self.progress_bar.hide()
         main_layout.addWidget(self.progress_bar)
+
+        self.report_thread = None
+        self.report_worker = None
         
     def on_text_changed(self, text, name):
         self.conf[name] = text
@@ -157,25 +232,37 @@ class MyWindow(QMainWindow):
         self.status_bar.showMessage("설정정보가 저장되었습니다.")
 
     def generate_result(self):
+        if self.report_thread is not None:
+            return
         dir_path = self.path_input.text()
         if is_valid_path(dir_path):
+            self.progress_bar.setValue(0)
             self.progress_bar.show()
                 
             self.conf['result_dir'] = dir_path
             self.update_conf()
             self.status_bar.showMessage("결과 리포트를 생성중입니다.")
-            result_path = make_ppt(conf=self.conf, save_dir=dir_path, 
-                                   progressbar=self.progress_bar,
-                                   statusbar = self.status_bar)
-            
-            self.progress_bar.hide()
 
-            popup = QMessageBox()
-            popup.setWindowTitle("생성 완료!")
-            popup.setText(f"파일 생성 완료!: {result_path}")
-            popup.setWindowIcon(QIcon(self.icon_path))
-            popup.setIconPixmap(QPixmap(self.icon_path))
-            popup.exec()
+            # 보고서 생성은 백그라운드 스레드에서 실행 (화면 멈춤 방지)
+            thread = QThread(self)
+            worker = ReportWorker(conf=copy.deepcopy(self.conf), save_dir=dir_path)
+            worker.moveToThread(thread)
+            thread.started.connect(worker.run)
+            worker.progress.connect(self.on_report_progress)
+            worker.status.connect(self.status_bar.showMessage)
+            worker.finished.connect(self.on_report_finished)
+            worker.failed.connect(self.on_report_failed)
+            worker.cancelled.connect(self.on_report_cancelled)
+            for sig in (worker.finished, worker.failed, worker.cancelled):
+                sig.connect(thread.quit)
+            thread.finished.connect(self.on_report_thread_finished)
+            self.report_thread = thread
+            self.report_worker = worker
+
+            self.result_button.setEnabled(False)
+            self.cancel_button.setEnabled(True)
+            self.cancel_button.show()
+            thread.start()
         else:
             popup = QMessageBox()
             popup.setWindowTitle("경로 에러")
@@ -185,8 +272,65 @@ class MyWindow(QMainWindow):
             popup.exec()
             self.status_bar.showMessage("")
 
+    def cancel_result(self):
+        if self.report_worker is not None:
+            self.report_worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.status_bar.showMessage("취소 요청됨. 진행중인 분석을 정리하는 중..")
+
+    def on_report_progress(self, done, total):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+
+    def on_report_finished(self, result_path):
+        popup = QMessageBox()
+        popup.setWindowTitle("생성 완료!")
+        popup.setText(f"파일 생성 완료!: {result_path}")
+        popup.setWindowIcon(QIcon(self.icon_path))
+        popup.setIconPixmap(QPixmap(self.icon_path))
+        popup.exec()
+
+    def on_report_failed(self, message):
+        self.status_bar.showMessage("결과 리포트 생성 실패")
+        popup = QMessageBox()
+        popup.setWindowTitle("생성 실패")
+        popup.setText(f"결과 리포트 생성 중 오류가 발생했습니다.\n{message}")
+        popup.setWindowIcon(QIcon(self.icon_path))
+        popup.exec()
+
+    def on_report_cancelled(self):
+        self.status_bar.showMessage("결과 리포트 생성이 취소되었습니다.")
+
+    def on_report_thread_finished(self):
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+        self.result_button.setEnabled(True)
+        self.report_worker.deleteLater()
+        self.report_thread.deleteLater()
+        self.report_worker = None
+        self.report_thread = None
+
+    def on_startup_done(self):
+        # 첫 이벤트 루프 (창이 그려진 뒤) 에서 호출
+        elapsed = time.perf_counter() - STARTUP_T0
+        if STARTUP_EXIT:
+            print(f"startup {elapsed:.3f}s")
+            QApplication.quit()
+            return
+        self.status_bar.showMessage(f"준비 완료 ({elapsed:.2f}초)")
+        QTimer.singleShot(WARMUP_DELAY_MS, warm_up)
+
+    def closeEvent(self, event):
+        # 창을 닫을 때 진행 중인 보고서 생성을 중단
+        if self.report_thread is not None:
+            self.report_worker.cancel()
+            self.report_thread.quit()
+            self.report_thread.wait()
+        super().closeEvent(event)
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MyWindow()
     window.show()
+    QTimer.singleShot(0, window.on_startup_done)
     sys.exit(app.exec())
@@ -0,0 +1,148 @@
+"""
+보고서 그림 렌더링
+pyplot 상태 머신 대신 Agg 캔버스에 그림 템플릿을 한 번 만들어 두고,
+모터마다 선 데이터만 바꿔서 저장합니다. 템플릿은 스레드별로 따로 만들어지므로
+워커 프로세스/스레드에서 사용해도 안전합니다.
+"""
+import io
+import threading
+
+import numpy as np
+import profiling
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+MAX_POINTS = 4000  # 선 하나에 그리는 최대 점 수 (min/max 포락선 decimation)
+DPI = 100
+
+PHASE_STYLES = (("r", "R"), ("b", "S"), ("k", "T"))
+
+_local = threading.local()
+
+
+def decimate_minmax(t, y, max_points=MAX_POINTS):
+    """
+    구간별 최소/최대값만 남겨 점 수를 줄입니다 (피크가 사라지지 않음).
+    t: x축 1D 어레이
+    y: 1D 어레이
+    max_points: 최대 점 수
+    return: t, y (최대 max_points 개)
+    """
+    n = len(y)
+    n_bins = max_points // 2
+    if n <= max_points or n_bins == 0:
+        return t, y
+    k = -(-n // n_bins)  # ceil
+    pad = n_bins*k - n
+    yb = np.pad(np.asarray(y), (0, pad), mode="edge").reshape(n_bins, k)
+    base = np.arange(n_bins) * k
+    imin = yb.argmin(axis=1)
+    imax = yb.argmax(axis=1)
+    idx = np.stack([np.minimum(imin, imax), np.maximum(imin, imax)], axis=1) + base[:, None]
+    idx = np.minimum(idx.ravel(), n-1)
+    return np.asarray(t)[idx], np.asarray(y)[idx]
+
+
+class _Template:
+    """
+    축 하나와 고정된 선들로 이루어진 그림 템플릿
+    """
+    def __init__(self, figsize, styles, xlabel=None, ylabel=None, legend=True, margins=None):
+        self.fig = Figure(figsize=figsize, dpi=DPI)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        self.lines = [self.ax.plot([], [], color, label=label, **kw)[0] for color, label, kw in styles]
+        if xlabel:
+            self.ax.set_xlabel(xlabel)
+        if ylabel:
+            self.ax.set_ylabel(ylabel)
+        if legend:
+            self.ax.legend(loc="upper right")
+        self.ax.grid()
+        self.title = self.ax.set_title("")
+        # tight_layout 을 매번 하지 않도록 여백 고정
+        self.fig.subplots_adjust(**(margins or dict(left=0.11, right=0.97, bottom=0.16, top=0.9)))
+
+    def update(self, xs, ys, title="", xlim=None):
+        with profiling.stage("plot.update"):
+            self._update(xs, ys, title, xlim)
+
+    def _update(self, xs, ys, title, xlim):
+        for line, x, y in zip(self.lines, xs, ys):
+            line.set_data(*decimate_minmax(x, y))
+        self.title.set_text(title)
+        self.ax.set_autoscale_on(True)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        if xlim is not None:
+            self.ax.set_xlim(xlim)
+
+    def save(self, fname=None):
+        """
+        fname: 저장 경로. None 이면 메모리(BytesIO)에 png 로 저장
+        return: fname 또는 BytesIO
+        """
+        out = io.BytesIO() if fname is None else fname
+        with profiling.stage("plot.render"):
+            self.fig.savefig(out, format="png", dpi=DPI)
+        if fname is None:
+            out.seek(0)
+        return out
+
+
+def _templates():
+    # 스레드별 템플릿 (최초 호출 시 생성)
+    tpl = getattr(_local, "templates", None)
+    if tpl is None:
+        wave_styles = [(c, l, {}) for c, l in PHASE_STYLES] + [("g", "RMS-A", {"lw": 4})]
+        fft_styles = [(c, l, {"alpha": 0.3}) for c, l in PHASE_STYLES] + [("g", "RMS-A", {"alpha": 0.3, "lw": 4})]
+        tpl = {
+            "wave": _Template((6, 3), wave_styles, "seconds (s)", "current (A)"),
+            "fft": _Template((6, 3), fft_styles, "freq (Hz)", "current (A)"),
+            "p2p": _Template((2, 1), wave_styles, legend=False,
+                             margins=dict(left=0.2, right=0.95, bottom=0.25, top=0.95)),
+        }
+        _local.templates = tpl
+    return tpl
+
+
+def plot_waveform(snap, fname=None, title=None):
+    """
+    R/S/T 상 전류와 RMS-A 파형 그림 저장
+    snap: {"t": 1D, "uvw": [u, v, w], "rms": 1D, "acq_time": ...}
+    fname: 저장 경로 (None 이면 BytesIO 반환)
+    title: 그림 제목 (None 이면 acq_time)
+    return: fname 또는 BytesIO
+    """
+    tpl = _templates()["wave"]
+    t = snap["t"]
+    tpl.update([t]*4, list(snap["uvw"]) + [snap["rms"]],
+               title=str(snap["acq_time"]) if title is None else title)
+    return tpl.save(fname)
+
+
+def plot_p2p(snap, fname=None):
+    """
+    순간 최대 변동폭 작은 그림 저장 (축 라벨/범례 없음)
+    """
+    tpl = _templates()["p2p"]
+    t = snap["t"]
+    tpl.update([t]*4, list(snap["uvw"]) + [snap["rms"]])
+    return tpl.save(fname)
+
+
+def plot_fft(fftx, ffty, fname=None, xlim=None):
+    """
+    R/S/T 상과 RMS-A 스펙트럼 그림 저장
+    fftx: 주파수 1D
+    ffty: [u, v, w, rms] 스펙트럼 (4 x 주파수)
+    xlim: 표시 구간 [min, max]. 구간 밖 데이터는 그리지 않습니다.
+    """
+    tpl = _templates()["fft"]
+    if xlim is not None:
+        lo, hi = np.searchsorted(fftx, xlim)
+        sl = slice(max(lo-1, 0), hi+1)
+        fftx = fftx[sl]
+        ffty = [y[sl] for y in ffty]
+    tpl.update([fftx]*4, list(ffty), xlim=xlim)
+    return tpl.save(fname)
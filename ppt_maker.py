@@ -1,162 +1,519 @@
 from collections import abc
 from pptx import Presentation
+from pptx.opc.packuri import PackURI
 from pptx.util import Cm, Pt, Mm, Inches
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
-from analyze import run_analysis, ALGORITHM_VER
+from analyze import run_analysis, analysis_mode, ALGORITHM_VER, BASE_PICTURE
+import cache
+import profiling
+import glob
+import json
 import os
-from PySide6.QtWidgets import QProgressBar, QStatusBar
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
 
-def make_ppt(conf, save_dir: str = None, progressbar:QProgressBar=None, statusbar:QStatusBar=None):
+CANCEL_POLL = 0.2  # 분석 대기 중 취소 요청 확인 주기 (초)
+HEAD_SLIDES = 2       # 표지, 대상 모터 목록
+SLIDES_PER_MOTOR = 2  # 운전신호, 기타 신호
+REPORT_META_VER = 1   # 증분 생성용 문서 속성(comments) 형식 버전
+
+
+class ReportCancelled(Exception):
+    """보고서 생성이 사용자 요청으로 중단됨"""
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+def _init_worker(cache_settings=None):
+    # 그림은 plotter 의 Agg 캔버스로 저장하므로 백엔드 설정은 필요 없음
+    if cache_settings is not None:
+        cache.configure(**cache_settings)
+
+
+def _analysis_job(cache_settings, motor_name, aws_files, profile):
+    # 프로세스 풀 작업. 풀을 여러 사이트가 공유하므로 제출한 사이트의 캐시 설정으로 분석
+    with cache.use_settings(cache_settings):
+        return run_analysis(motor_name=motor_name, aws_files=aws_files, profile=profile)
+
+
+def _add_harmonic_table(slide, table, left, top, width):
+    """
+    고조파 표 추가
+    table: run_analysis 결과의 harmonic_table
+        {"orders": [2, 3, ...], "rows": [[상, THD(%), [차수별 %, ...]], ...]}
+    """
+    orders = table["orders"]
+    rows = table["rows"]
+    shape = slide.shapes.add_table(len(rows)+1, len(orders)+2, left, top, width, Cm(0.5)*(len(rows)+1))
+    cells = shape.table
+    header = ["상", "THD (%)"] + [f"H{o} (%)" for o in orders]
+    values = [header] + [[label, f"{thd:.2f}"] + [f"{h:.2f}" for h in hs] for label, thd, hs in rows]
+    for r, row in enumerate(values):
+        cells.rows[r].height = Cm(0.5)
+        for c, text in enumerate(row):
+            cell = cells.cell(r, c)
+            cell.text = text
+            cell.margin_top = cell.margin_bottom = Cm(0.05)
+            p = cell.text_frame.paragraphs[0]
+            p.font.size = Pt(8)
+            p.alignment = PP_ALIGN.CENTER
+    return shape
+
+
+def make_executor(workers: int = None):
+    """
+    분석용 프로세스 풀 생성 (여러 make_ppt 호출이 공유할 때 사용)
+    workers: 프로세스 수 (None: CPU 코어 수)
+    """
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                               initializer=_init_worker, initargs=(cache.get_settings(),))
+
+
+def iter_analysis(m_set: list, workers: int = None, progress=None, result_cache=None, executor=None,
+                  should_cancel=None, profile=None):
+    """
+    모터별 run_analysis 를 프로세스 풀에 분산 실행하고 결과를 모터 순서대로 반환합니다.
+    앞 모터의 결과가 도착하는 즉시 yield 하므로 슬라이드 조립을 바로 시작할 수 있습니다.
+    result_cache 에 같은 입력(파일 내용 + 알고리즘 버전 + 분석 방식)의 결과가 있으면 분석을 건너뜁니다.
+    m_set: [{"name": str, "data": [path, ...]}, ...]
+    workers: 프로세스 수 (None: CPU 코어 수, 1 이하: 현재 프로세스에서 순차 실행)
+    progress: progress(완료 개수, 전체 개수, 모터명) 콜백
+    result_cache: cache.ResultCache (None 이면 항상 분석)
+    executor: 여러 사이트가 공유할 프로세스 풀 (지정 시 workers 무시)
+    should_cancel: True 를 반환하면 남은 분석을 취소하고 ReportCancelled 발생
+    profile: run_analysis 에 넘길 profiling mode. 분석 측정값은 현재 Recorder 에 합쳐집니다.
+    return: (index, ret) 제너레이터
+    """
+    total = len(m_set)
+    keys = [None] * total
+    cached = [None] * total
+    if result_cache is not None:
+        with profiling.stage("ppt.result_cache_load"):
+            for i, m in enumerate(m_set):
+                keys[i] = result_cache.make_key(m["data"], ALGORITHM_VER, analysis_mode())
+                cached[i] = result_cache.load(keys[i], m["name"])
+    misses = [i for i in range(total) if cached[i] is None]
+
+    pool = executor
+    futures = {}
+    if misses and pool is None and not (workers is not None and workers <= 1):
+        pool = make_executor(min(workers or os.cpu_count() or 1, len(misses)))
+    if misses and pool is not None:
+        cache_settings = cache.get_settings()
+        futures = {i: pool.submit(_analysis_job, cache_settings, m_set[i]["name"], m_set[i]["data"], profile)
+                   for i in misses}
+    should_cancel = should_cancel or (lambda: False)
+    finished = False
+    try:
+        for i, m in enumerate(m_set):
+            if should_cancel():
+                raise ReportCancelled()
+            ret = cached[i]
+            if ret is None:
+                if pool is not None:
+                    with profiling.stage("ppt.wait_analysis"):
+                        while not futures[i].done():
+                            if should_cancel():
+                                raise ReportCancelled()
+                            wait([futures[i]], timeout=CANCEL_POLL)
+                    ret = futures[i].result()
+                else:
+                    ret = run_analysis(motor_name=m["name"], aws_files=m["data"], profile=profile)
+                profiling.current().merge(ret.pop("profile", None))
+                if result_cache is not None:
+                    with profiling.stage("ppt.result_cache_store"):
+                        result_cache.store(keys[i], ret, ALGORITHM_VER, base_picture=BASE_PICTURE)
+            if progress is not None:
+                progress(i+1, total, m["name"])
+            yield i, ret
+        finished = True
+    finally:
+        if pool is not None and pool is not executor:
+            # 취소/오류 시에는 실행 중인 분석을 기다리지 않음
+            pool.shutdown(wait=finished, cancel_futures=True)
+        for fut in futures.values():
+            fut.cancel()
+
+
+def make_ppt(conf, save_dir: str = None, progress=None, status=None, should_cancel=None,
+             workers: int = None, executor=None, incremental: bool = None):
+    """
+    분석 보고서 pptx 생성
+    단계별 측정값은 profiling.report_path(저장 경로) 에 json 으로 저장되고,
+    마지막 상태 메시지에 요약이 표시됩니다.
+    증분 생성 시에는 이전 보고서를 열어 표지와 모터 목록만 고치고, 입력 파일(내용)이 바뀐
+    모터의 슬라이드만 다시 만듭니다. 모터별 입력 키는 문서 속성(comments)에 저장됩니다.
+    conf: 설정 dictionary (data/config.json 형식). conf['profile'] 로 cProfile/tracemalloc 사용
+    save_dir: 저장 폴더 (None 이면 현재 폴더)
+    progress: progress(완료 개수, 전체 개수) 콜백
+    status: status(메시지) 콜백
+    should_cancel: True 를 반환하면 다음 모터부터 중단하고 ReportCancelled 발생
+    workers: 분석 프로세스 수 (None 이면 conf['workers'])
+    executor: 외부에서 만든 프로세스 풀 (배치 실행 시 사이트 간 공유)
+    incremental: 이전 보고서 재사용 (None 이면 conf['incremental'], 이전 보고서는 find_previous_report)
+    return: 저장된 pptx 경로
+    """
+    status = status or _noop
     if save_dir is None:
         save_path = f"./{conf['site']}_구축신호_분석_보고서_{conf['date']}.pptx"
     else:
         save_path = os.path.join(save_dir, f"{conf['site']}_구축신호_분석_보고서_{conf['date']}.pptx")
-    # 프레젠테이션
-    statusbar.showMessage(f"ppt 초기화")
+    # 캐시 설정은 이 스레드에만 적용 (여러 사이트를 스레드로 동시에 처리할 수 있음)
+    with profiling.collect(conf.get("profile")) as rec, cache.use_settings(cache.settings_from_conf(conf)):
+        if incremental is None:
+            incremental = conf.get("incremental", False)
+        message = _make_ppt(conf, save_path, progress, status, should_cancel, workers, executor, rec.mode,
+                            incremental)
+    profiling.write_report(rec, profiling.report_path(save_path),
+                           extra={"site": conf.get("site"), "output": os.path.abspath(save_path)})
+    status(f"{message} | {profiling.format_summary(rec)}")
+    return save_path
+
+
+def _new_presentation():
     prs = Presentation()
     prs.slide_width = Cm(33.87)
     prs.slide_height = Cm(19.05)
+    return prs
+
 
+def _add_title_slide(prs, conf):
     front_layout = prs.slide_layouts[6]
     slide = prs.slides.add_slide(front_layout)
     txBox = slide.shapes.add_textbox(Cm(6.14), Cm(
         3.39), Cm(21.59), Cm(4.08))  # left, top, width, height
-    tf = txBox.text_frame
-    p = tf.paragraphs[0]
-    p.text = f"{conf['site']} \n구축 신호 분석 보고서"
+    p = txBox.text_frame.paragraphs[0]
     p.font.size = Pt(44)
     p.font.bold = True
     p.alignment = PP_ALIGN.CENTER
 
     txBox = slide.shapes.add_textbox(Cm(6.14), Cm(
         10.8), Cm(21.59), Cm(4.08))  # left, top, width, height
-    tf = txBox.text_frame
-    p = tf.paragraphs[0]
-    p.text = f"구축 엔지니어: {conf['engineer']}\n분석일: {conf['date']}\n분석 알고리즘 버전: {ALGORITHM_VER}"
+    p = txBox.text_frame.paragraphs[0]
     p.font.size = Pt(30)
     p.font.bold = True
     p.alignment = PP_ALIGN.CENTER
     p.font.color.rgb = RGBColor(108, 110, 105)
+    _set_title_text(slide, conf)
+    return slide
 
+
+def _set_title_text(slide, conf):
+    # 표지 글자만 교체 (글꼴은 문단 기본값이라 유지됨)
+    title, info = slide.shapes[0], slide.shapes[1]
+    title.text_frame.paragraphs[0].text = f"{conf['site']} \n구축 신호 분석 보고서"
+    info.text_frame.paragraphs[0].text = \
+        f"구축 엔지니어: {conf['engineer']}\n분석일: {conf['date']}\n분석 알고리즘 버전: {ALGORITHM_VER}"
+
+
+def _add_motor_list_slide(prs, m_set):
     list_layout = prs.slide_layouts[1]
     slide = prs.slides.add_slide(list_layout)
     title = slide.placeholders[0]
     title.text = "대상 모터 목록"
-    body_shape = slide.placeholders[1]
-    tf = body_shape.text_frame
-    m_set = []
-    for m in conf["motor_set"]:
-        if (m["name"] in [None, ""]) or len(m['data']) == 0:
-            continue
-        m_set.append(m)
+    _set_motor_list(slide, m_set)
+    return slide
+
 
+def _set_motor_list(slide, m_set):
+    tf = slide.placeholders[1].text_frame
+    tf.clear()
     for m in m_set:
         p = tf.add_paragraph()
         p.text = m["name"]
         p.font.size = Pt(20)
         p.font.bold = True
 
+
+def _add_motor_slides(prs, m, ret):
+    """
+    모터 하나의 분석 슬라이드 (운전신호, 기타 신호) 추가
+    return: 추가된 슬라이드 리스트 (SLIDES_PER_MOTOR 개)
+    """
+    slides = []
+    # 메인 분석 페이지 추가
+    report_layout = prs.slide_layouts[6]
+    slide = prs.slides.add_slide(report_layout)
+    slides.append(slide)
+
+    # 상단 제목
+    txBox = slide.shapes.add_textbox(Cm(2.33), Cm(
+        1), Cm(29), Cm(1.5))  # left, top, width, height
+    tf = txBox.text_frame
+    p = tf.paragraphs[0]
+    p.text = f"{m['name']} 신호 분석 - 운전신호"
+    p.font.size = Pt(20)
+    p.font.bold = True
+
+    # 운전신호
+    tf = slide.shapes.add_textbox(left=Cm(7.85), top=Cm(
+        2.5), width=Cm(2.62), height=Cm(0.85)).text_frame
+    p = tf.paragraphs[0]
+    p.text = "운전신호 (RST 상)"
+    p.alignment = PP_ALIGN.CENTER
+    p.font.size = Pt(14)
+    pic = slide.shapes.add_picture(
+        ret["driving_rst_pic"], left=Cm(2.33), top=Cm(3.36), width=Cm(13.67))
+
+    # FFT 분석
+    tf = slide.shapes.add_textbox(left=Cm(23.54), top=Cm(
+        2.5), width=Cm(2.62), height=Cm(0.85)).text_frame
+    p = tf.paragraphs[0]
+    p.text = "FFT 분석"
+    p.alignment = PP_ALIGN.CENTER
+    p.font.size = Pt(14)
+    pic = slide.shapes.add_picture(
+        ret["driving_fft_pic"], left=Cm(17.87), top=Cm(3.36), width=Cm(13.67))
+
+    # 텍스트
+    tf = slide.shapes.add_textbox(left=Cm(2.33), top=Cm(
+        10.65), width=Cm(21.22), height=Cm(4.5)).text_frame
+    p = tf.paragraphs[0]
+    p.text = ret["driving_text"]
+    p.font.size = Pt(10)
+
+    # 고조파 표
+    if ret.get("harmonic_table"):
+        _add_harmonic_table(slide, ret["harmonic_table"], left=Cm(2.33), top=Cm(15.6), width=Cm(21.22))
+
+    # 순간 최대 변동폭 (RMS-A)
+    tf = slide.shapes.add_textbox(left=Cm(26.55), top=Cm(
+        10.65), width=Cm(3.12), height=Cm(0.85)).text_frame
+    p = tf.paragraphs[0]
+    p.text = "순간 최대 변동폭 (RMS-A)"
+    p.alignment = PP_ALIGN.CENTER
+    p.font.size = Pt(14)
+    pic = slide.shapes.add_picture(
+        ret["driving_p2p_max_pic"], left=Cm(24.67), top=Cm(11.5), width=Cm(6.87))
+
+    # 추가 분석 페이지 추가
+    report_layout = prs.slide_layouts[6]
+    slide = prs.slides.add_slide(report_layout)
+    slides.append(slide)
+
+    # 상단 제목
+    txBox = slide.shapes.add_textbox(Cm(2.33), Cm(
+        1), Cm(29), Cm(1.5))  # left, top, width, height
+    tf = txBox.text_frame
+    p = tf.paragraphs[0]
+    p.text = f"{m['name']} 신호 분석 - 기타 신호"
+    p.font.size = Pt(20)
+    p.font.bold = True
+
+    # 기동 순간 신호
+    tf = slide.shapes.add_textbox(left=Cm(7.85), top=Cm(
+        2.5), width=Cm(2.62), height=Cm(0.85)).text_frame
+    p = tf.paragraphs[0]
+    p.text = "기동 순간 신호"
+    p.alignment = PP_ALIGN.CENTER
+    p.font.size = Pt(14)
+    pic = slide.shapes.add_picture(
+        ret["on_start_pic"], left=Cm(2.33), top=Cm(3.36), width=Cm(13.67))
+
+    # 정지 신호
+    tf = slide.shapes.add_textbox(left=Cm(23.54), top=Cm(
+        2.5), width=Cm(2.62), height=Cm(0.85)).text_frame
+    p = tf.paragraphs[0]
+    p.text = "정지 신호"
+    p.alignment = PP_ALIGN.CENTER
+    p.font.size = Pt(14)
+    pic = slide.shapes.add_picture(
+        ret["stop_pic"], left=Cm(17.87), top=Cm(3.36), width=Cm(13.67))
+
+    # 정지 순간 신호
+    tf = slide.shapes.add_textbox(left=Cm(7.85), top=Cm(
+        10.54), width=Cm(2.62), height=Cm(0.85)).text_frame
+    p = tf.paragraphs[0]
+    p.text = "정지 순간 신호"
+    p.alignment = PP_ALIGN.CENTER
+    p.font.size = Pt(14)
+    pic = slide.shapes.add_picture(
+        ret["on_stop_pic"], left=Cm(2.33), top=Cm(11.39), width=Cm(13.67))
+    return slides
+
+
+def _motor_key(m, result_cache):
+    # 이전 보고서의 모터 슬라이드를 재사용할지 판단하는 입력 키 (결과 캐시 키와 동일)
+    if result_cache is not None:
+        return result_cache.make_key(m["data"], ALGORITHM_VER, analysis_mode())
+    return cache.make_input_key(m["data"], ALGORITHM_VER, mode=analysis_mode())
+
+
+def _write_report_meta(prs, m_set, keys, motor_slides):
+    # 문서 속성(comments, 255자 제한)에는 형식 버전만, 모터별 입력 키는 슬라이드 이름(cSld@name)에 기록
+    meta = {"report_meta": REPORT_META_VER, "algorithm_ver": str(ALGORITHM_VER), "motors": len(m_set)}
+    prs.core_properties.comments = json.dumps(meta)
+    for m, key, slides in zip(m_set, keys, motor_slides):
+        for j, slide in enumerate(slides):
+            slide._element.cSld.set("name", json.dumps([j, key, m["name"]], ensure_ascii=False))
+
+
+def _read_report_meta(prs):
+    """
+    return: [(모터명, 입력 키, [슬라이드, ...]), ...],
+            증분 생성으로 만든 보고서가 아니거나 슬라이드 구성이 다르면 None
+    """
+    try:
+        meta = json.loads(prs.core_properties.comments or "")
+    except ValueError:
+        return None
+    if not isinstance(meta, dict) or meta.get("report_meta") != REPORT_META_VER:
+        return None
+    slides = list(prs.slides)
+    if len(slides) != HEAD_SLIDES + SLIDES_PER_MOTOR*meta.get("motors", -1):
+        return None
+    motors = []
+    for start in range(HEAD_SLIDES, len(slides), SLIDES_PER_MOTOR):
+        group = slides[start:start+SLIDES_PER_MOTOR]
+        try:
+            tags = [json.loads(slide.name) for slide in group]
+        except ValueError:
+            return None
+        if any(t[0] != j or t[1:] != tags[0][1:] for j, t in enumerate(tags)):
+            return None
+        motors.append((tags[0][2], tags[0][1], group))
+    return motors
+
+
+def find_previous_report(save_path):
+    """
+    증분 생성에 사용할 이전 보고서 (같은 경로, 없으면 같은 사이트의 가장 최근 보고서)
+    return: 경로 또는 None
+    """
+    if os.path.exists(save_path):
+        return save_path
+    site_prefix = os.path.basename(save_path).rsplit("_", 1)[0]
+    flist = glob.glob(os.path.join(glob.escape(os.path.dirname(save_path) or "."), f"{glob.escape(site_prefix)}_*.pptx"))
+    return max(flist, key=os.path.getmtime) if flist else None
+
+
+def _open_previous(path):
+    """
+    이전 보고서 열기
+    return: (Presentation, {(모터명, 입력 키): [[슬라이드, ...], ...]}), 사용할 수 없으면 (None, {})
+    """
+    try:
+        prs = Presentation(path)
+    except Exception:  # 손상되었거나 pptx 가 아닌 파일
+        return None, {}
+    motors = _read_report_meta(prs)
+    if motors is None:
+        return None, {}
+    reuse = {}
+    for name, key, slides in motors:
+        reuse.setdefault((name, key), []).append(slides)
+    return prs, reuse
+
+
+def _delete_slide(prs, slide):
+    sld_id_lst = prs.slides._sldIdLst
+    for sld_id in list(sld_id_lst):
+        if sld_id.id == slide.slide_id:
+            sld_id_lst.remove(sld_id)
+            prs.part.drop_rel(sld_id.rId)  # 슬라이드와 그 그림은 저장 시 빠짐
+            return
+
+
+def _reorder_slides(prs, slides):
+    # slides 순서대로 슬라이드 목록 재배치
+    sld_id_lst = prs.slides._sldIdLst
+    by_id = {sld_id.id: sld_id for sld_id in sld_id_lst}
+    order = [by_id[slide.slide_id] for slide in slides]
+    for sld_id in list(sld_id_lst):
+        sld_id_lst.remove(sld_id)
+    for sld_id in order:
+        sld_id_lst.append(sld_id)
+
+
+def _renumber_slide_parts(prs):
+    # 삭제 후 추가한 슬라이드가 기존 파일명(slideN.xml)과 겹치지 않도록 순서대로 다시 부여
+    for i, slide in enumerate(prs.slides, 1):
+        slide.part.partname = PackURI(f"/ppt/slides/slide{i}.xml")
+
+
+def _make_ppt(conf, save_path, progress, status, should_cancel, workers, executor, profile, incremental):
+    # make_ppt 본문. return: 완료 메시지
+    progress = progress or _noop
+    should_cancel = should_cancel or (lambda: False)
+    result_cache = cache.get_result_cache()
+    if result_cache is not None:
+        try:
+            result_cache.prune(ALGORITHM_VER)
+        except OSError as e:  # 다른 사이트가 같은 캐시를 정리하는 중
+            print(f"result cache prune failed: {e}", file=sys.stderr)
+
+    m_set = []
+    for m in conf["motor_set"]:
+        if (m["name"] in [None, ""]) or len(m['data']) == 0:
+            continue
+        m_set.append(m)
+    keys = [_motor_key(m, result_cache) for m in m_set]
+
+    # 프레젠테이션
+    prs, reuse = None, {}
+    previous = find_previous_report(save_path) if incremental else None
+    if previous is not None:
+        status(f"이전 보고서 여는 중: {os.path.basename(previous)}")
+        with profiling.stage("ppt.open_previous"):
+            prs, reuse = _open_previous(previous)
+    if prs is None:
+        status(f"ppt 초기화")
+        prs = _new_presentation()
+        head = [_add_title_slide(prs, conf), _add_motor_list_slide(prs, m_set)]
+    else:
+        head = list(prs.slides)[:HEAD_SLIDES]
+        _set_title_text(head[0], conf)
+        _set_motor_list(head[1], m_set)
+
+    # 입력이 같은 모터는 이전 슬라이드를 그대로 사용하고, 나머지만 분석
+    motor_slides = [None] * len(m_set)
+    for i, m in enumerate(m_set):
+        if keys[i] is not None and reuse.get((m["name"], keys[i])):
+            motor_slides[i] = reuse[(m["name"], keys[i])].pop(0)
+    for left in reuse.values():
+        for slides in left:
+            for slide in slides:
+                _delete_slide(prs, slide)
+    todo = [i for i in range(len(m_set)) if motor_slides[i] is None]
+    reused = len(m_set) - len(todo)
+    profiling.count("ppt.reused_motors", reused)
+
     # 분석 보고서
-    progressbar.setMaximum(len(m_set))
-    progressbar.setValue(0)
-    for pi, m in enumerate(m_set):
-        progressbar.setValue(pi+1)
-        statusbar.showMessage(f"{m['name']} 분석중..")
-        ret = run_analysis(motor_name=m["name"], aws_files=m["data"])
-        # 메인 분석 페이지 추가
-        report_layout = prs.slide_layouts[6]
-        slide = prs.slides.add_slide(report_layout)
-
-        # 상단 제목
-        txBox = slide.shapes.add_textbox(Cm(2.33), Cm(
-            1), Cm(29), Cm(1.5))  # left, top, width, height
-        tf = txBox.text_frame
-        p = tf.paragraphs[0]
-        p.text = f"{m['name']} 신호 분석 - 운전신호"
-        p.font.size = Pt(20)
-        p.font.bold = True
+    def on_progress(done, total, name):
+        progress(done, total)
+        status(f"{name} 분석 완료 ({done}/{total})")
 
-        # 운전신호
-        tf = slide.shapes.add_textbox(left=Cm(7.85), top=Cm(
-            2.5), width=Cm(2.62), height=Cm(0.85)).text_frame
-        p = tf.paragraphs[0]
-        p.text = "운전신호 (RST 상)"
-        p.alignment = PP_ALIGN.CENTER
-        p.font.size = Pt(14)
-        pic = slide.shapes.add_picture(
-            ret["driving_rst_pic"], left=Cm(2.33), top=Cm(3.36), width=Cm(13.67))
-
-        # FFT 분석
-        tf = slide.shapes.add_textbox(left=Cm(23.54), top=Cm(
-            2.5), width=Cm(2.62), height=Cm(0.85)).text_frame
-        p = tf.paragraphs[0]
-        p.text = "FFT 분석"
-        p.alignment = PP_ALIGN.CENTER
-        p.font.size = Pt(14)
-        pic = slide.shapes.add_picture(
-            ret["driving_fft_pic"], left=Cm(17.87), top=Cm(3.36), width=Cm(13.67))
-
-        # 텍스트
-        tf = slide.shapes.add_textbox(left=Cm(2.33), top=Cm(
-            10.65), width=Cm(21.22), height=Cm(7)).text_frame
-        p = tf.paragraphs[0]
-        p.text = ret["driving_text"]
-        p.font.size = Pt(10)
-
-        # 순간 최대 변동폭 (RMS-A)
-        tf = slide.shapes.add_textbox(left=Cm(26.55), top=Cm(
-            10.65), width=Cm(3.12), height=Cm(0.85)).text_frame
-        p = tf.paragraphs[0]
-        p.text = "순간 최대 변동폭 (RMS-A)"
-        p.alignment = PP_ALIGN.CENTER
-        p.font.size = Pt(14)
-        pic = slide.shapes.add_picture(
-            ret["driving_p2p_max_pic"], left=Cm(24.67), top=Cm(11.5), width=Cm(6.87))
-
-        # 추가 분석 페이지 추가
-        report_layout = prs.slide_layouts[6]
-        slide = prs.slides.add_slide(report_layout)
-
-        # 상단 제목
-        txBox = slide.shapes.add_textbox(Cm(2.33), Cm(
-            1), Cm(29), Cm(1.5))  # left, top, width, height
-        tf = txBox.text_frame
-        p = tf.paragraphs[0]
-        p.text = f"{m['name']} 신호 분석 - 기타 신호"
-        p.font.size = Pt(20)
-        p.font.bold = True
+    if workers is None:
+        workers = conf.get("workers")
+    # 모두 재사용하면 progress(0, 0) 대신 완료로 표시 (Qt 진행 표시줄은 0/0 을 무한 진행으로 표시)
+    if todo:
+        progress(0, len(todo))
+    else:
+        progress(1, 1)
+    status(f"{len(todo)}개 모터 분석중.." + (f" (이전 보고서에서 {reused}개 재사용)" if reused else ""))
+    for pi, ret in iter_analysis([m_set[i] for i in todo], workers=workers, progress=on_progress,
+                                 result_cache=result_cache, executor=executor,
+                                 should_cancel=should_cancel, profile=profile):
+        slide_start = time.perf_counter()
+        motor_slides[todo[pi]] = _add_motor_slides(prs, m_set[todo[pi]], ret)
+        profiling.current().add_time("ppt.slides", time.perf_counter() - slide_start)
 
-        # 기동 순간 신호
-        tf = slide.shapes.add_textbox(left=Cm(7.85), top=Cm(
-            2.5), width=Cm(2.62), height=Cm(0.85)).text_frame
-        p = tf.paragraphs[0]
-        p.text = "기동 순간 신호"
-        p.alignment = PP_ALIGN.CENTER
-        p.font.size = Pt(14)
-        pic = slide.shapes.add_picture(
-            ret["on_start_pic"], left=Cm(2.33), top=Cm(3.36), width=Cm(13.67))
-
-        # 정지 신호
-        tf = slide.shapes.add_textbox(left=Cm(23.54), top=Cm(
-            2.5), width=Cm(2.62), height=Cm(0.85)).text_frame
-        p = tf.paragraphs[0]
-        p.text = "정지 신호"
-        p.alignment = PP_ALIGN.CENTER
-        p.font.size = Pt(14)
-        pic = slide.shapes.add_picture(
-            ret["stop_pic"], left=Cm(17.87), top=Cm(3.36), width=Cm(13.67))
-
-        # 정지 순간 신호
-        tf = slide.shapes.add_textbox(left=Cm(7.85), top=Cm(
-            10.54), width=Cm(2.62), height=Cm(0.85)).text_frame
-        p = tf.paragraphs[0]
-        p.text = "정지 순간 신호"
-        p.alignment = PP_ALIGN.CENTER
-        p.font.size = Pt(14)
-        pic = slide.shapes.add_picture(
-            ret["on_stop_pic"], left=Cm(2.33), top=Cm(11.39), width=Cm(13.67))
-
-    prs.save(save_path)
-    statusbar.showMessage("결과 리포트 생성 완료!")
-    return save_path
+    if should_cancel():
+        raise ReportCancelled()
+    _reorder_slides(prs, head + [slide for slides in motor_slides for slide in slides])
+    _renumber_slide_parts(prs)
+    _write_report_meta(prs, m_set, keys, motor_slides)
+    with profiling.stage("ppt.save"):
+        prs.save(save_path)
+    profiling.count("ppt.bytes", os.path.getsize(save_path))
+    profiling.count("ppt.slides", len(prs.slides))
+    message = "결과 리포트 생성 완료!"
+    if result_cache is not None:
+        message += f" (분석 캐시 적중 {result_cache.hits}, 재분석 {result_cache.misses})"
+    if reused:
+        message += f" (이전 보고서에서 {reused}개 모터 재사용)"
+    return message
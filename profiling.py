@@ -0,0 +1,244 @@
+"""
+보고서 생성 단계별 시간/처리량 측정
+단계 타이머와 카운터는 항상 켜져 있고 (호출당 수 us), cProfile/tracemalloc 은
+설정(conf["profile"]) 또는 환경변수 FA_PROFILE 로 켭니다.
+    FA_PROFILE=cprofile            호출 함수별 누적 시간 (pstats)
+    FA_PROFILE=tracemalloc         최대 메모리 할당량
+    FA_PROFILE=cprofile,tracemalloc
+ex)
+    with profiling.collect() as rec:
+        with profiling.stage("load.decode"):
+            ...
+        profiling.count("load.bytes", len(raw))
+    profiling.write_report(rec, "./temp/profile/run.json")
+워커 프로세스의 측정값은 run_analysis 결과(ret["profile"])로 돌아와 Recorder.merge 로 합쳐지므로,
+단계 시간은 프로세스들의 합이고 "total" 만 실제 경과 시간입니다.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILE_MODE = os.environ.get("FA_PROFILE", "")
+PROFILE_DIR = os.environ.get("FA_PROFILE_DIR", "./temp/profile")
+PSTATS_TOP = 30  # 보고서 json 에 남길 cProfile 상위 함수 수
+
+_local = threading.local()
+
+
+class _StatsDump:
+    # pstats.Stats 가 읽을 수 있는 raw stats 래퍼 (프로세스 간 전달용)
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class Recorder:
+    """
+    단계별 시간, 카운터, 최대값, cProfile 통계 모음
+    stages: {이름: [호출 수, 누적 시간(s)]}
+    counters: {이름: 합계}
+    peaks: {이름: 최대값}
+    """
+    def __init__(self, mode=""):
+        self.mode = mode
+        self.stages = {}
+        self.counters = {}
+        self.peaks = {}
+        self.pstats = None
+        self.wall = 0.0
+        self.profiling = False  # cProfile 동작 중 여부 (중첩 collect 는 바깥 프로파일러가 측정)
+
+    def add_time(self, name, seconds, calls=1):
+        st = self.stages.setdefault(name, [0, 0.0])
+        st[0] += calls
+        st[1] += seconds
+
+    def count(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def peak(self, name, value):
+        self.peaks[name] = max(self.peaks.get(name, value), value)
+
+    def merge(self, other):
+        """
+        다른 Recorder (또는 to_dict 결과) 합치기
+        """
+        if other is None:
+            return
+        if isinstance(other, Recorder):
+            other = other.to_dict(raw=True)
+        for name, (calls, seconds) in other.get("stages", {}).items():
+            self.add_time(name, seconds, calls)
+        for name, value in other.get("counters", {}).items():
+            self.count(name, value)
+        for name, value in other.get("peaks", {}).items():
+            self.peak(name, value)
+        if other.get("pstats"):
+            if self.pstats is None:
+                self.pstats = dict(other["pstats"])
+            else:
+                st = pstats.Stats(_StatsDump(self.pstats))
+                st.add(_StatsDump(other["pstats"]))
+                self.pstats = st.stats
+
+    def to_dict(self, raw=False):
+        """
+        raw: True 이면 cProfile raw stats 포함 (프로세스 간 전달용, json 불가)
+        """
+        ret = {
+            "mode": self.mode,
+            "total": self.wall,
+            "stages": {k: list(v) for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+            "peaks": dict(self.peaks),
+        }
+        if raw and self.pstats:
+            ret["pstats"] = self.pstats
+        return ret
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = [Recorder()]
+    return stack
+
+
+def current():
+    """
+    return: 현재 스레드에서 기록 중인 Recorder
+    """
+    return _stack()[-1]
+
+
+@contextmanager
+def stage(name):
+    """
+    단계 시간 측정 (중첩 가능, 이름은 "모듈.단계" 형식)
+    """
+    rec = current()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        rec.add_time(name, time.perf_counter() - start)
+
+
+def count(name, value=1):
+    current().count(name, value)
+
+
+def peak(name, value):
+    current().peak(name, value)
+
+
+@contextmanager
+def collect(mode=None):
+    """
+    새 Recorder 로 측정 (끝나면 이전 Recorder 로 복귀, 합치지는 않음)
+    mode: "cprofile", "tracemalloc" 조합 (None 이면 PROFILE_MODE)
+    return: Recorder
+    """
+    mode = PROFILE_MODE if mode is None else (mode or "")
+    rec = Recorder(mode)
+    stack = _stack()
+    stack.append(rec)
+    profiler = None
+    if "cprofile" in mode and not any(r.profiling for r in stack):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            rec.profiling = True
+        except ValueError:  # 다른 프로파일러가 이미 동작 중
+            profiler = None
+    started_trace = "tracemalloc" in mode and not tracemalloc.is_tracing()
+    if started_trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec.wall = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            profiler.create_stats()
+            rec.pstats = profiler.stats
+            rec.profiling = False
+        if "tracemalloc" in mode and tracemalloc.is_tracing():
+            rec.peak("tracemalloc.peak_bytes", tracemalloc.get_traced_memory()[1])
+            if started_trace:
+                tracemalloc.stop()
+        stack.pop()
+
+
+def report_path(save_path, profile_dir=None):
+    """
+    pptx 경로에 해당하는 타이밍 보고서 경로
+    """
+    name = os.path.splitext(os.path.basename(save_path))[0]
+    return os.path.join(profile_dir or PROFILE_DIR, f"{name}.json")
+
+
+def write_report(rec, path, extra=None):
+    """
+    타이밍 보고서 json 저장. cProfile 통계가 있으면 같은 이름의 .prof 도 저장
+    (snakeviz, python -m pstats 로 열람)
+    extra: 보고서에 추가할 항목 (사이트, 설정 등)
+    return: path
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    report = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), **(extra or {}), **rec.to_dict()}
+    if rec.pstats:
+        st = pstats.Stats(_StatsDump(rec.pstats))
+        st.dump_stats(os.path.splitext(path)[0] + ".prof")
+        out = io.StringIO()
+        st.stream = out
+        st.sort_stats("cumulative").print_stats(PSTATS_TOP)
+        report["cprofile"] = out.getvalue().splitlines()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    return path
+
+
+def format_summary(report, top=6):
+    """
+    상태 표시줄/명령행용 한 줄 요약
+    report: Recorder 또는 write_report 로 저장한 dictionary
+    top: 표시할 단계 수 (누적 시간 순)
+    """
+    if isinstance(report, Recorder):
+        report = report.to_dict()
+    stages = sorted(report["stages"].items(), key=lambda x: -x[1][1])[:top]
+    text = f"총 {report['total']:.1f}s | " + ", ".join(f"{k} {v[1]:.1f}s" for k, v in stages)
+    counters = report.get("counters", {})
+    if counters.get("load.bytes"):
+        text += f" | 읽은 파일 {counters['load.bytes']/2**20:.0f} MB"
+    if report.get("peaks", {}).get("tracemalloc.peak_bytes"):
+        text += f" | 최대 메모리 {report['peaks']['tracemalloc.peak_bytes']/2**20:.0f} MB"
+    return text
+
+
+def format_table(report):
+    """
+    단계별 시간과 카운터 표 (명령행 출력용)
+    """
+    if isinstance(report, Recorder):
+        report = report.to_dict()
+    lines = [f"{'stage':28s} {'calls':>7s} {'seconds':>9s} {'share':>6s}"]
+    total = report["total"] or 1.0
+    for name, (calls, seconds) in sorted(report["stages"].items(), key=lambda x: -x[1][1]):
+        lines.append(f"{name:28s} {calls:7d} {seconds:9.3f} {seconds/total*100:5.1f}%")
+    lines.append(f"{'total (wall)':28s} {'':7s} {report['total']:9.3f}")
+    for name, value in sorted(report.get("counters", {}).items()):
+        lines.append(f"{name:28s} {value:>17,}")
+    for name, value in sorted(report.get("peaks", {}).items()):
+        lines.append(f"{name:28s} {value:>17,}")
+    return "\n".join(lines)
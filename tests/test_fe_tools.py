@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import fe_tools as fet
+
+FS = 10000
+
+
+def _mains(n, f0, amp=10.0, harmonics=None):
+    t = np.arange(n) / FS
+    x = amp * np.cos(2*np.pi*f0*t)
+    for order, ratio in (harmonics or {}).items():
+        x += amp * ratio * np.cos(2*np.pi*order*f0*t + 0.3*order)
+    return x
+
+
+@pytest.mark.parametrize("window", ["hann", "flattop"])
+def test_harmonics_off_bin_fundamental(window):
+    # 기본파가 bin 사이 (59.93 Hz, N=200003) 에 있어도 진폭/THD 가 맞아야 함
+    harmonics = {5: 0.05, 7: 0.03}
+    x = _mains(200003, 59.93, harmonics=harmonics)
+    spec = fet.calc_batch_spectrum(x[None], FS, window=window)
+    true_thd = np.sqrt(sum(r**2 for r in harmonics.values())) * 100
+    assert spec["freq"][0] == pytest.approx(59.93, abs=0.01)
+    assert spec["amp"][0] == pytest.approx(10.0, rel=0.005)
+    assert spec["thd"][0] == pytest.approx(true_thd, rel=0.01)
+
+
+def test_harmonics_on_bin_fundamental():
+    x = _mains(100000, 60.0, harmonics={3: 0.1})
+    spec = fet.calc_batch_spectrum(x[None], FS, window="hann")
+    assert spec["amp"][0] == pytest.approx(10.0, rel=0.005)
+    assert spec["thd"][0] == pytest.approx(10.0, rel=0.01)
+
+
+def test_harmonics_short_spectrum():
+    spec = fet.calc_harmonics_from_spectrum(np.array([0.0, 1.0]), np.ones((3, 2)))
+    assert np.isnan(spec["freq"]).all()
@@ -0,0 +1,43 @@
+import numpy as np
+
+from feature_index import FeatureIndex
+
+
+def _rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        row = {"rms_mean": rng.normal(10, 1), "rms_std": 0.1, "p2p": 1.0, "acq_time": 1700000000 + i,
+               "mac_address": "aa"}
+        for ph in ("u", "v", "w"):
+            row.update({f"rms_{ph}": 7.0, f"thd_{ph}": 2.0, f"freq_{ph}": 60.0, f"amp_{ph}": 10.0})
+        rows.append(row)
+    return rows
+
+
+def test_build_twice_does_not_duplicate(tmp_path):
+    rows = _rows(4)
+    hashes = [f"h{i}" for i in range(4)]
+    index = FeatureIndex()
+    assert index.add_rows(rows, site="s", motor="m", hashes=hashes) == 4
+    assert index.add_rows(rows, site="s", motor="m", hashes=hashes) == 0
+    index.save(tmp_path / "idx")
+
+    # 저장한 인덱스에 다시 추가 (index build --append)
+    index = FeatureIndex.load(tmp_path / "idx", mmap=False)
+    assert index.add_rows(rows[2:] + _rows(1, seed=1), site="s", motor="m", hashes=hashes[2:] + ["h9"]) == 1
+    assert index.n == 5
+
+
+def test_same_capture_in_other_motor_is_kept():
+    rows = _rows(2)
+    index = FeatureIndex()
+    index.add_rows(rows, site="s", motor="m1", hashes=["a", "b"])
+    assert index.add_rows(rows, site="s", motor="m2", hashes=["a", "b"]) == 2
+
+
+def test_rows_without_hash_are_not_deduplicated():
+    rows = _rows(3)
+    index = FeatureIndex()
+    index.add_rows(rows, site="s", motor="m")
+    assert index.add_rows(rows, site="s", motor="m") == 3
@@ -0,0 +1,42 @@
+import os
+
+import benchmark
+import watch
+
+
+def _capture(path, mac, seed):
+    benchmark.make_realistic_AWSjson(str(path), 20000, mac_address=mac, seed=seed)
+    old = os.stat(path).st_mtime - 10  # settle 시간 경과
+    os.utime(path, (old, old))
+
+
+def test_restart_skips_processed_files(tmp_path):
+    folder = tmp_path / "download"
+    folder.mkdir()
+    state = tmp_path / "out" / watch.STATE_FILE
+    _capture(folder / "c0.json", "AA", 0)
+    _capture(folder / "c1.json", "BB", 1)
+    (folder / "broken.json").write_text("{\"mac_address\": ")
+    os.utime(folder / "broken.json", (0, 0))
+
+    watcher = watch.Watcher(str(folder), state_path=str(state))
+    added = watcher.poll()
+    assert sorted(added) == ["AA", "BB"]
+    assert len(watcher.errors) == 1
+
+    # 다시 시작: 처리한 파일은 읽지 않고 모터 data 에만 되살림, 실패한 파일도 다시 보고하지 않음
+    _capture(folder / "c2.json", "AA", 2)
+    watcher = watch.Watcher(str(folder), state_path=str(state))
+    assert watcher.load_assigned() == 0
+    added = watcher.poll()
+    assert {k: len(v) for k, v in added.items()} == {"AA": 1}
+    assert watcher.errors == []
+    data = {m["name"]: len(m["data"]) for m in watcher.conf["motor_set"]}
+    assert data == {"AA": 2, "BB": 1}
+    row = watcher.summary()["motors"][0]
+    assert (row["motor"], row["captures"], row["new"], row["restored"]) == ("AA", 1, 1, 1)
+
+    # 내용이 바뀐 파일은 새 파일로 처리
+    _capture(folder / "c1.json", "BB", 3)
+    watcher = watch.Watcher(str(folder), state_path=str(state))
+    assert {k: len(v) for k, v in watcher.poll().items()} == {"BB": 1}
@@ -3,19 +3,23 @@ import os
 from datetime import datetime
 import json
 
+CONF_PATH = "./data/config.json"
+
 def is_valid_path(path):
     try:
         return os.path.isdir(path)  
     except:
         return False
 
-def delete_all_files_in_folder(folder_path):
+def delete_all_files_in_folder(folder_path, keep=()):
     try:
         # 폴더 내부의 모든 파일 리스트를 가져옴
         file_list = os.listdir(folder_path)
 
-        # 각 파일을 순회하며 삭제
+        # 각 파일을 순회하며 삭제 (keep 에 있는 이름은 남김)
         for file_name in file_list:
+            if file_name in keep:
+                continue
             file_path = os.path.join(folder_path, file_name)
 
             # 파일인 경우 삭제
@@ -30,8 +34,31 @@ def delete_all_files_in_folder(folder_path):
         print(f"An error occurred: {e}")
 
 
-def load_conf():
-    with open("./data/config.json", "r", encoding="utf-8") as f:
+def temp_keep(folder, confs=()):
+    """
+    folder 를 비울 때 남길 이름 (delete_all_files_in_folder 의 keep)
+    설정된 캡처/결과 캐시, 프로파일 폴더 중 folder 안에 있는 것의 최상위 이름입니다.
+    confs: 캐시 폴더를 따로 지정한 설정 dictionary 들 (cache_dir, result_cache_dir)
+    return: 이름 tuple. folder 자체가 캐시 폴더이면 folder 의 모든 이름
+    """
+    import cache
+    import profiling
+
+    settings = [cache.get_settings()] + [cache.settings_from_conf(conf) for conf in confs]
+    dirs = [profiling.PROFILE_DIR] + [s[k] for s in settings for k in ("cache_dir", "result_dir")]
+    root = os.path.abspath(folder)
+    keep = set()
+    for d in dirs:
+        rel = os.path.relpath(os.path.abspath(d), root)
+        if rel == os.curdir:
+            return tuple(os.listdir(folder))
+        if rel != os.pardir and not rel.startswith(os.pardir + os.sep):
+            keep.add(rel.split(os.sep)[0])
+    return tuple(sorted(keep))
+
+
+def load_conf(path=CONF_PATH):
+    with open(path, "r", encoding="utf-8") as f:
         conf = json.load(f)
     # motor_set = {
     #     "name": "",
@@ -40,13 +67,14 @@ def load_conf():
     return conf
 
 
-def save_conf(conf):
-    with open("./data/config.json", "w", encoding="utf-8") as f:
+def save_conf(conf, path=CONF_PATH):
+    with open(path, "w", encoding="utf-8") as f:
         json.dump(conf, f, indent=4, ensure_ascii=False)
 
 
 def initialize():
     conf = load_conf()
     os.makedirs("./temp", exist_ok=True)
-    delete_all_files_in_folder("./temp")
+    # 디코딩/분석 결과 캐시는 실행 간에 유지 (설정의 cache_dir, result_cache_dir)
+    delete_all_files_in_folder("./temp", keep=temp_keep("./temp", [conf]))
     return conf
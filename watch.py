@@ -0,0 +1,322 @@
+"""
+폴더 감시: 다운로드 폴더에 새로 들어오는 AWS 캡처를 모터별로 바로 누적 분석
+폴더를 주기적으로 확인(폴링)해서 처음 보는 파일만 읽고, mac_address 로 모터를 정한 뒤
+모터별 DrivingAggregator 에 누적합니다. 한 번 누적한 파일은 다시 읽지 않습니다.
+state_path 를 주면 처리한 파일과 모터 배정을 저장해서, 다시 시작해도 이미 처리한 파일은 읽지 않습니다.
+ex)
+    watcher = Watcher("./download", conf, state_path="./result/.fa_watch_state.json")
+    watcher.load_assigned()
+    run(watcher, on_update=lambda added: print(watcher.summary()))
+"""
+import copy
+import json
+import os
+import time
+
+import numpy as np
+
+import analyze
+import fe_tools as fet
+import profiling
+
+POLL_INTERVAL = float(os.environ.get("FA_WATCH_INTERVAL", 2.0))  # 폴더 확인 주기 (초)
+SETTLE_TIME = 1.0  # 마지막 수정 후 이 시간(초)이 지난 파일만 읽음 (다운로드 중인 파일 제외)
+UNKNOWN_MAC = "unknown"
+STATE_FILE = ".fa_watch_state.json"  # 처리한 파일 목록 (cli watch 기본: 출력 폴더에 저장)
+STATE_VER = 1
+
+
+def _signature(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class FolderIndex:
+    """
+    폴더의 파일을 (크기, 수정 시각) 으로 색인해서 새 파일만 찾습니다.
+    폴더 수정 시각이 그대로이고 기다리는 파일이 없으면 파일 목록을 다시 읽지 않습니다.
+    읽기에 실패한 파일은 내용이 바뀌었을 때 (크기/수정 시각 변경) 다시 시도합니다.
+    처리한 파일도 (크기, 수정 시각) 을 기억해서, 저장했던 상태를 되살릴 때 바뀐 파일은 새 파일로 봅니다.
+    """
+    def __init__(self, folder, extension="json", settle=SETTLE_TIME):
+        self.folder = folder
+        self.extension = extension
+        self.settle = settle
+        self.done = {}       # 처리한 파일: (크기, 수정 시각) (다시 읽지 않음)
+        self.failed = {}     # 읽기 실패: (크기, 수정 시각)
+        self.pending = set() # 아직 쓰는 중인 파일
+        self._dir_mtime = None
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def mark_done(self, path):
+        try:
+            sig = _signature(path)
+        except OSError:
+            sig = None
+        self.done[self.key(path)] = sig
+        self.failed.pop(self.key(path), None)
+
+    def mark_failed(self, path):
+        try:
+            self.failed[self.key(path)] = _signature(path)
+        except OSError:
+            pass
+
+    def mark_existing(self):
+        """
+        지금 폴더에 있는 파일은 모두 처리한 것으로 표시 (이후 들어오는 파일만 처리)
+        """
+        for path in fet.load_get_file_list(self.folder, self.extension):
+            self.mark_done(path)
+
+    def state(self):
+        """
+        return: 저장용 {"done": {파일: [크기, 수정 시각]}, "failed": {...}}
+        """
+        return {"done": {k: list(v) for k, v in self.done.items() if v is not None},
+                "failed": {k: list(v) for k, v in self.failed.items()}}
+
+    def restore(self, state):
+        """
+        state() 로 저장한 상태를 되살림. 그 뒤 바뀌었거나 없어진 파일은 제외
+        return: 처리한 것으로 되살린 파일 목록
+        """
+        restored = []
+        for key, sig in state.get("done", {}).items():
+            try:
+                if _signature(key) != tuple(sig):
+                    continue
+            except OSError:
+                continue
+            self.done[key] = tuple(sig)
+            restored.append(key)
+        for key, sig in state.get("failed", {}).items():
+            if key not in self.done:
+                self.failed[key] = tuple(sig)
+        return restored
+
+    def scan(self, now=None):
+        """
+        return: 새로 처리할 파일 목록 (수정 시각 순)
+        """
+        now = time.time() if now is None else now
+        try:
+            dir_mtime = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return []
+        if dir_mtime == self._dir_mtime and not self.pending and not self.failed:
+            return []
+        self._dir_mtime = dir_mtime
+        self.pending = set()
+        ready = []
+        for path in fet.load_get_file_list(self.folder, self.extension):
+            key = self.key(path)
+            if key in self.done:
+                continue
+            try:
+                sig = _signature(path)
+            except OSError:  # 목록을 읽은 뒤 삭제됨
+                continue
+            if self.failed.get(key) == sig:
+                continue
+            if now - sig[1]/1e9 < self.settle:
+                self.pending.add(key)
+                continue
+            ready.append((sig[1], path))
+        return [path for _, path in sorted(ready)]
+
+
+class Watcher:
+    """
+    새 캡처를 모터별 DrivingAggregator 에 누적
+    conf 의 motor_set 에 이미 배정된 파일로 mac_address -> 모터 대응을 만들고
+    (모터 설정의 "mac_address" 로 직접 지정 가능), 처음 보는 mac_address 는
+    그 주소를 이름으로 하는 새 모터로 추가합니다.
+    conf 는 복사해서 쓰고, 새 파일은 self.conf 의 모터 data 에 추가됩니다 (보고서 갱신용).
+    state_path: 감시로 추가한 파일/모터 배정을 저장할 json. 다시 시작하면 그대로 바뀌지 않은 파일은
+        읽지 않고 self.conf 의 모터 data 에만 되살립니다 (통계는 이번 실행에서 누적한 캡처만, summary 의 "restored").
+    """
+    def __init__(self, folder, conf=None, settle=SETTLE_TIME, new_only=False, state_path=None):
+        self.index = FolderIndex(folder, settle=settle)
+        self.conf = copy.deepcopy(conf) if conf is not None else {"motor_set": []}
+        self.motor_of = {}   # mac_address -> 모터명
+        self.macs = {}       # 모터명 -> mac_address
+        self.aggs = {}       # 모터명 -> DrivingAggregator
+        self.new_files = {}  # 모터명 -> 감시 중 추가된 파일 수
+        self.errors = []     # [{"file", "error"}]
+        self.state_path = state_path
+        self.files = {}      # 감시로 추가한 파일 -> 모터명 (상태 저장용)
+        self.restored = {}   # 모터명 -> 이전 실행에서 처리해 되살린 파일 수
+        for m in self.conf["motor_set"]:
+            if m.get("name") and m.get("mac_address"):
+                self._assign_mac(m["mac_address"], m["name"])
+        if state_path is not None:
+            self.load_state()
+        if new_only:
+            self.index.mark_existing()
+
+    def _assign_mac(self, mac, motor):
+        self.motor_of.setdefault(mac, motor)
+        self.macs.setdefault(motor, mac)
+
+    def _motor_entry(self, name):
+        for m in self.conf["motor_set"]:
+            if m.get("name") == name:
+                return m
+        m = {"name": name, "data": []}
+        self.conf["motor_set"].append(m)
+        return m
+
+    def load_state(self):
+        """
+        state_path 의 상태를 되살림 (처리한 파일, mac_address 대응)
+        return: 되살린 파일 수
+        """
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if state.get("ver") != STATE_VER:
+            return 0
+        for mac, motor in state.get("macs", {}).items():
+            self._assign_mac(mac, motor)
+        files = state.get("files", {})
+        restored = self.index.restore({"done": {k: v for k, v in state.get("done", {}).items() if k in files},
+                                       "failed": state.get("failed", {})})
+        for key in restored:
+            motor = files[key]
+            data = self._motor_entry(motor)["data"]
+            if not any(FolderIndex.key(p) == key for p in data):
+                data.append(key)
+            self.files[key] = motor
+            self.restored[motor] = self.restored.get(motor, 0) + 1
+        return len(restored)
+
+    def save_state(self):
+        """
+        처리한 파일과 모터 배정을 state_path 에 저장 (임시 파일에 쓴 뒤 교체)
+        """
+        if self.state_path is None:
+            return
+        index = self.index.state()
+        state = {
+            "ver": STATE_VER,
+            "folder": self.index.folder,
+            "macs": dict(self.motor_of),
+            "files": self.files,
+            "done": {k: v for k, v in index["done"].items() if k in self.files},
+            "failed": index["failed"],
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+
+    def _fold(self, motor, path):
+        # 캡처 하나를 읽어 motor 에 누적. return: mac_address, 실패 시 None
+        try:
+            d = fet.load_AWSjson(path)
+            mac = d.get("mac_address") or UNKNOWN_MAC
+            if motor is None:
+                self._assign_mac(mac, mac)
+                motor = self.motor_of[mac]
+            agg = self.aggs.get(motor)
+            if agg is None:
+                agg = self.aggs[motor] = analyze.DrivingAggregator()
+            agg.add(d)
+        except Exception as e:
+            self.index.mark_failed(path)
+            self.errors.append({"file": path, "error": f"{type(e).__name__}: {e}"})
+            return None, motor
+        self.index.mark_done(path)
+        return mac, motor
+
+    def load_assigned(self):
+        """
+        conf 에 이미 배정된 파일을 한 번 누적 (모터별 통계의 시작점, mac_address 대응 생성)
+        return: 누적한 파일 수
+        """
+        n = 0
+        for m in self.conf["motor_set"]:
+            if not m.get("name"):
+                continue
+            for path in m["data"]:
+                if FolderIndex.key(path) in self.files:  # 이전 실행에서 처리한 파일
+                    continue
+                mac, _ = self._fold(m["name"], path)
+                if mac is not None:
+                    self._assign_mac(mac, m["name"])
+                    n += 1
+        return n
+
+    def poll(self):
+        """
+        폴더의 새 파일을 읽어 모터별로 누적
+        return: 이번에 추가된 {모터명: [파일, ...]}
+        """
+        added = {}
+        with profiling.stage("watch.scan"):
+            paths = self.index.scan()
+        failed = dict(self.index.failed)
+        for path in paths:
+            with profiling.stage("watch.fold"):
+                mac, motor = self._fold(None, path)
+            if mac is None:
+                continue
+            self._motor_entry(motor)["data"].append(path)
+            self.files[FolderIndex.key(path)] = motor
+            self.new_files[motor] = self.new_files.get(motor, 0) + 1
+            added.setdefault(motor, []).append(path)
+        if added or self.index.failed != failed:
+            self.save_state()
+        return added
+
+    def summary(self):
+        """
+        모터별 누적 지표
+        return: {"time": str, "motors": [{"motor", "mac_address", "captures", "new", "restored", "rms_mean", ...}], "errors": int}
+        """
+        motors = []
+        for name, agg in self.aggs.items():
+            if agg.count == 0:
+                continue
+            row = {
+                "motor": name,
+                "mac_address": self.macs.get(name),
+                "captures": agg.count,
+                "new": self.new_files.get(name, 0),
+                "restored": self.restored.get(name, 0),
+                "rms_mean": round(float(agg.rms_stats.mean), 4),
+                "rms_std": round(float(agg.rms_stats.std), 4),
+                "p2p": round(float(agg.p2p), 4),
+                "starts": agg.n_starts,
+                "stops": agg.n_stops,
+            }
+            for k, label in zip(agg.PHASES, ("u", "v", "w")):
+                row[f"thd_{label}"] = round(float(np.mean(agg.thd[k])), 4)
+            motors.append(row)
+        return {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "motors": motors, "errors": len(self.errors)}
+
+
+def run(watcher, interval=POLL_INTERVAL, on_update=None, should_stop=None, max_polls=None):
+    """
+    폴링 루프
+    on_update: 새 파일이 누적될 때마다 on_update(added) 호출 (added: Watcher.poll 결과)
+    should_stop: True 를 반환하면 종료
+    max_polls: 이 횟수만큼 확인 후 종료 (None: 계속)
+    """
+    polls = 0
+    while True:
+        start = time.perf_counter()
+        added = watcher.poll()
+        if added and on_update is not None:
+            on_update(added)
+        polls += 1
+        if (max_polls is not None and polls >= max_polls) or (should_stop is not None and should_stop()):
+            return
+        time.sleep(max(interval - (time.perf_counter() - start), 0.0))